@@ -5,7 +5,11 @@
 #            script que o Streamlit executa. A sua função é apresentar o
 #            projeto e orientar o utilizador para as páginas de análise.
 # ==============================================================================
+import pandas as pd
 import streamlit as st
+from modules.aquecimento import iniciar_aquecimento
+from modules.query_backend import modo_snapshot
+from modules.snapshots import carregar_snapshot
 from modules.style import CSS_STYLE
 
 # --- 1. Configuração da Página ---
@@ -22,6 +26,10 @@ st.set_page_config(
 # Isto garante uma identidade visual consistente em toda a aplicação.
 st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
+# Lança (uma única vez por servidor) o carregamento dos datasets e dos seus
+# agregados em segundo plano, enquanto o utilizador lê esta página.
+estado_aquecimento = iniciar_aquecimento()
+
 # --- 3. Conteúdo da Página Principal ---
 # Esta secção constrói o conteúdo visual da página de entrada.
 
@@ -53,4 +61,43 @@ st.markdown("---")
 st.subheader("Como Navegar")
 st.markdown("Para começar, selecione uma das páginas de análise no menu da barra lateral à esquerda.")
 
+# --- 5. Estado dos Dados ---
+# Indica se os datasets já estão carregados e prontos a usar. Enquanto o
+# aquecimento decorre, o fragmento atualiza-se a cada segundo; quando
+# termina, a página volta a executar e mostra apenas o resumo.
+ICONES_ESTADO = {'pendente': '⏳', 'em_curso': '🔄', 'pronto': '✅', 'erro': '⚠️'}
+
+
+def mostrar_estado_dados(resumo):
+    """Uma linha por dataset, com o seu estado e o tempo de preparação."""
+    for tarefa in resumo.values():
+        detalhe = f" — {tarefa['segundos']:.1f} s" if tarefa['segundos'] is not None else ''
+        if tarefa['estado'] == 'erro':
+            detalhe += f" — {tarefa['erro']}"
+        st.markdown(f"{ICONES_ESTADO[tarefa['estado']]} **{tarefa['rotulo']}**{detalhe}")
+
+
+@st.fragment(run_every=1)
+def acompanhar_aquecimento():
+    resumo = estado_aquecimento.resumo()
+    terminadas = sum(t['estado'] in ('pronto', 'erro') for t in resumo.values())
+    st.progress(terminadas / len(resumo), text=f"A preparar os dados… ({terminadas}/{len(resumo)})")
+    mostrar_estado_dados(resumo)
+    if estado_aquecimento.concluido():
+        st.rerun()
+
 
+st.subheader("Estado dos Dados")
+if estado_aquecimento.concluido():
+    resumo = estado_aquecimento.resumo()
+    if any(t['estado'] == 'erro' for t in resumo.values()):
+        st.warning("Alguns dados não puderam ser preparados; as páginas correspondentes podem falhar.")
+    else:
+        st.success("Todos os dados estão carregados: as páginas de análise abrem sem esperas.")
+    mostrar_estado_dados(resumo)
+    # No modo snapshot, os números são os do último snapshot gerado.
+    if modo_snapshot() and resumo['snapshot']['estado'] == 'pronto':
+        gerado_em = pd.Timestamp(carregar_snapshot().manifesto['gerado_em'])
+        st.caption(f"Modo snapshot: dados calculados em {gerado_em:%d/%m/%Y às %H:%M}.")
+else:
+    acompanhar_aquecimento()
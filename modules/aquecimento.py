@@ -0,0 +1,164 @@
+# ==============================================================================
+# Arquivo: aquecimento.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Aquecimento das caches no arranque do servidor. Os três datasets
+#            (hospital, supply chain e RH) são carregados em paralelo, em
+#            threads de fundo, e as estruturas derivadas que as páginas usam
+#            (cubo, índices, classes dos histogramas, consultas sem filtros)
+#            são construídas logo a seguir. Assim, o primeiro utilizador não
+#            espera pela leitura dos CSV nem pela construção dos agregados.
+#
+#            Também pode ser corrido antes de arrancar o servidor, para
+#            deixar os sidecars e as partições já gravados em disco:
+#                python -m modules.aquecimento
+# ==============================================================================
+import logging
+import threading
+import time
+import streamlit as st
+from modules.data_loader import carregar_dados_supply_chain
+from modules.exportacao import limpar_pastas_expiradas
+from modules.filter_index import carregar_indice
+from modules.plotting import calcular_arestas
+from modules.query_backend import CAMINHO_HOSPITAL, CAMINHO_RH, CAMINHO_SUPPLY_CHAIN, consultar, modo_snapshot
+from modules.rollup import carregar_cubo_hospital
+from modules.snapshots import carregar_snapshot
+
+LOGGER = logging.getLogger('hvp.aquecimento')
+
+
+# --- 1. Tarefas de Aquecimento ---
+# Cada tarefa pede exatamente o que as páginas pedem no seu primeiro
+# carregamento (mesmas funções e mesmos argumentos), para que as páginas
+# encontrem esses resultados já em cache. As consultas com filtros escolhidos
+# pelo utilizador correm depois sobre estruturas já quentes.
+def _aquecer_hospital():
+    cubo = carregar_cubo_hospital(CAMINHO_HOSPITAL)
+    if cubo is None:
+        raise FileNotFoundError(CAMINHO_HOSPITAL)
+    # Visão geral: os valores calculados uma vez por versão do cubo.
+    cubo.pacientes_unicos(exato=True)
+    cubo.pacientes_unicos_por('setor_atendimento')
+    # Análise financeira: período, convénios e o índice (ou as partições
+    # Parquet, com o motor DuckDB) sobre os quais correm os filtros.
+    consultar('periodo_disponivel', CAMINHO_HOSPITAL, dataset='hospital')
+    consultar('faturacao_por_convenio', CAMINHO_HOSPITAL)
+
+
+def _aquecer_supply_chain():
+    if carregar_dados_supply_chain(CAMINHO_SUPPLY_CHAIN) is None:
+        raise FileNotFoundError(CAMINHO_SUPPLY_CHAIN)
+    consultar('periodo_disponivel', CAMINHO_SUPPLY_CHAIN, dataset='supply_chain')
+    consultar('kpis_supply_chain', CAMINHO_SUPPLY_CHAIN)
+
+
+def _aquecer_rh():
+    colunas_histogramas = ['idade', 'avaliacao_desempenho_anual']
+    indice = carregar_indice('rh', CAMINHO_RH)
+    if indice is None:
+        raise FileNotFoundError(CAMINHO_RH)
+    for coluna in colunas_histogramas:
+        indice.arestas(coluna, calcular_arestas)
+    consultar('kpis_rh', CAMINHO_RH, departamento=None)
+    consultar('saidas_por_motivo', CAMINHO_RH, departamento=None)
+    consultar('salario_medio_por_departamento', CAMINHO_RH)
+
+
+TAREFAS = {
+    'hospital': ("Atendimentos", _aquecer_hospital),
+    'supply_chain': ("Supply Chain", _aquecer_supply_chain),
+    'rh': ("Recursos Humanos", _aquecer_rh),
+}
+
+
+# No modo snapshot, as páginas não leem os datasets: basta abrir o snapshot.
+def _aquecer_snapshot():
+    carregar_snapshot()
+
+
+TAREFAS_SNAPSHOT = {'snapshot': ("Snapshot", _aquecer_snapshot)}
+
+
+def tarefas_do_modo():
+    """As tarefas de aquecimento do modo configurado."""
+    return TAREFAS_SNAPSHOT if modo_snapshot() else TAREFAS
+
+
+# --- 2. Estado do Aquecimento ---
+class EstadoAquecimento:
+    """
+    Estado de cada tarefa: 'pendente', 'em_curso', 'pronto' ou 'erro'.
+
+    É partilhado por todas as sessões (uma instância por processo) e
+    atualizado pelas threads de fundo.
+    """
+
+    def __init__(self, tarefas=None):
+        self._trinco = threading.Lock()
+        self._tarefas = {
+            nome: {'rotulo': rotulo, 'estado': 'pendente', 'segundos': None, 'erro': None}
+            for nome, (rotulo, _) in (tarefas or TAREFAS).items()
+        }
+
+    def marcar(self, nome, estado, segundos=None, erro=None):
+        with self._trinco:
+            self._tarefas[nome].update(estado=estado, segundos=segundos, erro=erro)
+
+    def resumo(self):
+        """Cópia do estado de cada tarefa (para apresentar na página)."""
+        with self._trinco:
+            return {nome: dict(tarefa) for nome, tarefa in self._tarefas.items()}
+
+    def concluido(self):
+        """True quando todas as tarefas terminaram (com ou sem erro)."""
+        return all(t['estado'] in ('pronto', 'erro') for t in self.resumo().values())
+
+
+def _executar(estado, nome, funcao):
+    """Corre uma tarefa, registando o tempo e um eventual erro."""
+    estado.marcar(nome, 'em_curso')
+    inicio = time.perf_counter()
+    try:
+        funcao()
+    except Exception as erro:  # Uma tarefa que falha não deve parar as outras.
+        LOGGER.warning("Aquecimento de '%s' falhou: %s", nome, erro)
+        estado.marcar(nome, 'erro', time.perf_counter() - inicio, str(erro) or type(erro).__name__)
+    else:
+        estado.marcar(nome, 'pronto', time.perf_counter() - inicio)
+
+
+# --- 3. Arranque ---
+# `st.cache_resource` garante que as threads são lançadas uma única vez por
+# processo do servidor, seja qual for a página ou a sessão que chega primeiro.
+# É também aqui, no arranque, que se apagam as exportações expiradas deixadas
+# por um processo anterior.
+@st.cache_resource(show_spinner=False)
+def iniciar_aquecimento():
+    """
+    Lança o aquecimento em threads de fundo (uma por dataset).
+
+    Returns:
+        EstadoAquecimento: O estado partilhado, atualizado pelas threads.
+    """
+    limpar_pastas_expiradas()
+    lista = tarefas_do_modo()
+    estado = EstadoAquecimento(lista)
+    for nome, (_, funcao) in lista.items():
+        threading.Thread(target=_executar, args=(estado, nome, funcao),
+                         name=f'aquecimento-{nome}', daemon=True).start()
+    return estado
+
+
+def aquecer(estado=None):
+    """Executa o aquecimento na thread atual, tarefa a tarefa."""
+    lista = tarefas_do_modo()
+    estado = estado or EstadoAquecimento(lista)
+    for nome, (_, funcao) in lista.items():
+        _executar(estado, nome, funcao)
+    return estado
+
+
+if __name__ == '__main__':
+    for nome, tarefa in aquecer().resumo().items():
+        detalhe = f"ERRO: {tarefa['erro']}" if tarefa['estado'] == 'erro' else 'pronto'
+        print(f"{tarefa['rotulo']:<18} {tarefa['segundos']:>7.2f} s  {detalhe}")
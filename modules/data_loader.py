@@ -6,99 +6,992 @@
 #            A sua função é fornecer um DataFrame limpo e pronto para análise
 #            para as outras partes da aplicação.
 # ==============================================================================
+import hashlib
+import io
+import os
+import shutil
+import threading
+import zlib
 import streamlit as st
+import numpy as np
 import pandas as pd
+from modules import shared_store
+from modules.instrumentacao import cronometrar
+
+# O pyarrow é usado para o cache colunar em disco (ver secção 0). Se não
+# estiver instalado, os loaders continuam a funcionar lendo sempre o CSV.
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_dataset = None
+    feather = None
+    pq = None
+
+# --- 0. Cache Colunar em Disco (Sidecar Feather) ---
+# Ler um CSV de 500 mil linhas com `sep=';'`, `decimal=','` e colunas de data
+# custa vários segundos em cada arranque do servidor. Por isso, na primeira
+# leitura guardamos ao lado do CSV uma cópia em formato Feather (Arrow IPC),
+# já com as categorias e as datas no seu tipo nativo. Nas leituras seguintes
+# esse ficheiro é mapeado em memória (memory-map), sem qualquer parsing.
+#
+# O sidecar guarda nos seus metadados a impressão digital (secção 0.2) do CSV
+# que lhe deu origem. Se o CSV mudar, a assinatura deixa de coincidir e o
+# sidecar é reconstruído automaticamente.
+EXTENSAO_SIDECAR = '.feather'
+_CHAVE_METADADOS_ORIGEM = b'hvp_origem_csv'
+
+# --- 0.1. Esquemas Declarados dos Datasets ---
+# Em vez de deixar o pandas inferir int64/float64/object para todas as colunas,
+# declaramos aqui o tipo compacto de cada uma. Os tipos são aplicados logo no
+# parsing do CSV (e ficam gravados no sidecar):
+# - Identificadores em int32 (suficiente para dezenas de milhões de linhas).
+# - Valores monetários em float32. ATENÇÃO: ao somar milhões de valores, a
+#   acumulação deve ser feita em float64 (ex.: `.astype('float64').sum()`),
+#   para que os totais exibidos mantenham a precisão ao cêntimo.
+# - Contagens pequenas (dias, notas de 1 a 5, idade) em int8/int16.
+# - Textos com poucos valores distintos em 'category'.
+TIPO_DATA = 'datetime64[ns]'
+
+# O dataset do hospital segue um esquema em estrela: a tabela de factos de
+# atendimentos guarda apenas o `paciente_id`, e os atributos do paciente vivem
+# na dimensão `pacientes`. A junção só é feita quando uma página os pede.
+ESQUEMA_HOSPITAL = {
+    'atendimento_id': 'int32',
+    'paciente_id': 'int32',
+    'data_atendimento': TIPO_DATA,
+    'tipo_atendimento': 'category',
+    'setor_atendimento': 'category',
+    'dias_internacao': 'int8',
+    'convenio': 'category',
+    'valor_total_atendimento': 'float32',
+    'status_pagamento': 'category',
+}
+
+ESQUEMA_PACIENTES = {
+    'paciente_id': 'int32',
+    'nome_paciente': 'object',
+    'data_nascimento_paciente': TIPO_DATA,
+}
+COLUNAS_PACIENTE = [c for c in ESQUEMA_PACIENTES if c != 'paciente_id']
+NOME_ARQUIVO_PACIENTES = 'hospital_vida_plena_pacientes.csv'
+
+ESQUEMA_SUPPLY_CHAIN = {
+    'pedido_id': 'int32',
+    'item_id': 'int32',
+    'nome_item': 'category',
+    'categoria_item': 'category',
+    'fornecedor_id': 'int32',
+    'nome_fornecedor': 'category',
+    'data_pedido': TIPO_DATA,
+    'quantidade_pedida': 'int16',
+    'custo_unitario': 'float32',
+    'custo_total_pedido': 'float32',
+    'status_entrega': 'category',
+    'data_entrega_prevista': TIPO_DATA,
+    'data_entrega_real': TIPO_DATA,
+}
+
+ESQUEMA_RH = {
+    'employee_id': 'int32',
+    'nome_completo': 'object',
+    'idade': 'int8',
+    'genero': 'category',
+    'departamento': 'category',
+    'cargo': 'category',
+    'nivel_senioridade': 'category',
+    'data_contratacao': TIPO_DATA,
+    'data_termino': TIPO_DATA,
+    'motivo_saida': 'category',
+    'salario_mensal': 'float32',
+    'avaliacao_desempenho_anual': 'int8',
+    'satisfacao_trabalho': 'int8',
+    'horas_extras_mes': 'int8',
+    'promovido_ultimo_ano': 'category',
+    'tempo_empresa_anos': 'float32',
+}
+
+_ESQUEMAS = {
+    'hospital': ESQUEMA_HOSPITAL,
+    'pacientes': ESQUEMA_PACIENTES,
+    'supply_chain': ESQUEMA_SUPPLY_CHAIN,
+    'rh': ESQUEMA_RH,
+}
+
+# Os datasets com uma data principal são mantidos ordenados por essa coluna
+# (no sidecar e em memória), o que permite responder a um intervalo de datas
+# com duas pesquisas binárias e uma fatia contígua (ver `fatiar_periodo`).
+COLUNAS_ORDENACAO = {
+    'hospital': 'data_atendimento',
+    'supply_chain': 'data_pedido',
+}
+
+# Versão do formato dos dados derivados (sidecars e partições), incrementada
+# quando muda a forma como são produzidos. 2: linhas ordenadas pela data.
+VERSAO_ARMAZENAMENTO = 2
+
+
+# --- 0.2. Impressão Digital dos Ficheiros de Dados ---
+# A chave de cache de cada dataset é derivada do próprio ficheiro, e não de um
+# tempo de expiração fixo: o cache só é invalidado quando os dados mudam, e
+# passa a sê-lo imediatamente quando `scripts/data_generator.py` reescreve o
+# CSV.
+#
+# A impressão digital combina o tamanho e a data de modificação (em
+# nanossegundos) do ficheiro com um hash BLAKE2 de uma amostra do conteúdo
+# (início, fim e blocos espaçados regularmente), para que o custo seja
+# constante mesmo para ficheiros com milhões de linhas. A amostra sozinha não
+# deteta uma edição fora dos blocos amostrados que mantenha o tamanho; o mtime
+# deteta-a. Por isso, qualquer escrita no ficheiro (mesmo um `touch`)
+# invalida o cache. Enquanto tamanho e mtime não mudarem, reutilizamos o hash
+# já calculado.
+TAMANHO_BLOCO_AMOSTRA = 64 * 1024
+NUM_BLOCOS_AMOSTRA = 16
+
+_impressoes_conhecidas = {}   # caminho -> ((tamanho, mtime_ns), impressão)
+_metricas_cache = {}          # dataset -> contadores (ver `obter_metricas_cache`)
+_ultima_impressao = {}        # dataset -> última impressão servida
+_trinco_metricas = threading.Lock()
+
+
+def _hash_amostrado(caminho_arquivo, tamanho):
+    """Calcula o hash BLAKE2 de uma amostra fixa de blocos do ficheiro."""
+    ultimo_inicio = max(tamanho - TAMANHO_BLOCO_AMOSTRA, 0)
+    inicios = sorted({ultimo_inicio * i // (NUM_BLOCOS_AMOSTRA - 1) for i in range(NUM_BLOCOS_AMOSTRA)})
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho_arquivo, 'rb') as f:
+        for inicio in inicios:
+            f.seek(inicio)
+            h.update(f.read(TAMANHO_BLOCO_AMOSTRA))
+    return h.hexdigest()
+
+
+def impressao_digital(caminho_arquivo):
+    """
+    Devolve a impressão digital do conteúdo de um ficheiro de dados.
+
+    Args:
+        caminho_arquivo (str): O caminho para o ficheiro.
+
+    Returns:
+        str: "<tamanho>:<mtime_ns>:<hash da amostra>". Levanta
+             FileNotFoundError se o ficheiro não existir.
+    """
+    info = os.stat(caminho_arquivo)
+    gatilho = (info.st_size, info.st_mtime_ns)
+    conhecida = _impressoes_conhecidas.get(caminho_arquivo)
+    if conhecida is not None and conhecida[0] == gatilho:
+        return conhecida[1]
+    impressao = f"{info.st_size}:{info.st_mtime_ns}:{_hash_amostrado(caminho_arquivo, info.st_size)}"
+    _impressoes_conhecidas[caminho_arquivo] = (gatilho, impressao)
+    return impressao
+
+
+def _registar_acesso(dataset, impressao):
+    """Conta os acessos e as expirações (mudança de impressão digital)."""
+    with _trinco_metricas:
+        metricas = _metricas_cache.setdefault(dataset, {'acessos': 0, 'recargas': 0, 'expiracoes': 0})
+        metricas['acessos'] += 1
+        anterior = _ultima_impressao.get(dataset)
+        if anterior is not None and anterior != impressao:
+            metricas['expiracoes'] += 1
+        _ultima_impressao[dataset] = impressao
+
+
+def _registar_recarga(dataset):
+    """Conta uma leitura efetiva do disco (falha de cache)."""
+    with _trinco_metricas:
+        metricas = _metricas_cache.setdefault(dataset, {'acessos': 0, 'recargas': 0, 'expiracoes': 0})
+        metricas['recargas'] += 1
+
+
+def obter_metricas_cache():
+    """
+    Devolve as métricas de cache dos loaders deste processo.
+
+    Returns:
+        dict: Para cada dataset ('hospital', 'supply_chain', 'rh'), um dicionário
+              com `acessos` (chamadas ao loader), `recargas` (leituras efetivas
+              do disco) e `expiracoes` (vezes em que a impressão digital do
+              ficheiro mudou e o cache anterior deixou de ser usado).
+    """
+    with _trinco_metricas:
+        return {dataset: dict(contadores) for dataset, contadores in _metricas_cache.items()}
+
+
+def _caminho_sidecar(caminho_arquivo):
+    """Devolve o caminho do ficheiro Feather associado a um CSV."""
+    return os.path.splitext(caminho_arquivo)[0] + EXTENSAO_SIDECAR
+
+
+def _assinatura_origem(caminho_arquivo, esquema):
+    """
+    Calcula a assinatura do CSV de origem (a sua impressão digital),
+    combinada com o esquema declarado, para que uma alteração de tipos
+    também invalide o sidecar.
+
+    Levanta FileNotFoundError se o ficheiro não existir, o que permite aos
+    loaders manterem o seu tratamento de erros habitual.
+    """
+    return f"{impressao_digital(caminho_arquivo)}:{_versao_esquema(esquema).decode()}".encode()
+
+
+def _abrir_sidecar(caminho_sidecar):
+    """
+    Abre o sidecar Feather com memory-map.
+
+    Returns:
+        pyarrow.Table ou None se o sidecar não existir ou não puder ser lido.
+    """
+    if feather is None or not os.path.exists(caminho_sidecar):
+        return None
+    try:
+        with pa.memory_map(caminho_sidecar, 'r') as origem:
+            return pa.ipc.open_file(origem).read_all()
+    except (OSError, pa.ArrowInvalid):
+        # Um sidecar corrompido ou incompleto é simplesmente ignorado.
+        return None
+
+
+def _ler_sidecar(caminho_sidecar, assinatura, colunas=None):
+    """
+    Lê o sidecar Feather com memory-map, se existir e estiver atualizado.
+
+    Graças ao memory-map, as colunas que não forem pedidas nunca chegam a ser
+    lidas do disco nem convertidas para pandas.
+
+    Returns:
+        pandas.DataFrame ou None se o sidecar não existir, estiver
+        desatualizado ou não puder ser lido.
+    """
+    tabela = _abrir_sidecar(caminho_sidecar)
+    if tabela is None:
+        return None
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(_CHAVE_METADADOS_ORIGEM) != assinatura:
+        return None
+    if colunas is not None:
+        tabela = tabela.select(list(colunas))
+    # `split_blocks=True` evita consolidar as colunas num único bloco: as
+    # colunas numéricas sem nulos tornam-se vistas diretas sobre o ficheiro
+    # mapeado em memória, em vez de cópias.
+    return tabela.to_pandas(split_blocks=True)
+
+
+def _escrever_sidecar(df, caminho_sidecar, assinatura, metadados_extra=None):
+    """
+    Grava o DataFrame como Feather não comprimido (necessário para o
+    memory-map), registando a assinatura do CSV de origem nos metadados.
+
+    A escrita é feita para um ficheiro temporário e depois renomeada, para
+    que outro processo nunca leia um sidecar escrito a meio.
+    """
+    if feather is None:
+        return
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[_CHAVE_METADADOS_ORIGEM] = assinatura
+        metadados.update(metadados_extra or {})
+        tabela = tabela.replace_schema_metadata(metadados)
+        caminho_temporario = f"{caminho_sidecar}.{os.getpid()}.tmp"
+        feather.write_feather(tabela, caminho_temporario, compression='uncompressed')
+        os.replace(caminho_temporario, caminho_sidecar)
+    except OSError:
+        # Sem permissão de escrita na pasta de dados: seguimos sem sidecar.
+        pass
+
+
+def _ler_com_sidecar(caminho_arquivo, esquema, colunas=None, coluna_ordem=None):
+    """
+    Carrega um dataset usando o sidecar Feather quando possível.
+
+    O sidecar contém sempre todas as colunas do esquema; a seleção de
+    `colunas` é aplicada no momento da leitura.
+
+    Args:
+        caminho_arquivo (str): O caminho para o ficheiro CSV de origem.
+        esquema (dict): O esquema declarado do dataset.
+        colunas (list, optional): Colunas a devolver (por omissão, todas).
+        coluna_ordem (str, optional): Coluna de data pela qual as linhas são
+                                      ordenadas antes de gravar o sidecar.
+
+    Returns:
+        pandas.DataFrame: O dataset com os tipos já otimizados.
+    """
+    assinatura = _assinatura_origem(caminho_arquivo, esquema)
+    if feather is None:
+        df = _ordenar_por_data(_ler_csv(caminho_arquivo, esquema), coluna_ordem)
+        return shared_store.selecionar_colunas(df, colunas) if colunas is not None else df
+
+    caminho_sidecar = _caminho_sidecar(caminho_arquivo)
+    df = _ler_sidecar(caminho_sidecar, assinatura, colunas)
+    if df is None:
+        df = _ordenar_por_data(_ler_csv(caminho_arquivo, esquema), coluna_ordem)
+        _escrever_sidecar(df, caminho_sidecar, assinatura)
+        if colunas is not None:
+            df = shared_store.selecionar_colunas(df, colunas)
+    return df
+
+
+def _ler_csv(caminho_arquivo, esquema, colunas=None, nomes=None):
+    """
+    Lê um CSV do projeto aplicando o esquema declarado durante o parsing.
+
+    Args:
+        caminho_arquivo (str ou ficheiro): O caminho para o ficheiro CSV.
+        esquema (dict): Mapa coluna -> tipo (ver secção 0.1).
+        colunas (list, optional): Subconjunto de colunas a ler. As restantes
+                                  nem chegam a ser materializadas.
+        nomes (list, optional): Nomes das colunas quando o conteúdo não tem
+                                cabeçalho (ex.: a cauda de um ficheiro).
+
+    Returns:
+        pandas.DataFrame: O DataFrame com os tipos já otimizados.
+    """
+    usar = list(colunas) if colunas is not None else list(esquema)
+    # Tenta ler o ficheiro CSV. Os parâmetros são importantes:
+    # - sep=';': Indica que as colunas são separadas por ponto e vírgula.
+    # - decimal=',': Indica que o separador decimal é a vírgula.
+    # - dtype={...}: Aplica os tipos compactos (e as categorias) logo no
+    #                parsing, em vez de converter depois de ler tudo.
+    # - parse_dates=[...]: Converte automaticamente as colunas de data
+    #                      para o formato datetime do pandas, que é
+    #                      essencial para filtros e análises temporais.
+    df = pd.read_csv(
+        caminho_arquivo,
+        sep=';',
+        decimal=',',
+        header=None if nomes is not None else 'infer',
+        names=nomes,
+        usecols=usar,
+        dtype={c: t for c, t in esquema.items() if c in usar and t != TIPO_DATA},
+        parse_dates=[c for c, t in esquema.items() if c in usar and t == TIPO_DATA]
+    )
+    return shared_store.selecionar_colunas(df, usar)
+
+
+def _e_parquet(caminho_arquivo):
+    """True se o ficheiro de dados for Parquet (ex.: `data_generator.py --formato parquet`)."""
+    return os.path.splitext(str(caminho_arquivo))[1].lower() == '.parquet'
+
+
+def _ler_parquet(caminho_arquivo, esquema, colunas=None, coluna_ordem=None):
+    """
+    Lê um ficheiro Parquet de dados, com os mesmos tipos e a mesma ordem das
+    linhas que a leitura do CSV equivalente.
+
+    O Parquet já é colunar: só as colunas pedidas são lidas do disco, e não é
+    preciso sidecar. Os tipos gravados pelo gerador (int64, float64, texto,
+    datetime64[us]) são convertidos para os do esquema declarado.
+
+    Args:
+        caminho_arquivo (str): O caminho para o ficheiro Parquet.
+        esquema (dict): Mapa coluna -> tipo (ver secção 0.1).
+        colunas (list, optional): Subconjunto de colunas a ler.
+        coluna_ordem (str, optional): Coluna de data pela qual as linhas são
+                                      ordenadas (lida mesmo que não seja pedida).
+
+    Returns:
+        pandas.DataFrame: O DataFrame com os tipos já otimizados.
+    """
+    if pq is None:
+        raise ImportError("A leitura de ficheiros Parquet requer o pacote pyarrow (pip install pyarrow).")
+    usar = list(colunas) if colunas is not None else list(esquema)
+    ler = usar + [coluna_ordem] if coluna_ordem is not None and coluna_ordem not in usar else usar
+    df = pq.read_table(caminho_arquivo, columns=ler).to_pandas(split_blocks=True)
+    df = df.astype({c: t for c, t in esquema.items() if c in ler and df[c].dtype != t})
+    return shared_store.selecionar_colunas(_ordenar_por_data(df, coluna_ordem), usar)
+
+
+# --- 0.3. Ingestão Incremental (Dataset do Hospital) ---
+# O `scripts/data_generator.py` grava o dataset do hospital em modo append, um
+# lote de cada vez. Em vez de reler o ficheiro inteiro sempre que ele cresce,
+# guardamos, por ficheiro, o DataFrame já ingerido, o número de linhas, o
+# offset (em bytes) até onde o ficheiro foi lido e a impressão digital do
+# ficheiro nesse momento. Numa atualização:
+# - Se a impressão digital não mudou, o DataFrame existente é servido tal
+#   como está.
+# - Se o ficheiro cresceu e o seu início e os bytes imediatamente antes do
+#   offset não mudaram, o ficheiro apenas cresceu: lemos só a cauda nova (até
+#   à última linha completa) e concatenamo-la ao DataFrame existente.
+# - Caso contrário (ficheiro reescrito, truncado ou editado sem mudar de
+#   tamanho), fazemos uma leitura completa e incrementamos a `geracao` do
+#   estado.
+# O custo de parsing passa a ser proporcional ao tamanho do delta. O offset e
+# a assinatura do prefixo ficam também gravados no sidecar, para que um
+# arranque a frio possa reaproveitar o sidecar e ler apenas a cauda.
+_CHAVE_METADADOS_OFFSET = b'hvp_offset'
+_CHAVE_METADADOS_PREFIXO = b'hvp_prefixo'
+_CHAVE_METADADOS_ESQUEMA = b'hvp_esquema'
+TAMANHO_BLOCO_LEITURA = 8 * 1024 * 1024
+
+_estados_ingestao = {}   # caminho -> dict(df, linhas, offset, prefixo, impressao, nomes, geracao)
+_trinco_ingestao = threading.Lock()
+
+
+def _versao_esquema(esquema):
+    """Identificador curto do esquema declarado e da versão do armazenamento."""
+    return f"{zlib.crc32(repr((VERSAO_ARMAZENAMENTO, sorted(esquema.items()))).encode()):08x}".encode()
+
+
+def _assinatura_prefixo(caminho_arquivo, offset):
+    """
+    Hash do primeiro bloco do ficheiro e do bloco que termina no offset.
+
+    Se esta assinatura se mantiver, assumimos que os primeiros `offset` bytes
+    do ficheiro não foram alterados (o ficheiro apenas cresceu).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho_arquivo, 'rb') as f:
+        h.update(f.read(min(TAMANHO_BLOCO_AMOSTRA, offset)))
+        f.seek(max(offset - TAMANHO_BLOCO_AMOSTRA, 0))
+        h.update(f.read(min(TAMANHO_BLOCO_AMOSTRA, offset)))
+    return h.hexdigest().encode()
+
+
+def _fim_ultima_linha(caminho_arquivo):
+    """
+    Devolve o offset em bytes imediatamente a seguir à última quebra de linha
+    (0 se o ficheiro ainda não tiver nenhuma linha completa).
+
+    O ficheiro é percorrido de trás para a frente, um bloco de cada vez: o
+    custo depende do tamanho da última linha, e não do ficheiro.
+    """
+    with open(caminho_arquivo, 'rb') as f:
+        fim = f.seek(0, os.SEEK_END)
+        while fim > 0:
+            inicio = max(fim - TAMANHO_BLOCO_AMOSTRA, 0)
+            f.seek(inicio)
+            posicao = f.read(fim - inicio).rfind(b'\n')
+            if posicao >= 0:
+                return inicio + posicao + 1
+            fim = inicio
+    return 0
+
+
+class _LeituraLimitada(io.RawIOBase):
+    """Leitura binária de um ficheiro que para num offset fixo."""
+
+    def __init__(self, ficheiro, limite):
+        self._ficheiro = ficheiro
+        self._restantes = limite
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        n = min(len(destino), self._restantes)
+        if n <= 0:
+            return 0
+        lidos = self._ficheiro.readinto(memoryview(destino)[:n])
+        self._restantes -= lidos
+        return lidos
+
+
+def _ler_cauda(caminho_arquivo, offset, esquema, nomes):
+    """
+    Lê as linhas completas acrescentadas ao ficheiro depois do offset.
+
+    Returns:
+        tuple: (DataFrame com as novas linhas ou None, novo offset).
+    """
+    with open(caminho_arquivo, 'rb') as f:
+        f.seek(offset)
+        dados = f.read()
+    # Uma linha ainda a ser escrita pelo gerador fica para a próxima leitura.
+    fim = dados.rfind(b'\n') + 1
+    if fim == 0:
+        return None, offset
+    delta = _ler_csv(io.BytesIO(dados[:fim]), esquema, nomes=nomes)
+    return delta, offset + fim
+
+
+def _ordenar_por_data(df, coluna):
+    """Ordena as linhas pela coluna de data (ordenação estável), se necessário."""
+    if coluna is None or df[coluna].is_monotonic_increasing:
+        return df
+    ordem = np.argsort(df[coluna].to_numpy(), kind='stable')
+    return df.take(ordem).reset_index(drop=True)
+
+
+def _juntar_ordenado(df, delta, coluna):
+    """
+    Junta o delta ao DataFrame mantendo a ordenação pela coluna de data.
+
+    Returns:
+        tuple: (DataFrame, True se as linhas existentes mantiveram as suas
+               posições, ou seja, o delta ficou simplesmente no fim).
+    """
+    delta = _ordenar_por_data(delta, coluna)
+    juntos = _concatenar(df, delta)
+    if coluna is None or len(df) == 0 or len(delta) == 0 or delta[coluna].iloc[0] >= df[coluna].iloc[-1]:
+        return juntos, True
+    # Linhas novas com datas anteriores às existentes: reordenamos tudo.
+    return _ordenar_por_data(juntos, coluna), False
+
+
+def _concatenar(df, delta):
+    """Concatena o delta ao DataFrame, unindo as categorias das colunas categóricas."""
+    colunas = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            colunas[col] = pd.api.types.union_categoricals([df[col], delta[col]], sort_categories=True)
+        else:
+            colunas[col] = np.concatenate([df[col].to_numpy(), delta[col].to_numpy()])
+    return pd.DataFrame(colunas)
+
+
+def _ingestao_completa(caminho_arquivo, esquema, coluna_ordem=None):
+    """Lê o ficheiro inteiro, reaproveitando o sidecar sempre que possível."""
+    nomes = _ler_cabecalho(caminho_arquivo)
+    caminho_sidecar = _caminho_sidecar(caminho_arquivo)
+    tabela = _abrir_sidecar(caminho_sidecar)
+    metadados = (tabela.schema.metadata or {}) if tabela is not None else {}
+
+    df, offset, reaproveitado = None, 0, False
+    if metadados.get(_CHAVE_METADADOS_ESQUEMA) == _versao_esquema(esquema) and _CHAVE_METADADOS_OFFSET in metadados:
+        offset_sidecar = int(metadados[_CHAVE_METADADOS_OFFSET])
+        # O sidecar serve se o CSV não mudou desde que foi gravado, ou se
+        # apenas cresceu (a cauda nova é lida a seguir).
+        inalterado = metadados.get(_CHAVE_METADADOS_ORIGEM) == _assinatura_origem(caminho_arquivo, esquema)
+        cresceu = (os.path.getsize(caminho_arquivo) > offset_sidecar
+                   and _assinatura_prefixo(caminho_arquivo, offset_sidecar) == metadados.get(_CHAVE_METADADOS_PREFIXO))
+        if inalterado or cresceu:
+            df, offset, reaproveitado = tabela.to_pandas(), offset_sidecar, True
+
+    if df is None:
+        # Como em `_ler_cauda`, só as linhas completas são lidas: uma linha
+        # ainda a ser escrita pelo gerador fica para a próxima leitura. O
+        # limite é fixado antes do parsing, para que o offset corresponda
+        # exatamente às linhas lidas mesmo que o ficheiro cresça entretanto.
+        offset = _fim_ultima_linha(caminho_arquivo)
+        with open(caminho_arquivo, 'rb') as f:
+            df = _ler_csv(io.BufferedReader(_LeituraLimitada(f, offset), TAMANHO_BLOCO_LEITURA), esquema)
+        df = _ordenar_por_data(df, coluna_ordem)
+        cauda_lida = False
+    else:
+        delta, offset = _ler_cauda(caminho_arquivo, offset, esquema, nomes)
+        cauda_lida = delta is not None
+        if cauda_lida:
+            df = _juntar_ordenado(df, delta, coluna_ordem)[0]
+
+    if not reaproveitado or cauda_lida:
+        _escrever_sidecar(df, caminho_sidecar, _assinatura_origem(caminho_arquivo, esquema), {
+            _CHAVE_METADADOS_OFFSET: str(offset).encode(),
+            _CHAVE_METADADOS_PREFIXO: _assinatura_prefixo(caminho_arquivo, offset),
+            _CHAVE_METADADOS_ESQUEMA: _versao_esquema(esquema),
+        })
+    return df, offset, nomes
+
+
+def _ler_cabecalho(caminho_arquivo):
+    """Lê os nomes das colunas a partir da primeira linha do CSV."""
+    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+        return f.readline().rstrip('\r\n').split(';')
+
+
+def _ingerir_incremental(caminho_arquivo, esquema, coluna_ordem=None):
+    """
+    Devolve o DataFrame completo do ficheiro, lendo apenas o que mudou desde a
+    última chamada.
+
+    Com `coluna_ordem`, as linhas ficam ordenadas por essa coluna. Se o delta
+    trouxer datas anteriores às já ingeridas, as linhas existentes mudam de
+    posição e a `geracao` do estado é incrementada (ver
+    `obter_estado_ingestao`).
+
+    Returns:
+        pandas.DataFrame: Todas as colunas do esquema. Este DataFrame é o
+                          estado interno do loader e não deve ser alterado.
+    """
+    with _trinco_ingestao:
+        estado = _estados_ingestao.get(caminho_arquivo)
+        # A impressão digital é tirada antes da leitura: se o ficheiro mudar
+        # entretanto, a próxima chamada volta a verificá-lo.
+        impressao = impressao_digital(caminho_arquivo)
+        if estado is not None and estado['impressao'] == impressao:
+            return estado['df']
+        if (estado is not None and os.path.getsize(caminho_arquivo) > estado['offset']
+                and _assinatura_prefixo(caminho_arquivo, estado['offset']) == estado['prefixo']):
+            delta, offset = _ler_cauda(caminho_arquivo, estado['offset'], esquema, estado['nomes'])
+            if delta is not None:
+                estado['df'], acrescentado = _juntar_ordenado(estado['df'], delta, coluna_ordem)
+                if not acrescentado:
+                    estado['geracao'] += 1
+                estado['linhas'] = len(estado['df'])
+                estado['offset'] = offset
+                estado['prefixo'] = _assinatura_prefixo(caminho_arquivo, offset)
+            estado['impressao'] = impressao
+            return estado['df']
+
+        df, offset, nomes = _ingestao_completa(caminho_arquivo, esquema, coluna_ordem)
+        _estados_ingestao[caminho_arquivo] = {
+            'df': df,
+            'linhas': len(df),
+            'offset': offset,
+            'prefixo': _assinatura_prefixo(caminho_arquivo, offset),
+            'impressao': impressao,
+            'nomes': nomes,
+            'geracao': (estado['geracao'] + 1) if estado is not None else 0,
+        }
+        return df
+
+
+def obter_estado_ingestao(caminho_arquivo):
+    """
+    Devolve um resumo do estado da ingestão incremental de um ficheiro.
+
+    Os agregados derivados (ex.: o cubo do módulo rollup) usam a `geracao` e
+    o número de `linhas` para processarem apenas as linhas novas: enquanto a
+    geração não mudar, as primeiras `linhas` linhas do DataFrame são estáveis.
+
+    Returns:
+        dict: {'geracao', 'linhas', 'offset'} ou None se o ficheiro ainda não
+              foi ingerido.
+    """
+    with _trinco_ingestao:
+        estado = _estados_ingestao.get(caminho_arquivo)
+        if estado is None:
+            return None
+        return {chave: estado[chave] for chave in ('geracao', 'linhas', 'offset')}
+
+
+# --- 0.4. Armazenamento Particionado por Ano/Mês ---
+# Para consultas sobre um intervalo de datas (ex.: "o último trimestre"), não
+# faz sentido carregar dez anos de dados. Os datasets com uma coluna de data
+# principal são também guardados em Parquet particionado no estilo Hive
+# (`ano=2024/mes=10/...`), numa pasta ao lado do CSV. Um filtro sobre `ano` e
+# `mes` permite ao pyarrow ignorar as partições fora do intervalo sem as abrir.
+#
+# As partições são construídas na primeira consulta por período e registam a
+# impressão digital do CSV num ficheiro marcador; se o CSV mudar, são
+# reconstruídas (numa pasta temporária, trocada no fim de forma atómica).
+SUFIXO_PARTICOES = '_particoes'
+_MARCADOR_PARTICOES = '_ORIGEM'
+COLUNAS_DATA_PARTICAO = COLUNAS_ORDENACAO
+
+_trinco_particoes = threading.Lock()
+
+
+def _diretorio_particoes(caminho_arquivo):
+    """Devolve a pasta das partições associada a um CSV."""
+    return os.path.splitext(caminho_arquivo)[0] + SUFIXO_PARTICOES
+
+
+def _garantir_particoes(dataset, caminho_arquivo, impressao):
+    """
+    Garante que as partições ano/mês do dataset estão atualizadas.
+
+    Returns:
+        str: A pasta das partições.
+    """
+    diretorio = _diretorio_particoes(caminho_arquivo)
+    marcador = os.path.join(diretorio, _MARCADOR_PARTICOES)
+    assinatura = f"{impressao}:{_versao_esquema(_ESQUEMAS[dataset]).decode()}"
+
+    with _trinco_particoes:
+        if os.path.exists(marcador):
+            with open(marcador, 'r', encoding='utf-8') as f:
+                if f.read() == assinatura:
+                    return diretorio
+
+        df = _carregar(dataset, caminho_arquivo, None)
+        datas = df[COLUNAS_DATA_PARTICAO[dataset]]
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        tabela = tabela.append_column('ano', pa.array(datas.dt.year.to_numpy().astype('int16')))
+        tabela = tabela.append_column('mes', pa.array(datas.dt.month.to_numpy().astype('int8')))
+
+        temporario = f"{diretorio}.{os.getpid()}.tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        pa_dataset.write_dataset(
+            tabela, temporario, format='parquet',
+            partitioning=['ano', 'mes'], partitioning_flavor='hive'
+        )
+        with open(os.path.join(temporario, _MARCADOR_PARTICOES), 'w', encoding='utf-8') as f:
+            f.write(assinatura)
+
+        antigo = f"{diretorio}.{os.getpid()}.antigo"
+        if os.path.exists(diretorio):
+            os.replace(diretorio, antigo)
+        os.replace(temporario, diretorio)
+        shutil.rmtree(antigo, ignore_errors=True)
+        return diretorio
+
+
+def _filtro_periodo(coluna_data, inicio, fim):
+    """
+    Constrói o filtro pyarrow para o intervalo [inicio, fim).
+
+    A parte sobre `ano`/`mes` é a que permite ao pyarrow descartar partições
+    inteiras; a parte sobre a coluna de data aplica os limites exatos.
+    """
+    ano, mes = pa_dataset.field('ano'), pa_dataset.field('mes')
+    data = pa_dataset.field(coluna_data)
+    filtro = None
+    if inicio is not None:
+        filtro = ((ano > inicio.year) | ((ano == inicio.year) & (mes >= inicio.month))) & (data >= inicio)
+    if fim is not None:
+        # O último mês a incluir é o do instante imediatamente antes de `fim`.
+        ultimo = fim - pd.Timedelta(1, 'ns')
+        filtro_fim = ((ano < ultimo.year) | ((ano == ultimo.year) & (mes <= ultimo.month))) & (data < fim)
+        filtro = filtro_fim if filtro is None else filtro & filtro_fim
+    return filtro
+
+
+def _ler_particoes(dataset, diretorio, inicio, fim, colunas):
+    """Lê apenas as partições (e linhas) que intersetam o período."""
+    coluna_data = COLUNAS_DATA_PARTICAO[dataset]
+    # O ficheiro marcador começa por '_' e é, por isso, ignorado pelo pyarrow.
+    origem = pa_dataset.dataset(diretorio, format='parquet', partitioning='hive')
+    colunas = list(colunas) if colunas is not None else list(_ESQUEMAS[dataset])
+    tabela = origem.to_table(columns=colunas, filter=_filtro_periodo(coluna_data, inicio, fim))
+    df = tabela.to_pandas(split_blocks=True)
+    # As partições são lidas pela ordem das pastas; ordenamos pela data.
+    if coluna_data in df.columns:
+        df = df.sort_values(coluna_data, kind='stable', ignore_index=True)
+    return df
+
+
+def _carregar_periodo(dataset, caminho_arquivo, inicio, fim, colunas):
+    """Serve um período de um dataset a partir das partições ano/mês."""
+    inicio = pd.Timestamp(inicio) if inicio is not None else None
+    fim = pd.Timestamp(fim) if fim is not None else None
+    colunas = tuple(colunas) if colunas is not None else None
+    if pa_dataset is None:
+        # Sem pyarrow não há partições: fatiamos o dataset completo (ordenado).
+        coluna_data = COLUNAS_DATA_PARTICAO[dataset]
+        extra = (coluna_data,) if colunas is not None and coluna_data not in colunas else ()
+        df = _carregar(dataset, caminho_arquivo, colunas + extra if colunas is not None else None)
+        df = fatiar_periodo(df, inicio, fim, coluna_data).reset_index(drop=True)
+        return shared_store.selecionar_colunas(df, colunas) if extra else df
+
+    impressao = impressao_digital(caminho_arquivo)
+    _registar_acesso(dataset, impressao)
+    # Os períodos têm a sua própria região no armazém, para não descartarem
+    # os datasets completos.
+    return shared_store.obter_ou_carregar(
+        (dataset, 'periodo', caminho_arquivo, impressao, inicio, fim, colunas),
+        lambda: _ler_particoes(
+            dataset, _garantir_particoes(dataset, caminho_arquivo, impressao), inicio, fim, colunas
+        ),
+        regiao='periodos'
+    )
+
+
+def obter_diretorio_particoes(dataset, caminho_arquivo):
+    """
+    Devolve a pasta das partições ano/mês de um dataset, construindo-as se
+    estiverem desatualizadas (usado por motores de consulta externos, como o
+    DuckDB, que leem o Parquet diretamente).
+
+    Returns:
+        str: A pasta das partições, ou None se o dataset não for particionado
+             ou o pyarrow não estiver disponível.
+    """
+    if pa_dataset is None or dataset not in COLUNAS_DATA_PARTICAO:
+        return None
+    return _garantir_particoes(dataset, caminho_arquivo, impressao_digital(caminho_arquivo))
+
+
+# --- 0.5. Fatias por Período ---
+# Como os datasets com data principal estão ordenados por essa coluna (secção
+# 0.1), um intervalo de datas corresponde sempre a um bloco contíguo de linhas.
+# Os seus limites encontram-se com duas pesquisas binárias (`searchsorted`),
+# em O(log n), e o bloco é devolvido como uma fatia posicional: sem máscara
+# booleana sobre todas as linhas e sem copiar as colunas.
+def limites_periodo(df, inicio=None, fim=None, coluna=None):
+    """
+    Devolve as posições [i, j) das linhas no intervalo [inicio, fim).
+
+    Args:
+        df (pandas.DataFrame): Dados ordenados pela coluna de data.
+        inicio (str ou datetime, optional): Início do período (inclusivo).
+        fim (str ou datetime, optional): Fim do período (exclusivo).
+        coluna (str, optional): A coluna de data. Por omissão, a primeira
+                                coluna de `COLUNAS_ORDENACAO` presente em `df`.
+
+    Returns:
+        tuple: (i, j), com i <= j.
+    """
+    if coluna is None:
+        coluna = next(c for c in COLUNAS_ORDENACAO.values() if c in df.columns)
+    datas = df[coluna].to_numpy()
+    i = int(np.searchsorted(datas, np.datetime64(pd.Timestamp(inicio)), side='left')) if inicio is not None else 0
+    j = int(np.searchsorted(datas, np.datetime64(pd.Timestamp(fim)), side='left')) if fim is not None else len(datas)
+    return i, max(i, j)
+
+
+def fatiar_periodo(df, inicio=None, fim=None, coluna=None):
+    """
+    Devolve as linhas de `df` no intervalo [inicio, fim) como uma fatia
+    contígua (uma vista, sem cópia dos dados).
+
+    Os argumentos são os de `limites_periodo`.
+    """
+    i, j = limites_periodo(df, inicio, fim, coluna)
+    return df.iloc[i:j]
+
 
 # --- 1. Função de Carregamento de Dados ---
-# O decorador `@st.cache_data` é uma ferramenta poderosa do Streamlit.
-# Ele "memoriza" o resultado da função. Se a função for chamada novamente
-# com os mesmos argumentos, o Streamlit retorna o resultado guardado em cache
-# em vez de executar a função novamente, o que torna a aplicação muito mais rápida.
-# `ttl=3600` significa que o cache expira após 3600 segundos (1 hora).
-@st.cache_data(ttl=3600)
-def carregar_dados(caminho_arquivo):
+# Os datasets carregados ficam no armazém partilhado do módulo shared_store:
+# uma única cópia por processo, partilhada por todas as sessões, que recebem
+# vistas sem cópia, com os arrays marcados como só de leitura (ver esse módulo).
+# As seleções de colunas também partilham os arrays (`selecionar_colunas`).
+# A chave inclui a impressão digital do ficheiro: o resultado é reutilizado
+# enquanto o conteúdo não mudar, sem expiração por tempo. O armazém limita
+# quantas versões/seleções de colunas ficam em memória; as usadas há mais
+# tempo são descartadas primeiro.
+def _carregar_versao(dataset, caminho_arquivo, colunas):
+    """Lê uma versão concreta de um dataset (chamada apenas em falha de cache)."""
+    _registar_recarga(dataset)
+    if _e_parquet(caminho_arquivo):
+        return _ler_parquet(caminho_arquivo, _ESQUEMAS[dataset], colunas, COLUNAS_ORDENACAO.get(dataset))
+    if dataset == 'hospital':
+        # O dataset do hospital cresce por append: lemos apenas o delta.
+        df = _ingerir_incremental(caminho_arquivo, ESQUEMA_HOSPITAL, COLUNAS_ORDENACAO['hospital'])
+        return shared_store.selecionar_colunas(df, colunas) if colunas is not None else df
+    return _ler_com_sidecar(caminho_arquivo, _ESQUEMAS[dataset], colunas, COLUNAS_ORDENACAO.get(dataset))
+
+
+def _carregar(dataset, caminho_arquivo, colunas):
+    """Calcula a impressão digital do ficheiro e serve a versão correspondente."""
+    impressao = impressao_digital(caminho_arquivo)
+    _registar_acesso(dataset, impressao)
+    colunas = tuple(colunas) if colunas is not None else None
+    return shared_store.obter_ou_carregar(
+        (dataset, caminho_arquivo, impressao, colunas),
+        lambda: _carregar_versao(dataset, caminho_arquivo, colunas)
+    )
+
+
+def _juntar_pacientes(df, caminho_pacientes, colunas_paciente):
     """
-    Carrega os dados do hospital a partir de um ficheiro CSV especificado.
+    Acrescenta atributos da dimensão de pacientes às linhas de atendimento.
+
+    A junção é feita pela posição de cada `paciente_id` no índice da dimensão,
+    preservando a ordem das linhas da tabela de factos.
+    """
+    pacientes = _carregar('pacientes', caminho_pacientes, ['paciente_id'] + colunas_paciente)
+    atributos = pacientes.set_index('paciente_id')[colunas_paciente].reindex(df['paciente_id'])
+    for col in colunas_paciente:
+        df[col] = atributos[col].to_numpy()
+    return df
+
+
+@cronometrar('carregamento')
+def carregar_dados(caminho_arquivo, colunas=None, caminho_pacientes=None):
+    """
+    Carrega os dados do hospital a partir de um ficheiro CSV especificado (ou
+    do ficheiro Parquet gravado por `data_generator.py --formato parquet`,
+    com as mesmas colunas e os mesmos tipos).
 
     Esta função realiza a leitura do ficheiro e aplica otimizações e
-    conversões de tipo de dados essenciais para a análise.
+    conversões de tipo de dados essenciais para a análise. Após a primeira
+    leitura, os dados são servidos a partir do sidecar Feather.
+
+    Os atributos do paciente (`nome_paciente`, `data_nascimento_paciente`)
+    estão numa tabela de dimensão separada e só são lidos e juntados quando
+    aparecem em `colunas`.
 
     Args:
-        caminho_arquivo (str): O caminho para o ficheiro CSV.
+        caminho_arquivo (str): O caminho para o ficheiro CSV (ou Parquet).
+        colunas (list, optional): As colunas de que a página precisa. As
+                                  restantes não são carregadas em memória.
+                                  Por omissão, todas as colunas de atendimento.
+        caminho_pacientes (str, optional): O caminho da dimensão de pacientes.
+                                           Por omissão, o ficheiro
+                                           'hospital_vida_plena_pacientes.csv'
+                                           na mesma pasta.
 
     Returns:
         pandas.DataFrame: Um DataFrame contendo os dados do hospital,
                           ou None se o ficheiro não for encontrado.
     """
+    colunas_paciente = [c for c in (colunas or []) if c in COLUNAS_PACIENTE]
+    if caminho_pacientes is None:
+        caminho_pacientes = os.path.join(os.path.dirname(caminho_arquivo), NOME_ARQUIVO_PACIENTES)
     try:
-        # Tenta ler o ficheiro CSV. Os parâmetros são importantes:
-        # - sep=';': Indica que as colunas são separadas por ponto e vírgula.
-        # - decimal=',': Indica que o separador decimal é a vírgula.
-        # - parse_dates=[...]: Converte automaticamente as colunas de data
-        #                      para o formato datetime do pandas, que é
-        #                      essencial para filtros e análises temporais.
-        df = pd.read_csv(
-            caminho_arquivo,
-            sep=';',
-            decimal=',',
-            parse_dates=['data_nascimento_paciente', 'data_atendimento']
-        )
+        if not colunas_paciente:
+            return _carregar('hospital', caminho_arquivo, colunas)
 
-        # --- 2. Otimização de Memória ---
-        # Para datasets grandes, é uma boa prática converter colunas de texto
-        # com poucos valores únicos (como 'status' ou 'tipo') para o tipo
-        # 'category'. Isto pode reduzir drasticamente o uso de memória.
-        for col in ['tipo_atendimento', 'setor_atendimento', 'convenio', 'status_pagamento']:
-            df[col] = df[col].astype('category')
-            
-        return df
+        colunas_atendimento = [c for c in colunas if c not in COLUNAS_PACIENTE]
+        if 'paciente_id' not in colunas_atendimento:
+            colunas_atendimento.append('paciente_id')
+        df = _carregar('hospital', caminho_arquivo, colunas_atendimento)
+        return shared_store.selecionar_colunas(_juntar_pacientes(df, caminho_pacientes, colunas_paciente), colunas)
 
-    except FileNotFoundError:
+    except FileNotFoundError as erro:
         # --- 3. Tratamento de Erros ---
         # Se o ficheiro CSV não for encontrado no caminho especificado,
         # a aplicação não irá quebrar. Em vez disso, exibirá uma mensagem
         # de erro amigável para o utilizador, o que é uma boa prática de UX.
-        st.error(f"Erro Crítico: O ficheiro de dados não foi encontrado em '{caminho_arquivo}'.")
-        st.warning("Por favor, certifique-se de que o dataset 'hospital_vida_plena_dataset_500k.csv' foi gerado e está localizado na pasta '/data/'.")
+        st.error(f"Erro Crítico: O ficheiro de dados não foi encontrado em '{erro.filename}'.")
+        st.warning("Por favor, certifique-se de que o dataset 'hospital_vida_plena_dataset_500k.csv' e a dimensão 'hospital_vida_plena_pacientes.csv' foram gerados e estão localizados na pasta '/data/'.")
         return None
 
-@st.cache_data(ttl=3600)
-def carregar_dados_supply_chain(caminho_arquivo):
+@cronometrar('carregamento')
+def carregar_dados_supply_chain(caminho_arquivo, colunas=None):
     """
     Carrega os dados de supply chain a partir de um ficheiro CSV.
+
+    Tal como `carregar_dados`, aceita a lista de `colunas` de que a página
+    precisa.
     """
     try:
-        df = pd.read_csv(
-            caminho_arquivo,
-            sep=';',
-            decimal=',',
-            parse_dates=['data_pedido', 'data_entrega_prevista', 'data_entrega_real']
-        )
-        for col in ['categoria_item', 'nome_fornecedor', 'status_entrega']:
-            df[col] = df[col].astype('category')
-        return df
+        return _carregar('supply_chain', caminho_arquivo, colunas)
     except FileNotFoundError:
         st.error(f"Erro: O ficheiro de supply chain não foi encontrado em '{caminho_arquivo}'.")
         return None
-    
-    # Adicione esta função ao final do ficheiro modules/data_loader.py
 
-@st.cache_data(ttl=3600)
-def carregar_dados_rh(caminho_arquivo):
+@cronometrar('carregamento')
+def carregar_dados_rh(caminho_arquivo, colunas=None):
     """
     Carrega os dados de People Analytics a partir de um ficheiro CSV.
+
+    Tal como `carregar_dados`, aceita a lista de `colunas` de que a página
+    precisa.
     """
     try:
-        df = pd.read_csv(
-            caminho_arquivo,
-            sep=';',
-            decimal=',',
-            parse_dates=['data_contratacao', 'data_termino']
-        )
-        # Otimização de memória
-        for col in ['genero', 'departamento', 'cargo', 'nivel_senioridade', 'motivo_saida', 'promovido_ultimo_ano']:
-            df[col] = df[col].astype('category')
-        return df
+        return _carregar('rh', caminho_arquivo, colunas)
     except FileNotFoundError:
         st.error(f"Erro: O ficheiro de People Analytics não foi encontrado em '{caminho_arquivo}'.")
-        return None
\ No newline at end of file
+        return None
+
+
+def carregar_dados_periodo(caminho_arquivo, inicio=None, fim=None, colunas=None):
+    """
+    Carrega apenas os atendimentos do hospital no intervalo [inicio, fim).
+
+    Só as partições ano/mês que intersetam o período são lidas do disco.
+    Os atributos do paciente não estão disponíveis nesta função.
+
+    Args:
+        caminho_arquivo (str): O caminho para o ficheiro CSV do hospital.
+        inicio (str ou datetime, optional): Início do período (inclusivo).
+        fim (str ou datetime, optional): Fim do período (exclusivo).
+        colunas (list, optional): As colunas de que a página precisa.
+
+    Returns:
+        pandas.DataFrame: Os atendimentos do período, ou None se o ficheiro
+                          não for encontrado.
+    """
+    try:
+        return _carregar_periodo('hospital', caminho_arquivo, inicio, fim, colunas)
+    except FileNotFoundError:
+        st.error(f"Erro Crítico: O ficheiro de dados não foi encontrado em '{caminho_arquivo}'.")
+        return None
+
+def carregar_dados_supply_chain_periodo(caminho_arquivo, inicio=None, fim=None, colunas=None):
+    """
+    Carrega apenas os pedidos de supply chain com `data_pedido` no intervalo
+    [inicio, fim), lendo só as partições ano/mês correspondentes.
+    """
+    try:
+        return _carregar_periodo('supply_chain', caminho_arquivo, inicio, fim, colunas)
+    except FileNotFoundError:
+        st.error(f"Erro: O ficheiro de supply chain não foi encontrado em '{caminho_arquivo}'.")
+        return None
@@ -0,0 +1,345 @@
+# ==============================================================================
+# Arquivo: exportacao.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Exportação das linhas filtradas (CSV ou Parquet) sem montar o
+#            ficheiro em memória. As posições selecionadas vêm do índice de
+#            filtros, e as linhas são escritas em disco bloco a bloco (50 mil
+#            de cada vez), numa thread de fundo: o pico de memória é o de um
+#            bloco, qualquer que seja o tamanho da exportação, e a sessão que
+#            a pediu (e as restantes) continuam a responder enquanto decorre.
+#
+#            O ficheiro pronto é servido a partir do disco pelo servidor de
+#            ficheiros estáticos do Streamlit (server.enableStaticServing, em
+#            .streamlit/config.toml), que o envia ao browser em pedaços. Com
+#            `st.download_button`, o ficheiro inteiro ficaria em memória no
+#            servidor enquanto a sessão existisse.
+#
+#            Uso numa página (dentro ou fora de um fragmento):
+#                secao_exportacao('rh', CAMINHO_DADOS, filtros, nome='funcionarios')
+# ==============================================================================
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from modules.data_loader import carregar_dados, carregar_dados_rh, impressao_digital, limites_periodo
+from modules.filter_index import carregar_indice
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem o pyarrow, só a exportação em CSV está disponível.
+    pa = pq = None
+
+# --- 1. Configuração ---
+# As convenções dos CSV de origem (ver `data_loader._ler_csv`): o ficheiro
+# exportado volta a ser lido pelos mesmos loaders.
+SEPARADOR = ';'
+DECIMAL = ','
+LINHAS_POR_BLOCO = 50_000
+MAX_EXPORTACOES_EM_CURSO = 2
+# Os ficheiros prontos são apagados ao fim de uma hora.
+VALIDADE_SEGUNDOS = 3600
+
+# O Streamlit serve a pasta 'static' ao lado de app.py em 'app/static/',
+# e recusa ficheiros maiores do que 200 MB.
+PASTA_ESTATICA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+SUBPASTA_EXPORTACOES = 'exportacoes'
+LIMITE_ESTATICO_BYTES = 200 * 2 ** 20
+
+FORMATOS = {'csv': 'CSV', 'parquet': 'Parquet'}
+
+# Para cada dataset: o loader (todas as colunas) e a coluna de data do
+# período. A exportação reutiliza o índice de filtros em cache, o mesmo do
+# motor pandas e da página de RH.
+DATASETS = {
+    'hospital': (carregar_dados, 'data_atendimento'),
+    'rh': (carregar_dados_rh, None),
+}
+
+
+# --- 2. Escrita por Blocos ---
+def _blocos(df, posicoes, tamanho):
+    """As linhas de `df` nas `posicoes`, `tamanho` de cada vez (cópias pequenas)."""
+    for inicio in range(0, len(posicoes), tamanho):
+        yield df.iloc[posicoes[inicio:inicio + tamanho]]
+
+
+def escrever_csv(df, posicoes, caminho, progresso=None, tamanho=LINHAS_POR_BLOCO):
+    """
+    Escreve as linhas selecionadas num CSV (sep=';', decimal=',').
+
+    Args:
+        df (pandas.DataFrame): Os dados completos (não são copiados).
+        posicoes (numpy.ndarray): As posições das linhas a exportar.
+        caminho (str): O ficheiro de destino.
+        progresso (callable, optional): Chamado com o número de linhas de
+                                        cada bloco escrito.
+        tamanho (int): Linhas por bloco.
+    """
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        df.iloc[:0].to_csv(f, sep=SEPARADOR, decimal=DECIMAL, index=False)
+        for bloco in _blocos(df, posicoes, tamanho):
+            bloco.to_csv(f, sep=SEPARADOR, decimal=DECIMAL, index=False, header=False)
+            if progresso is not None:
+                progresso(len(bloco))
+
+
+def escrever_parquet(df, posicoes, caminho, progresso=None, tamanho=LINHAS_POR_BLOCO):
+    """Como `escrever_csv`, num ficheiro Parquet (um row group por bloco)."""
+    if pq is None:
+        raise ImportError("A exportação em Parquet requer o pacote pyarrow (pip install pyarrow).")
+    # O esquema vem do primeiro bloco: numa tabela vazia, as colunas de texto
+    # (object) teriam o tipo null, e a escrita dos blocos seguintes falharia.
+    esquema = pa.Schema.from_pandas(df.iloc[posicoes[:tamanho]], preserve_index=False)
+    esquema = pa.schema([campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+                         for campo in esquema], metadata=esquema.metadata)
+    with pq.ParquetWriter(caminho, esquema) as escritor:
+        for bloco in _blocos(df, posicoes, tamanho):
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+            if progresso is not None:
+                progresso(len(bloco))
+
+
+_ESCRITORES = {'csv': escrever_csv, 'parquet': escrever_parquet}
+
+
+# --- 3. Exportações em Fundo ---
+class Exportacao:
+    """
+    Uma exportação pedida: o seu estado, atualizado pela thread que a escreve.
+
+    Atributos:
+        id (str): Identificador aleatório (faz parte do URL do ficheiro).
+        chave (tuple): Dataset, versão dos dados, formato e filtros.
+        nome (str): O nome do ficheiro para o utilizador.
+        estado (str): 'pendente', 'em_curso', 'pronto' ou 'erro'.
+        total, escritas (int): Linhas a exportar e já escritas.
+    """
+
+    def __init__(self, chave, nome):
+        self.id = uuid.uuid4().hex
+        self.chave = chave
+        self.nome = nome
+        self.estado = 'pendente'
+        self.total = None
+        self.escritas = 0
+        self.erro = None
+        self.terminada_em = None
+
+    @property
+    def pasta(self):
+        return os.path.join(PASTA_ESTATICA, SUBPASTA_EXPORTACOES, self.id)
+
+    @property
+    def caminho(self):
+        return os.path.join(self.pasta, self.nome)
+
+    @property
+    def url(self):
+        return f"app/static/{SUBPASTA_EXPORTACOES}/{self.id}/{self.nome}"
+
+    def _avancar(self, linhas):
+        self.escritas += linhas
+
+
+_exportacoes = {}   # chave -> Exportacao
+_por_id = {}        # id -> Exportacao
+_trinco = threading.Lock()
+_executor = {'atual': None}
+
+
+def _obter_executor():
+    with _trinco:
+        if _executor['atual'] is None:
+            _executor['atual'] = ThreadPoolExecutor(MAX_EXPORTACOES_EM_CURSO, thread_name_prefix='exportacao')
+        return _executor['atual']
+
+
+def chave_exportacao(dataset, caminho, formato, filtros=None, inicio=None, fim=None):
+    """
+    Identifica uma exportação: o mesmo pedido sobre os mesmos dados reutiliza
+    o ficheiro. A impressão digital inclui o mtime do ficheiro de origem, pelo
+    que uma edição (mesmo sem mudar o tamanho) leva a uma exportação nova.
+    """
+    filtros = tuple(sorted((coluna, tuple(sorted(map(str, valores)))) for coluna, valores in (filtros or {}).items()))
+    return (dataset, caminho, impressao_digital(caminho), formato, filtros,
+            None if inicio is None else str(inicio), None if fim is None else str(fim))
+
+
+def _executar(exportacao, dataset, caminho, impressao, formato, filtros, inicio, fim):
+    """
+    Seleciona as posições e escreve o ficheiro (na thread de exportação).
+
+    `impressao` é a versão dos dados registada na chave quando a exportação
+    foi pedida: se o ficheiro tiver mudado entretanto, a exportação falha em
+    vez de guardar dados mais recentes com a chave da versão anterior.
+    """
+    exportacao.estado = 'em_curso'
+    try:
+        carregar, coluna_data = DATASETS[dataset]
+        indice = carregar_indice(dataset, caminho)
+        df = carregar(caminho)
+        if indice is None or df is None:
+            raise FileNotFoundError(caminho)
+        if indice.impressao != impressao or impressao_digital(caminho) != impressao:
+            raise RuntimeError("Os dados mudaram durante a exportação. Tente de novo.")
+        intervalo = limites_periodo(df, inicio, fim, coluna_data) if coluna_data else None
+        posicoes = indice.posicoes(filtros, intervalo)
+        exportacao.total = len(posicoes)
+        os.makedirs(exportacao.pasta, exist_ok=True)
+        _ESCRITORES[formato](df, posicoes, exportacao.caminho, exportacao._avancar)
+    except Exception as erro:  # O erro é mostrado na página que pediu a exportação.
+        exportacao.erro = str(erro) or type(erro).__name__
+        exportacao.estado = 'erro'
+        shutil.rmtree(exportacao.pasta, ignore_errors=True)
+    else:
+        exportacao.estado = 'pronto'
+    exportacao.terminada_em = time.time()
+
+
+def limpar_pastas_expiradas():
+    """
+    Apaga as pastas de exportação modificadas há mais de `VALIDADE_SEGUNDOS`.
+
+    `_limpar_antigas` só conhece as exportações deste processo: as pastas
+    deixadas por um processo anterior do servidor (reinício, falha) são
+    apagadas aqui, no arranque (ver `aquecimento.iniciar_aquecimento`).
+
+    Returns:
+        list: Os ids das pastas apagadas.
+    """
+    limite = time.time() - VALIDADE_SEGUNDOS
+    try:
+        entradas = list(os.scandir(os.path.join(PASTA_ESTATICA, SUBPASTA_EXPORTACOES)))
+    except FileNotFoundError:
+        return []
+    with _trinco:
+        em_uso = set(_por_id)
+    apagadas = []
+    for entrada in entradas:
+        try:
+            expirada = entrada.is_dir(follow_symlinks=False) and entrada.stat(follow_symlinks=False).st_mtime < limite
+        except FileNotFoundError:  # Apagada entretanto por outro processo.
+            continue
+        if expirada and entrada.name not in em_uso:
+            shutil.rmtree(entrada.path, ignore_errors=True)
+            apagadas.append(entrada.name)
+    return apagadas
+
+
+def _limpar_antigas():
+    """Apaga as exportações terminadas há mais de `VALIDADE_SEGUNDOS`."""
+    limite = time.time() - VALIDADE_SEGUNDOS
+    with _trinco:
+        antigas = [e for e in _exportacoes.values() if e.terminada_em is not None and e.terminada_em < limite]
+        for exportacao in antigas:
+            del _exportacoes[exportacao.chave]
+            del _por_id[exportacao.id]
+    for exportacao in antigas:
+        shutil.rmtree(exportacao.pasta, ignore_errors=True)
+
+
+def iniciar_exportacao(dataset, caminho, formato, filtros=None, inicio=None, fim=None, nome='dados'):
+    """
+    Pede uma exportação (ou devolve a mesma, se já foi pedida).
+
+    Args:
+        dataset (str): 'hospital' ou 'rh'.
+        caminho (str): O ficheiro CSV de origem.
+        formato (str): 'csv' ou 'parquet'.
+        filtros (dict, optional): {coluna: valores}, como no índice de filtros.
+        inicio, fim (optional): O período [inicio, fim) (apenas o hospital).
+        nome (str): O nome do ficheiro, sem extensão.
+
+    Returns:
+        Exportacao: A exportação, já em fila na thread de fundo.
+    """
+    _limpar_antigas()
+    chave = chave_exportacao(dataset, caminho, formato, filtros, inicio, fim)
+    with _trinco:
+        existente = _exportacoes.get(chave)
+        if existente is not None:
+            if existente.estado != 'erro':
+                return existente
+            # Uma exportação que falhou é substituída (a sua pasta já foi apagada).
+            _por_id.pop(existente.id, None)
+        exportacao = Exportacao(chave, f"{nome}.{formato}")
+        _exportacoes[chave] = _por_id[exportacao.id] = exportacao
+    _obter_executor().submit(_executar, exportacao, dataset, caminho, chave[2], formato, filtros, inicio, fim)
+    return exportacao
+
+
+def obter_exportacao(id_exportacao):
+    """A exportação com este id (ou None, se não existir ou já tiver expirado)."""
+    with _trinco:
+        return _por_id.get(id_exportacao)
+
+
+# --- 4. Interface ---
+def _tamanho_legivel(n_bytes):
+    for unidade in ('B', 'KB', 'MB'):
+        if n_bytes < 1024:
+            return f"{n_bytes:,.0f} {unidade}".replace(',', '.')
+        n_bytes /= 1024
+    return f"{n_bytes:,.1f} GB".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def mostrar_ficheiro(exportacao):
+    """A ligação para descarregar uma exportação pronta."""
+    tamanho = os.path.getsize(exportacao.caminho)
+    linhas = f"{exportacao.total:,}".replace(',', '.')
+    if not st.get_option('server.enableStaticServing'):
+        st.warning("O servidor de ficheiros estáticos está desligado (server.enableStaticServing em "
+                   ".streamlit/config.toml): não é possível descarregar a exportação.")
+    elif tamanho > LIMITE_ESTATICO_BYTES:
+        st.warning(f"O ficheiro tem {_tamanho_legivel(tamanho)}, acima do limite de 200 MB do servidor. "
+                   "Exporte em Parquet (comprimido) ou restrinja os filtros.")
+    else:
+        st.markdown(f'<a href="{exportacao.url}" download="{exportacao.nome}">⬇️ Descarregar '
+                    f'{exportacao.nome}</a> ({linhas} linhas, {_tamanho_legivel(tamanho)})',
+                    unsafe_allow_html=True)
+
+
+@st.fragment(run_every=1)
+def acompanhar_exportacao(id_exportacao):
+    """Progresso de uma exportação em curso, atualizado a cada segundo."""
+    exportacao = obter_exportacao(id_exportacao)
+    if exportacao is None or exportacao.estado in ('pronto', 'erro'):
+        # Volta a desenhar a página, já sem este fragmento (e sem o seu temporizador).
+        st.rerun()
+    total, escritas = exportacao.total, exportacao.escritas
+    fracao = escritas / total if total else 0.0
+    texto = f"A exportar… {escritas:,} de {total:,} linhas".replace(',', '.') if total else "A selecionar as linhas…"
+    st.progress(fracao, text=texto)
+
+
+def secao_exportacao(dataset, caminho, filtros=None, inicio=None, fim=None, nome='dados', chave='exportacao'):
+    """
+    Controlo para exportar as linhas da seleção atual.
+
+    Args:
+        dataset, caminho, filtros, inicio, fim, nome: Como em `iniciar_exportacao`.
+        chave (str): Prefixo das chaves dos widgets e do estado da sessão
+                     (uma por exportação na página).
+    """
+    with st.expander("Exportar dados filtrados"):
+        formatos = [f for f in FORMATOS if f != 'parquet' or pq is not None]
+        col_formato, col_botao = st.columns([3, 1])
+        formato = col_formato.radio("Formato", formatos, format_func=FORMATOS.get, horizontal=True,
+                                    key=f'{chave}_formato')
+        if col_botao.button("Preparar ficheiro", key=f'{chave}_preparar'):
+            st.session_state[chave] = iniciar_exportacao(dataset, caminho, formato, filtros, inicio, fim, nome).id
+
+        # Só mostra a exportação pedida se ainda corresponder à seleção atual.
+        exportacao = obter_exportacao(st.session_state.get(chave))
+        if exportacao is None or exportacao.chave != chave_exportacao(dataset, caminho, formato, filtros, inicio, fim):
+            st.caption("O ficheiro é preparado em segundo plano, com as linhas da seleção atual.")
+        elif exportacao.estado == 'pronto':
+            mostrar_ficheiro(exportacao)
+        elif exportacao.estado == 'erro':
+            st.error(f"A exportação falhou: {exportacao.erro}")
+        else:
+            acompanhar_exportacao(exportacao.id)
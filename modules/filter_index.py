@@ -0,0 +1,343 @@
+# ==============================================================================
+# Arquivo: filter_index.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Índice de filtros por categoria. Para cada coluna categórica
+#            (convénio, setor, tipo, status, departamento...), guarda um
+#            bitmap de linhas por valor. As páginas combinam seleções com
+#            operações de bits e calculam somas, médias e contagens sobre as
+#            posições selecionadas, sem criar cópias filtradas do DataFrame.
+# ==============================================================================
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modules.data_loader import (
+    COLUNAS_ORDENACAO, carregar_dados, carregar_dados_supply_chain, carregar_dados_rh, impressao_digital,
+    limites_periodo
+)
+from modules.instrumentacao import cronometrar
+
+# --- 1. Colunas Indexadas por Dataset ---
+COLUNAS_FILTRO = {
+    'hospital': ['convenio', 'setor_atendimento', 'tipo_atendimento', 'status_pagamento'],
+    'supply_chain': ['nome_fornecedor', 'categoria_item', 'status_entrega'],
+    'rh': ['departamento'],
+}
+_CARREGADORES = {
+    'hospital': carregar_dados,
+    'supply_chain': carregar_dados_supply_chain,
+    'rh': carregar_dados_rh,
+}
+
+
+# --- 2. O Índice ---
+# Um bitmap por valor de cada coluna: o bit i está a 1 se a linha i tem esse
+# valor. Com 500 mil linhas, cada bitmap ocupa 62,5 KB (np.packbits), e os 23
+# valores das quatro colunas do hospital cabem em cerca de 1,4 MB. Uma seleção
+# é o OU dos bitmaps dos valores escolhidos numa coluna, e o E entre colunas;
+# são operações sobre poucos KB, resolvidas em microssegundos.
+#
+# Os bitmaps são construídos valor a valor a partir dos códigos da coluna: o
+# temporário de cada passo é uma máscara de n_linhas bytes, e não uma matriz
+# (valores x linhas) de uma só vez.
+#
+# Como os dados estão ordenados pela data (ver data_loader), um período é um
+# intervalo de posições [i, j). Os métodos aceitam esse `intervalo` (obtido
+# com `limites`) e só desempacotam os bytes dos bitmaps que o cobrem.
+#
+# As colunas de dados (as que se somam ou se devolvem, e não as indexadas)
+# são carregadas apenas quando são pedidas pela primeira vez, e ficam depois
+# guardadas no índice. Assim, há um único índice por versão dos dados,
+# qualquer que seja o conjunto de colunas que cada página usa.
+class IndiceFiltros:
+    """
+    Índice de bitmaps por categoria sobre um DataFrame só de leitura.
+
+    Os filtros são dicionários {coluna: valores selecionados}. Uma coluna
+    ausente do dicionário não restringe as linhas; uma lista vazia não
+    seleciona nenhuma. O `intervalo` opcional, (i, j), restringe as linhas
+    às posições i <= p < j. Os valores em falta (NaN) de uma coluna indexada
+    têm o código -1 e não pertencem a nenhum bitmap.
+    """
+
+    def __init__(self, df, colunas, carregar_colunas=None, coluna_data=None, caminho_arquivo=None,
+                 impressao=None):
+        """
+        Args:
+            df (pandas.DataFrame): Os dados, com pelo menos as `colunas`.
+            colunas (list): As colunas categóricas a indexar.
+            carregar_colunas (callable, optional): Recebe uma lista de colunas
+                                                   e devolve-as num DataFrame
+                                                   com as mesmas linhas de `df`.
+            coluna_data (str, optional): A coluna de data usada por `limites`.
+            caminho_arquivo (str, optional): O ficheiro de origem dos dados.
+            impressao (str, optional): A impressão digital desse ficheiro na
+                                       versão indexada. Cada coluna carregada
+                                       depois é validada contra ela.
+        """
+        self.n_linhas = len(df)
+        self.impressao = impressao
+        self._caminho_arquivo = caminho_arquivo
+        self._carregar_colunas = carregar_colunas
+        self._coluna_data = coluna_data
+        self._df = df
+        self._dados = {}
+        self._trinco = threading.Lock()
+        self._categorias = {}
+        self._codigos = {}
+        self._bitmaps = {}
+        self._arestas = {}
+        for coluna in colunas:
+            categorico = pd.Categorical(df[coluna])
+            codigos = categorico.codes
+            self._categorias[coluna] = {valor: i for i, valor in enumerate(categorico.categories)}
+            self._codigos[coluna] = codigos
+            # Linha k do array: bitmap do valor de código k.
+            bitmaps = np.empty((len(categorico.categories), (self.n_linhas + 7) // 8), dtype=np.uint8)
+            for codigo in range(len(categorico.categories)):
+                bitmaps[codigo] = np.packbits(codigos == codigo)
+            self._bitmaps[coluna] = bitmaps
+
+    def verificar_versao(self):
+        """
+        Levanta RuntimeError se o ficheiro de origem já não for a versão
+        indexada. Uma reescrita com o mesmo número de linhas (correções no
+        lugar, releitura completa) juntaria os bitmaps e os códigos antigos
+        a valores novos; o próximo `carregar_indice` constrói o índice da
+        nova versão.
+        """
+        if self.impressao is None:
+            return
+        try:
+            atual = impressao_digital(self._caminho_arquivo)
+        except FileNotFoundError:
+            atual = None
+        if atual != self.impressao:
+            raise RuntimeError("Os dados mudaram entretanto. Tente de novo.")
+
+    def _valores_coluna(self, coluna):
+        """Array NumPy de uma coluna, carregada na primeira utilização."""
+        valores = self._dados.get(coluna)
+        if valores is not None:
+            return valores
+        if self._carregar_colunas is None and coluna not in self._df.columns:
+            raise KeyError(coluna)
+        with self._trinco:
+            if coluna in self._df.columns:
+                self._dados[coluna] = self._df[coluna].to_numpy()
+            elif coluna not in self._dados:
+                df = self._carregar_colunas([coluna])
+                if df is None:
+                    raise FileNotFoundError(coluna)
+                # A coluna foi lida do ficheiro tal como está agora: só é
+                # guardada se ainda for a versão indexada.
+                self.verificar_versao()
+                if len(df) != self.n_linhas:
+                    raise RuntimeError("Os dados mudaram entretanto. Tente de novo.")
+                self._dados[coluna] = df[coluna].to_numpy()
+            return self._dados[coluna]
+
+    # --- 2.1. Seleção ---
+    def valores(self, coluna):
+        """Devolve a lista ordenada dos valores de uma coluna indexada."""
+        return list(self._categorias[coluna])
+
+    def _bitmap(self, filtros):
+        """Bitmap combinado dos filtros (None se não houver restrições)."""
+        combinado = None
+        for coluna, selecionados in (filtros or {}).items():
+            codigos = [self._categorias[coluna][v] for v in selecionados if v in self._categorias[coluna]]
+            bitmaps = self._bitmaps[coluna]
+            if codigos:
+                bitmap_coluna = np.bitwise_or.reduce(bitmaps[codigos], axis=0)
+            else:
+                bitmap_coluna = np.zeros(bitmaps.shape[1], dtype=np.uint8)
+            combinado = bitmap_coluna if combinado is None else combinado & bitmap_coluna
+        return combinado
+
+    def mascara(self, filtros=None):
+        """Máscara booleana das linhas selecionadas."""
+        bitmap = self._bitmap(filtros)
+        if bitmap is None:
+            return np.ones(self.n_linhas, dtype=bool)
+        return np.unpackbits(bitmap, count=self.n_linhas).view(bool)
+
+    def limites(self, inicio=None, fim=None, coluna=None):
+        """
+        Intervalo de posições do período [inicio, fim) sobre a coluna de data
+        (ver `data_loader.limites_periodo`), ou None se não houver período.
+        """
+        if inicio is None and fim is None:
+            return None
+        coluna = coluna or self._coluna_data
+        datas = pd.DataFrame({coluna: self._valores_coluna(coluna)}, copy=False)
+        return limites_periodo(datas, inicio, fim, coluna)
+
+    def _selecao(self, filtros, intervalo=None):
+        """
+        Posições selecionadas: None se nada for restringido, uma fatia se só
+        o intervalo restringir, ou um array de posições.
+        """
+        bitmap = self._bitmap(filtros)
+        if intervalo is None:
+            return None if bitmap is None else np.flatnonzero(np.unpackbits(bitmap, count=self.n_linhas))
+        i, j = intervalo
+        if bitmap is None:
+            return slice(i, j)
+        # Desempacota apenas os bytes que cobrem [i, j).
+        primeiro = i // 8
+        bits = np.unpackbits(bitmap[primeiro:(j + 7) // 8])[i - 8 * primeiro:j - 8 * primeiro]
+        return np.flatnonzero(bits) + i
+
+    def posicoes(self, filtros=None, intervalo=None):
+        """Posições (ordenadas) das linhas selecionadas."""
+        selecao = self._selecao(filtros, intervalo)
+        if selecao is None:
+            return np.arange(self.n_linhas)
+        return np.arange(selecao.start, selecao.stop) if isinstance(selecao, slice) else selecao
+
+    # --- 2.2. Agregados sobre a Seleção ---
+    def contar(self, filtros=None, intervalo=None):
+        """Número de linhas selecionadas (contagem de bits, sem desempacotar)."""
+        if intervalo is not None:
+            selecao = self._selecao(filtros, intervalo)
+            return selecao.stop - selecao.start if isinstance(selecao, slice) else len(selecao)
+        bitmap = self._bitmap(filtros)
+        if bitmap is None:
+            return self.n_linhas
+        return int(np.bitwise_count(bitmap).sum(dtype=np.int64))
+
+    def contar_por(self, coluna_grupo, filtros=None, intervalo=None):
+        """
+        Número de linhas selecionadas por valor de uma coluna indexada.
+
+        Cada contagem é a contagem de bits de (bitmap do valor E seleção);
+        com um `intervalo`, contam-se os códigos das linhas selecionadas.
+
+        Returns:
+            pandas.DataFrame: Colunas [coluna_grupo, 'count'], apenas com os
+                              valores presentes na seleção.
+        """
+        if intervalo is not None:
+            codigos = self.codigos(coluna_grupo, filtros, intervalo)
+            contagens = np.bincount(codigos[codigos >= 0], minlength=len(self._categorias[coluna_grupo]))
+        else:
+            bitmap = self._bitmap(filtros)
+            bitmaps = self._bitmaps[coluna_grupo]
+            if bitmap is not None:
+                bitmaps = bitmaps & bitmap
+            contagens = np.bitwise_count(bitmaps).sum(axis=1, dtype=np.int64)
+        presentes = contagens > 0
+        return pd.DataFrame({
+            coluna_grupo: np.array(self.valores(coluna_grupo), dtype=object)[presentes],
+            'count': contagens[presentes],
+        })
+
+    def codigos(self, coluna, filtros=None, intervalo=None):
+        """
+        Códigos (posições em `valores(coluna)`) de uma coluna indexada nas
+        linhas selecionadas; úteis para agregar com `np.bincount`. Os valores
+        em falta têm o código -1.
+        """
+        selecao = self._selecao(filtros, intervalo)
+        return self._codigos[coluna] if selecao is None else self._codigos[coluna][selecao]
+
+    def coluna(self, coluna, filtros=None, intervalo=None):
+        """
+        Valores de uma coluna nas linhas selecionadas, como array NumPy.
+
+        Sem filtros, devolve o array da própria coluna (sem cópia); com
+        apenas um intervalo, uma vista contígua sobre esse array.
+        """
+        valores = self._valores_coluna(coluna)
+        selecao = self._selecao(filtros, intervalo)
+        return valores if selecao is None else valores[selecao]
+
+    def somar(self, coluna, filtros=None, intervalo=None):
+        """Soma de uma coluna numérica na seleção (acumulada em float64)."""
+        return float(np.sum(self.coluna(coluna, filtros, intervalo), dtype=np.float64))
+
+    def media(self, coluna, filtros=None, intervalo=None):
+        """Média de uma coluna numérica na seleção (NaN se estiver vazia)."""
+        n = self.contar(filtros, intervalo)
+        return self.somar(coluna, filtros, intervalo) / n if n else float('nan')
+
+    def arestas(self, coluna, calcular):
+        """
+        Arestas das classes de um histograma de `coluna`.
+
+        São calculadas uma única vez por índice (ou seja, por versão dos
+        dados) com `calcular(valores)` sobre a coluna completa, para que as
+        classes não mudem quando os filtros mudam.
+        """
+        if coluna not in self._arestas:
+            self._arestas[coluna] = calcular(self._valores_coluna(coluna))
+        return self._arestas[coluna]
+
+    def somar_por(self, coluna_grupo, coluna_valor, filtros=None, intervalo=None):
+        """
+        Soma de `coluna_valor` por valor de `coluna_grupo` na seleção.
+
+        Returns:
+            pandas.DataFrame: Colunas [coluna_grupo, coluna_valor], apenas com
+                              os grupos presentes na seleção.
+        """
+        categorias = self.valores(coluna_grupo)
+        selecao = self._selecao(filtros, intervalo)
+        codigos, valores = self._codigos[coluna_grupo], self._valores_coluna(coluna_valor)
+        if selecao is not None:
+            codigos, valores = codigos[selecao], valores[selecao]
+        # As linhas sem valor no grupo (código -1) não entram em nenhuma soma.
+        com_grupo = codigos >= 0
+        if not com_grupo.all():
+            codigos, valores = codigos[com_grupo], valores[com_grupo]
+        somas = np.bincount(codigos, weights=valores.astype(np.float64), minlength=len(categorias))
+        contagens = np.bincount(codigos, minlength=len(categorias))
+        presentes = contagens > 0
+        return pd.DataFrame({
+            coluna_grupo: np.array(categorias, dtype=object)[presentes],
+            coluna_valor: somas[presentes],
+        })
+
+
+# --- 3. Carregamento com Cache ---
+# Tal como o cubo do módulo rollup, o índice é um objeto partilhado e só de
+# leitura, guardado com `st.cache_resource` e reconstruído apenas quando a
+# impressão digital do ficheiro muda. A chave é só (dataset, caminho,
+# impressão digital): as colunas de dados são carregadas pelo próprio índice
+# quando são pedidas, sem criar outro índice.
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _construir_indice_versao(dataset, caminho_arquivo, impressao):
+    """Constrói o índice de uma versão concreta de um dataset."""
+    carregar = _CARREGADORES[dataset]
+    df = carregar(caminho_arquivo, colunas=COLUNAS_FILTRO[dataset])
+    if df is None:
+        return None
+    indice = IndiceFiltros(df, COLUNAS_FILTRO[dataset],
+                           carregar_colunas=lambda colunas: carregar(caminho_arquivo, colunas=colunas),
+                           coluna_data=COLUNAS_ORDENACAO.get(dataset),
+                           caminho_arquivo=caminho_arquivo, impressao=impressao)
+    # O ficheiro pode ter mudado entre o cálculo da impressão e a leitura:
+    # um índice de outra versão não pode ficar em cache com esta chave.
+    indice.verificar_versao()
+    return indice
+
+
+@cronometrar('carregamento', nome=lambda dataset, *args, **kwargs: f'carregar_indice[{dataset}]')
+def carregar_indice(dataset, caminho_arquivo):
+    """
+    Devolve o índice de filtros de um dataset.
+
+    Args:
+        dataset (str): 'hospital', 'supply_chain' ou 'rh'.
+        caminho_arquivo (str): O caminho para o ficheiro CSV.
+
+    Returns:
+        IndiceFiltros: O índice, ou None se os dados não puderem ser carregados.
+    """
+    try:
+        impressao = impressao_digital(caminho_arquivo)
+    except FileNotFoundError:
+        # Delegamos no loader a mensagem de erro habitual.
+        return _CARREGADORES[dataset](caminho_arquivo, colunas=COLUNAS_FILTRO[dataset])
+    return _construir_indice_versao(dataset, caminho_arquivo, impressao)
@@ -0,0 +1,310 @@
+# ==============================================================================
+# Arquivo: instrumentacao.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Instrumentação das páginas: mede o tempo e a variação de memória
+#            de cada etapa de uma execução (carregamento dos dados, agregações,
+#            construção das figuras e envio para o browser), mostra o perfil
+#            da execução atual num painel opcional da barra lateral e escreve
+#            um registo estruturado (JSON) por execução, que pode ser agregado
+#            entre sessões.
+#
+#            Uso numa página:
+#                iniciar_pagina('visao_geral')
+#                ...
+#                exibir_grafico(fig)            # em vez de st.plotly_chart
+#                ...
+#                terminar_pagina()
+#
+#            e `@medir_fragmento` por baixo de cada `@st.fragment`.
+#
+#            Os loaders, o motor de consultas e as funções de gráficos já
+#            estão instrumentados com o decorador `cronometrar`.
+# ==============================================================================
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Versões do Streamlit sem esta API: sessão desconhecida.
+    get_script_run_ctx = None
+
+# --- 1. Configuração ---
+# As etapas medidas, pela ordem em que aparecem no painel.
+ETAPAS = ['carregamento', 'agregacao', 'figura', 'renderizacao']
+NOMES_ETAPAS = {
+    'carregamento': 'Carregamento',
+    'agregacao': 'Agregação',
+    'figura': 'Figuras',
+    'renderizacao': 'Envio ao browser',
+}
+
+# Os registos vão para o logger 'hvp.perfil'. Com a variável de ambiente
+# HVP_LOG_PERFIL, são também gravados nesse ficheiro, um JSON por linha.
+LOGGER = logging.getLogger('hvp.perfil')
+VARIAVEL_LOG = 'HVP_LOG_PERFIL'
+CHAVE_EXECUCAO = '_perfil_execucao'
+CHAVE_PAINEL = '_perfil_visivel'
+
+_local = threading.local()
+_registo_global = {'atual': None}
+_trinco_log = threading.Lock()
+
+
+def _configurar_log():
+    """Liga o ficheiro de HVP_LOG_PERFIL ao logger (uma única vez)."""
+    caminho = os.environ.get(VARIAVEL_LOG)
+    with _trinco_log:
+        if not caminho or getattr(LOGGER, '_hvp_ficheiro', None) == caminho:
+            return
+        manipulador = logging.FileHandler(caminho, encoding='utf-8')
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        LOGGER.addHandler(manipulador)
+        LOGGER.setLevel(logging.INFO)
+        LOGGER._hvp_ficheiro = caminho
+
+
+# --- 2. Memória ---
+# A variação de memória de uma etapa é a variação do RSS do processo. Como o
+# processo é partilhado por todas as sessões, é uma indicação aproximada: é
+# fiável para as etapas grandes (ex.: carregar um dataset), não para
+# variações de poucos MB com várias sessões ativas.
+_PAGINA_BYTES = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_mb():
+    """RSS atual do processo em MB (None fora do Linux)."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGINA_BYTES / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# --- 3. Registo de uma Execução ---
+class RegistoExecucao:
+    """
+    Os intervalos medidos numa execução de uma página.
+
+    Cada intervalo guarda o seu tempo total e o tempo próprio (sem os
+    intervalos medidos dentro dele, ex.: a leitura de um dataset durante uma
+    consulta), para que as somas por etapa não contem o mesmo tempo duas vezes.
+    """
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.id = uuid.uuid4().hex[:12]
+        self.inicio = time.perf_counter()
+        self.rss_inicial = rss_mb()
+        self.intervalos = []
+        self.duracao = None
+
+    def acrescentar(self, etapa, nome, duracao, proprio, delta_rss):
+        self.intervalos.append({
+            'etapa': etapa,
+            'nome': nome,
+            'ms': round(duracao * 1000, 3),
+            'proprio_ms': round(proprio * 1000, 3),
+            'delta_rss_mb': round(delta_rss, 2) if delta_rss is not None else None,
+        })
+
+    def por_etapa(self):
+        """Tempo próprio (ms) acumulado em cada etapa."""
+        totais = dict.fromkeys(ETAPAS, 0.0)
+        for intervalo in self.intervalos:
+            totais[intervalo['etapa']] = totais.get(intervalo['etapa'], 0.0) + intervalo['proprio_ms']
+        return {etapa: round(ms, 3) for etapa, ms in totais.items()}
+
+    def terminar(self):
+        self.duracao = time.perf_counter() - self.inicio
+        return self
+
+    def como_evento(self, sessao):
+        """O registo estruturado da execução (um objeto JSON)."""
+        rss_final = rss_mb()
+        etapas = self.por_etapa()
+        total_ms = round(self.duracao * 1000, 3)
+        return {
+            'evento': 'execucao_pagina',
+            'pagina': self.pagina,
+            'execucao': self.id,
+            'sessao': sessao,
+            'data': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'total_ms': total_ms,
+            'outros_ms': round(max(0.0, total_ms - sum(etapas.values())), 3),
+            'etapas_ms': etapas,
+            'rss_mb': round(rss_final, 1) if rss_final is not None else None,
+            'delta_rss_mb': (round(rss_final - self.rss_inicial, 2)
+                             if rss_final is not None and self.rss_inicial is not None else None),
+            'intervalos': self.intervalos,
+        }
+
+
+def _contexto():
+    return get_script_run_ctx(suppress_warning=True) if get_script_run_ctx is not None else None
+
+
+def _id_sessao():
+    contexto = _contexto()
+    return contexto.session_id if contexto is not None else None
+
+
+def _registo_atual():
+    """O registo da execução em curso nesta sessão (ou None)."""
+    if _id_sessao() is not None:
+        return st.session_state.get(CHAVE_EXECUCAO)
+    return _registo_global['atual']
+
+
+# --- 4. Intervalos Medidos ---
+@contextlib.contextmanager
+def medir(etapa, nome):
+    """
+    Mede um intervalo de uma etapa (gestor de contexto).
+
+    Fora de uma execução iniciada com `iniciar_pagina` (ex.: nos scripts),
+    não regista nada e o custo é desprezável.
+
+    Args:
+        etapa (str): Uma das `ETAPAS`.
+        nome (str): O que está a ser medido (ex.: o nome da consulta).
+    """
+    registo = _registo_atual()
+    if registo is None:
+        yield
+        return
+    # A pilha dos intervalos abertos nesta thread: o tempo de cada intervalo
+    # é descontado ao tempo próprio do intervalo que o contém.
+    pilha = getattr(_local, 'pilha', None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    aberto = {'filhos': 0.0}
+    pilha.append(aberto)
+    rss_inicial = rss_mb()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        rss_final = rss_mb()
+        pilha.pop()
+        if pilha:
+            pilha[-1]['filhos'] += duracao
+        registo.acrescentar(etapa, nome, duracao, duracao - aberto['filhos'],
+                            rss_final - rss_inicial if rss_final is not None and rss_inicial is not None else None)
+
+
+def cronometrar(etapa, nome=None):
+    """
+    Decorador: mede cada chamada da função como um intervalo de `etapa`.
+
+    Args:
+        etapa (str): Uma das `ETAPAS`.
+        nome (callable, optional): Recebe os argumentos da chamada e devolve
+                                   o nome do intervalo. Por omissão, o nome
+                                   qualificado da função (ex.: 'CuboHospital.por').
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with medir(etapa, nome(*args, **kwargs) if nome else funcao.__qualname__):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def exibir_grafico(fig, **kwargs):
+    """
+    `st.plotly_chart` medido como envio ao browser (serialização da figura
+    e da mensagem para o frontend).
+    """
+    titulo = fig.layout.title.text if fig.layout.title and fig.layout.title.text else 'grafico'
+    with medir('renderizacao', titulo):
+        return st.plotly_chart(fig, **kwargs)
+
+
+# --- 5. Início e Fim de uma Página ---
+def iniciar_pagina(pagina):
+    """Começa o registo de uma nova execução da página."""
+    _configurar_log()
+    registo = RegistoExecucao(pagina)
+    if _id_sessao() is not None:
+        st.session_state[CHAVE_EXECUCAO] = registo
+    else:
+        _registo_global['atual'] = registo
+    return registo
+
+
+def _fechar_execucao():
+    """Fecha o registo da execução em curso e escreve-o no log."""
+    registo = _registo_atual()
+    if registo is None:
+        return None
+    evento = registo.terminar().como_evento(_id_sessao())
+    LOGGER.info(json.dumps(evento, ensure_ascii=False))
+    return evento
+
+
+def terminar_pagina():
+    """
+    Fecha o registo da execução, escreve-o no log e, se o utilizador o
+    ativou, mostra o perfil na barra lateral.
+    """
+    evento = _fechar_execucao()
+    if evento is None:
+        return None
+    if st.sidebar.toggle("Perfil de desempenho", key=CHAVE_PAINEL,
+                         help="Mostra onde foi gasto o tempo desta execução da página."):
+        mostrar_perfil(evento, st.sidebar)
+    return evento
+
+
+def medir_fragmento(funcao):
+    """
+    Decorador para as funções de `st.fragment` (aplicado por baixo dele).
+
+    Quando só o fragmento volta a executar, a página não passa por
+    `iniciar_pagina`/`terminar_pagina`: a execução do fragmento tem então o
+    seu próprio registo ('pagina/fragmento'), e o perfil é mostrado no fim do
+    fragmento (um fragmento não pode escrever na barra lateral).
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        contexto = _contexto()
+        if contexto is None or not contexto.fragment_ids_this_run:
+            return funcao(*args, **kwargs)
+        anterior = _registo_atual()
+        pagina = anterior.pagina.split('/')[0] if anterior is not None else '?'
+        iniciar_pagina(f"{pagina}/{funcao.__name__}")
+        resultado = funcao(*args, **kwargs)
+        evento = _fechar_execucao()
+        if st.session_state.get(CHAVE_PAINEL):
+            mostrar_perfil(evento, st)
+        return resultado
+    return envoltorio
+
+
+def mostrar_perfil(evento, destino):
+    """
+    Painel com a decomposição do tempo de uma execução.
+
+    Args:
+        evento (dict): O registo da execução (ver `RegistoExecucao.como_evento`).
+        destino: Onde desenhar o painel (`st.sidebar` ou `st`).
+    """
+    with destino.expander(f"Execução de {evento['pagina']} em {evento['total_ms']:,.0f} ms", expanded=True):
+        for etapa, ms in evento['etapas_ms'].items():
+            st.markdown(f"**{NOMES_ETAPAS.get(etapa, etapa)}:** {ms:,.1f} ms")
+        st.markdown(f"**Restante (script):** {evento['outros_ms']:,.1f} ms")
+        if evento['delta_rss_mb'] is not None:
+            st.caption(f"Memória do processo: {evento['rss_mb']:,.0f} MB ({evento['delta_rss_mb']:+,.1f} MB)")
+        if evento['intervalos']:
+            tabela = pd.DataFrame(evento['intervalos']).sort_values('proprio_ms', ascending=False)
+            st.dataframe(tabela, hide_index=True, use_container_width=True)
@@ -6,12 +6,111 @@
 #            Centralizar as funções de plotagem aqui garante consistência
 #            visual e facilita a manutenção do código.
 # ==============================================================================
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from modules.instrumentacao import cronometrar
 from modules.style import CORES_DARK_MODE
 
+# --- 0. Cache de Figuras ---
+# Construir uma figura com o Plotly Express (e aplicar-lhe o estilo) custa
+# dezenas de milissegundos, mesmo com meia dúzia de barras, e cada execução
+# da página voltava a construir todas as figuras. As funções de gráficos
+# recebem dados já agregados (pequenos), pelo que guardamos o JSON de cada
+# figura numa cache LRU, com uma chave calculada a partir do conteúdo dos
+# dados e dos restantes argumentos. Num acerto, a figura é recriada a partir
+# do JSON sem a validação do Plotly (já foi validada quando foi construída),
+# o que custa poucos milissegundos.
+MAX_FIGURAS_EM_CACHE = 256
+
+_figuras = OrderedDict()
+_trinco_figuras = threading.Lock()
+
+
+def _atualizar_impressao(h, valor):
+    """Acrescenta ao hash `h` o conteúdo de um argumento de uma função de gráficos."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        h.update(repr((type(valor).__name__, valor.shape, list(valor.axes[-1]) if valor.ndim == 2 else valor.name,
+                       [str(t) for t in np.atleast_1d(valor.dtypes)])).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(repr((valor.dtype.str, valor.shape)).encode())
+        h.update(np.ascontiguousarray(valor).tobytes() if valor.dtype.kind != 'O' else repr(valor.tolist()).encode())
+    elif isinstance(valor, dict):
+        h.update(b'{')
+        for chave in sorted(valor, key=repr):
+            _atualizar_impressao(h, chave)
+            _atualizar_impressao(h, valor[chave])
+        h.update(b'}')
+    elif isinstance(valor, (list, tuple)):
+        h.update(b'[')
+        for item in valor:
+            _atualizar_impressao(h, item)
+        h.update(b']')
+    else:
+        h.update(repr(valor).encode())
+    h.update(b'|')
+
+
+def impressao_figura(nome, args, kwargs):
+    """
+    Chave de cache de uma figura: hash dos dados e dos parâmetros do gráfico.
+
+    Args:
+        nome (str): O nome da função de gráficos.
+        args (tuple): Os argumentos posicionais da chamada.
+        kwargs (dict): Os argumentos nomeados da chamada.
+
+    Returns:
+        str: O hash, em hexadecimal.
+    """
+    h = hashlib.blake2b(nome.encode(), digest_size=16)
+    _atualizar_impressao(h, args)
+    _atualizar_impressao(h, kwargs)
+    return h.hexdigest()
+
+
+def memorizar_figura(funcao):
+    """
+    Decorador: guarda o JSON das figuras devolvidas por `funcao` na cache LRU.
+
+    A página recebe sempre uma figura nova (recriada a partir do JSON), que
+    pode alterar à vontade (ex.: `update_traces`) sem afetar a cache.
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        chave = impressao_figura(funcao.__qualname__, args, kwargs)
+        with _trinco_figuras:
+            figura_json = _figuras.get(chave)
+            if figura_json is not None:
+                _figuras.move_to_end(chave)
+        if figura_json is None:
+            figura_json = funcao(*args, **kwargs).to_json()
+            with _trinco_figuras:
+                _figuras[chave] = figura_json
+                _figuras.move_to_end(chave)
+                while len(_figuras) > MAX_FIGURAS_EM_CACHE:
+                    _figuras.popitem(last=False)
+        return go.Figure(json.loads(figura_json), _validate=False)
+    return envoltorio
+
+
+def limpar_cache_figuras():
+    """Esvazia a cache de figuras."""
+    with _trinco_figuras:
+        _figuras.clear()
+
+
 # --- 1. Funções de Gráficos Genéricos ---
 
+@cronometrar('figura')
+@memorizar_figura
 def plotar_donut_chart(df, coluna_nomes, coluna_valores, titulo):
     """
     Cria um gráfico de rosca (donut) interativo e estilizado.
@@ -44,6 +143,8 @@ def plotar_donut_chart(df, coluna_nomes, coluna_valores, titulo):
     )
     return fig
 
+@cronometrar('figura')
+@memorizar_figura
 def plotar_bar_chart_horizontal(df, x, y, titulo):
     """
     Cria um gráfico de barras horizontais interativo e estilizado.
@@ -81,6 +182,8 @@ def plotar_bar_chart_horizontal(df, x, y, titulo):
     fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
     return fig
 
+@cronometrar('figura')
+@memorizar_figura
 def plotar_gauge_chart(valor, titulo, referencia, max_range=50):
     """
     Cria um gráfico de medidor (gauge) para exibir um KPI.
@@ -125,9 +228,19 @@ def plotar_gauge_chart(valor, titulo, referencia, max_range=50):
 
 
 
+@cronometrar('figura')
+@memorizar_figura
+def plotar_timeseries_chart(df, x, y, titulo, max_pontos=None):
+    """
+    Cria um gráfico de linha (série temporal) interativo.
 
-def plotar_timeseries_chart(df, x, y, titulo):
-    """Cria um gráfico de linha (série temporal) interativo."""
+    Séries com mais de `LIMIAR_SERIE_GRANDE` pontos (ou sempre que
+    `max_pontos` for indicado) são desenhadas no modo de séries grandes:
+    reduzidas com LTTB a um orçamento de pontos e desenhadas com WebGL (ver
+    secção 3).
+    """
+    if max_pontos is not None or len(df) > LIMIAR_SERIE_GRANDE:
+        return plotar_serie_grande(df, x, y, titulo, max_pontos or ORCAMENTO_PONTOS)
     fig = px.line(
         df,
         x=x,
@@ -145,18 +258,77 @@ def plotar_timeseries_chart(df, x, y, titulo):
     return fig
 
 
+# --- 2. Histogramas com Classes Calculadas no Servidor ---
+# O `px.histogram` envia todos os valores para o browser, onde o Plotly os
+# agrupa em classes: com 50 mil funcionários, a figura leva 50 mil números no
+# JSON. Em vez disso, as classes são contadas aqui com NumPy e a figura leva
+# apenas as contagens (um `go.Bar` sem intervalo entre barras, com o mesmo
+# aspeto do histograma). O tamanho da figura depende do número de classes,
+# e não do número de linhas.
+MAX_CLASSES_HISTOGRAMA = 50
 
-# Adicione esta função ao final do ficheiro modules/plotting.py
 
-def plotar_histograma(df, coluna, titulo):
-    """Cria um histograma interativo para analisar a distribuição de uma variável."""
-    fig = px.histogram(
-        df,
-        x=coluna,
-        title=titulo,
-        color_discrete_sequence=[CORES_DARK_MODE['azul_destaque']]
-    )
+def calcular_arestas(valores, max_classes=MAX_CLASSES_HISTOGRAMA):
+    """
+    Calcula as arestas das classes de um histograma.
+
+    Para valores inteiros, as classes têm largura inteira e ficam centradas
+    nos inteiros (como no Plotly), com largura 1 sempre que houver até
+    `max_classes` valores possíveis. Para valores contínuos, usa-se a regra
+    'auto' do NumPy, limitada a `max_classes` classes.
+
+    Args:
+        valores (array-like): Os valores (normalmente a coluna completa, para
+                              que as classes não mudem com os filtros).
+        max_classes (int): O número máximo de classes.
+
+    Returns:
+        numpy.ndarray: As arestas, por ordem crescente.
+    """
+    valores = np.asarray(valores)
+    if valores.dtype.kind == 'f':
+        valores = valores[np.isfinite(valores)]
+    if valores.size == 0:
+        return np.array([0.0, 1.0])
+    minimo, maximo = valores.min(), valores.max()
+    if valores.dtype.kind in 'iub':
+        minimo, maximo = int(minimo), int(maximo)
+        largura = max(1, -(-(maximo - minimo + 1) // max_classes))
+        n_classes = -(-(maximo - minimo + 1) // largura)
+        return minimo - 0.5 + largura * np.arange(n_classes + 1, dtype=np.float64)
+    arestas = np.histogram_bin_edges(valores, bins='auto')
+    if len(arestas) > max_classes + 1:
+        arestas = np.linspace(minimo, maximo, max_classes + 1)
+    return arestas
+
+
+@cronometrar('figura')
+@memorizar_figura
+def plotar_histograma_classes(arestas, contagens, coluna, titulo):
+    """
+    Desenha um histograma a partir de contagens já agregadas por classe.
+
+    Args:
+        arestas (numpy.ndarray): As arestas das classes (n + 1 valores).
+        contagens (numpy.ndarray): O número de linhas em cada classe (n valores).
+        coluna (str): O nome da variável (usado no título do eixo X).
+        titulo (str): O título do gráfico.
+
+    Returns:
+        plotly.graph_objects.Figure: A figura do gráfico pronta para ser exibida.
+    """
+    arestas = np.asarray(arestas, dtype=np.float64)
+    fig = go.Figure(go.Bar(
+        x=(arestas[:-1] + arestas[1:]) / 2,
+        y=np.asarray(contagens),
+        width=np.diff(arestas),
+        customdata=np.column_stack([arestas[:-1], arestas[1:]]),
+        hovertemplate='%{customdata[0]:.4~g} – %{customdata[1]:.4~g}<br>%{y:,}<extra></extra>',
+        marker_color=CORES_DARK_MODE['azul_destaque']
+    ))
     fig.update_layout(
+        title=titulo,
+        bargap=0,
         yaxis_title="Número de Funcionários",
         xaxis_title=coluna.replace('_', ' ').title(),
         paper_bgcolor='rgba(0,0,0,0)',
@@ -164,3 +336,118 @@ def plotar_histograma(df, coluna, titulo):
         font_color=CORES_DARK_MODE['texto_principal']
     )
     return fig
+
+
+@cronometrar('figura')
+def plotar_histograma(df, coluna, titulo, arestas=None):
+    """
+    Cria um histograma interativo para analisar a distribuição de uma variável.
+
+    As classes são contadas no servidor (ver `plotar_histograma_classes`).
+
+    Args:
+        df (pd.DataFrame ou dict): Os dados (basta `df[coluna]`).
+        coluna (str): A coluna a representar.
+        titulo (str): O título do gráfico.
+        arestas (numpy.ndarray, optional): Arestas fixas das classes. Por
+                                           omissão, calculadas sobre `df`.
+
+    Returns:
+        plotly.graph_objects.Figure: A figura do gráfico pronta para ser exibida.
+    """
+    valores = np.asarray(df[coluna])
+    if arestas is None:
+        arestas = calcular_arestas(valores)
+    contagens, _ = np.histogram(valores, bins=arestas)
+    return plotar_histograma_classes(arestas, contagens, coluna, titulo)
+
+
+# --- 3. Séries Temporais Grandes ---
+# Uma série horária de dez anos tem quase 90 mil pontos: em SVG, com um
+# marcador por ponto, o browser deixa de responder. Num gráfico com cerca de
+# mil píxeis de largura, porém, nunca se veem mais do que uns milhares de
+# pontos. A série é por isso reduzida no servidor com o algoritmo LTTB
+# (Largest-Triangle-Three-Buckets, S. Steinarsson, 2013), que mantém os picos
+# e a forma visual da linha, e desenhada com `Scattergl` (WebGL).
+LIMIAR_SERIE_GRANDE = 2000
+ORCAMENTO_PONTOS = 1500
+
+
+def reduzir_lttb(x, y, n_pontos):
+    """
+    Escolhe os pontos de uma série a manter, com o algoritmo LTTB.
+
+    Os pontos interiores são divididos em `n_pontos - 2` grupos consecutivos;
+    de cada grupo fica o ponto que forma o triângulo de maior área com o
+    ponto escolhido no grupo anterior e a média do grupo seguinte. O primeiro
+    e o último pontos mantêm-se sempre.
+
+    Args:
+        x (array-like): Abcissas por ordem crescente (números ou datas).
+        y (array-like): Ordenadas.
+        n_pontos (int): O número de pontos a manter.
+
+    Returns:
+        numpy.ndarray: As posições dos pontos a manter, por ordem crescente.
+    """
+    n = len(y)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Limites dos grupos sobre os pontos interiores [1, n - 1).
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    tamanhos = np.diff(limites)
+    medias_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1) / tamanhos
+    medias_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1) / tamanhos
+    # O "grupo seguinte" do último grupo é o último ponto.
+    medias_x = np.append(medias_x[1:], x[-1])
+    medias_y = np.append(medias_y[1:], y[-1])
+
+    escolhidos = np.empty(n_pontos, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    a = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        areas = np.abs((x[a] - medias_x[i]) * (y[inicio:fim] - y[a])
+                       - (x[a] - x[inicio:fim]) * (medias_y[i] - y[a]))
+        a = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = a
+    return escolhidos
+
+
+def plotar_serie_grande(df, x, y, titulo, max_pontos=ORCAMENTO_PONTOS):
+    """
+    Desenha uma série temporal longa, reduzida com LTTB e em WebGL.
+
+    Args:
+        df (pd.DataFrame): O DataFrame com a série, ordenada por `x`.
+        x (str): A coluna das datas.
+        y (str): A coluna dos valores.
+        titulo (str): O título do gráfico.
+        max_pontos (int): O orçamento de pontos enviados ao browser.
+
+    Returns:
+        plotly.graph_objects.Figure: A figura do gráfico pronta para ser exibida.
+    """
+    escolhidos = reduzir_lttb(df[x].to_numpy(), df[y].to_numpy(), max_pontos)
+    fig = go.Figure(go.Scattergl(
+        x=df[x].to_numpy()[escolhidos],
+        y=df[y].to_numpy()[escolhidos],
+        mode='lines',
+        line={'color': px.colors.qualitative.Plotly[0]},
+        name=y
+    ))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Data",
+        yaxis_title="Valor (R$)",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font_color=CORES_DARK_MODE['texto_principal']
+    )
+    return fig
@@ -0,0 +1,796 @@
+# ==============================================================================
+# Arquivo: query_backend.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Motores de consulta das páginas de análise. Cada KPI e cada série
+#            de gráfico é calculado por um de dois motores com a mesma
+#            interface: pandas (sobre os DataFrames em memória) ou DuckDB
+#            (SQL embutido sobre os ficheiros CSV/Parquet, com os filtros
+#            empurrados para a leitura e execução em paralelo). As páginas
+#            recebem apenas o resultado agregado, que é pequeno. Um terceiro
+#            motor, 'snapshot', responde às mesmas consultas a partir de
+#            agregados pré-calculados (ver modules/snapshots.py).
+#
+#            As consultas do hospital e do supply chain aceitam um período
+#            [inicio, fim): `inicio` inclusivo e `fim` exclusivo.
+# ==============================================================================
+import functools
+import logging
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modules.data_loader import (
+    carregar_dados_supply_chain, fatiar_periodo, impressao_digital, obter_diretorio_particoes
+)
+from modules.filter_index import carregar_indice
+from modules.snapshots import carregar_snapshot
+from modules import sketches
+from modules.instrumentacao import cronometrar
+
+try:
+    import duckdb
+except ImportError:  # O DuckDB é opcional: sem ele, apenas o motor pandas existe.
+    duckdb = None
+
+# --- 1. Seleção do Motor ---
+# O motor é escolhido pela variável de ambiente HVP_MOTOR_CONSULTAS
+# ('pandas', 'duckdb' ou 'snapshot'). Por omissão usa-se o pandas, que não
+# precisa de dependências adicionais. O motor 'snapshot' serve os resultados
+# pré-calculados por scripts/gerar_snapshots.py (modo snapshot).
+#
+# O DuckDB é uma dependência opcional: não é instalado com requirements.txt
+# (a linha está comentada). Para usar o motor, instale-o à parte
+# (pip install duckdb==1.5.6) e defina HVP_MOTOR_CONSULTAS=duckdb. Se a
+# variável de ambiente pedir o motor 'duckdb' e o pacote não estiver instalado, as páginas usam o motor pandas e é
+# registado um aviso; os resultados são os mesmos (ver a verificação de
+# paridade, secção 7). Pedir o motor explicitamente, com
+# `obter_motor('duckdb')`, levanta ImportError.
+VARIAVEL_MOTOR = 'HVP_MOTOR_CONSULTAS'
+MOTOR_PADRAO = 'pandas'
+
+CAMINHO_HOSPITAL = 'data/hospital_vida_plena_dataset_500k.csv'
+CAMINHO_SUPPLY_CHAIN = 'data/hospital_supply_chain_dataset.csv'
+CAMINHO_RH = 'data/people_analytics_dataset.csv'
+
+LOGGER = logging.getLogger('hvp.query_backend')
+
+
+# --- 2. Aritmética Comum aos Dois Motores ---
+# Os valores monetários são somados em centavos inteiros (int64). A soma de
+# inteiros é exata e não depende da ordem, pelo que os dois motores (que
+# somam em paralelo ou por blocos, em ordens diferentes) chegam exatamente ao
+# mesmo número. As médias são calculadas aqui, em Python, a partir das somas
+# e contagens devolvidas por cada motor.
+def _centavos(valores):
+    """Converte valores monetários (série ou array) para centavos inteiros."""
+    return np.rint(np.asarray(valores, dtype='float64') * 100).astype(np.int64)
+
+
+def _reais(centavos):
+    """Converte uma soma em centavos para reais."""
+    return int(centavos) / 100
+
+
+def _media(soma, contagem, escala=1):
+    """Média a partir da soma e da contagem (NaN se não houver linhas)."""
+    return int(soma) / (escala * int(contagem)) if contagem else float('nan')
+
+
+def _kpis_hospital(total, pacientes, centavos):
+    return {
+        'total_atendimentos': int(total),
+        'pacientes_unicos': int(pacientes),
+        'faturacao_total': _reais(centavos),
+        'ticket_medio': _media(centavos, total, escala=100),
+    }
+
+
+def _kpis_supply_chain(total, atrasados, centavos):
+    return {
+        'custo_total': _reais(centavos),
+        'pedidos_atrasados': int(atrasados),
+        'total_pedidos': int(total),
+        'taxa_atraso': (int(atrasados) / int(total)) * 100 if total else 0,
+    }
+
+
+def _kpis_rh(total, saidas, soma_idade, soma_satisfacao):
+    return {
+        'total_funcionarios': int(total),
+        'total_saidas': int(saidas),
+        'turnover_rate': (int(saidas) / int(total)) * 100 if total else 0,
+        'idade_media': _media(soma_idade, total),
+        'satisfacao_media': _media(soma_satisfacao, total),
+    }
+
+
+# Frequências das séries temporais: código NumPy e unidade do `date_trunc`.
+FREQUENCIAS_SERIE = {'h': ('h', 'hour'), 'D': ('D', 'day')}
+
+
+def _serie(df):
+    """Normaliza uma série temporal agregada (datas em ns, valores em reais)."""
+    df = df[['data_atendimento', 'count', 'valor_total_atendimento']].copy()
+    df['data_atendimento'] = df['data_atendimento'].astype('datetime64[ns]')
+    df['count'] = df['count'].astype(np.int64)
+    df['valor_total_atendimento'] = df['valor_total_atendimento'].astype(np.int64) / 100
+    return df.sort_values('data_atendimento', ignore_index=True)
+
+
+def _exigir(df, caminho):
+    """Os carregadores devolvem None quando o ficheiro não existe."""
+    if df is None:
+        raise FileNotFoundError(caminho)
+    return df
+
+
+def _resultado(df, chave, coluna, centavos=False):
+    """Normaliza um resultado agrupado: ordenado pela chave, índice 0..n-1."""
+    df = df[[chave, coluna]].copy()
+    df[chave] = df[chave].astype(str) if chave != 'data_pedido' else df[chave].astype('datetime64[ns]')
+    if centavos:
+        df[coluna] = df[coluna].astype(np.int64) / 100
+    else:
+        df[coluna] = df[coluna].astype(np.int64)
+    return df.sort_values(chave, ignore_index=True)
+
+
+# --- 3. Motor pandas ---
+class MotorPandas:
+    """
+    Calcula as agregações sobre os DataFrames do armazém partilhado.
+
+    Todos os métodos devolvem dicionários (KPIs) ou DataFrames pequenos,
+    ordenados pela chave de agrupamento.
+    """
+
+    nome = 'pandas'
+
+    # --- 3.1. Hospital ---
+    # Os filtros por categoria usam o índice de bitmaps (modules/filter_index):
+    # as agregações correm sobre as posições selecionadas, sem criar uma cópia
+    # filtrada do DataFrame. O período é traduzido num intervalo de posições
+    # com duas pesquisas binárias sobre `data_atendimento` (dados ordenados).
+    def _indice_hospital(self, caminho):
+        return _exigir(carregar_indice('hospital', caminho), caminho)
+
+    @staticmethod
+    def _filtros_convenio(convenios):
+        return None if convenios is None else {'convenio': list(convenios)}
+
+    def kpis_hospital(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        indice, filtros = self._indice_hospital(caminho), self._filtros_convenio(convenios)
+        intervalo = indice.limites(inicio, fim, 'data_atendimento')
+        return _kpis_hospital(indice.contar(filtros, intervalo),
+                              pd.unique(indice.coluna('paciente_id', filtros, intervalo)).size,
+                              _centavos(indice.coluna('valor_total_atendimento', filtros, intervalo)).sum())
+
+    def atendimentos_por(self, dimensao, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        indice = self._indice_hospital(caminho)
+        contagens = indice.contar_por(dimensao, self._filtros_convenio(convenios),
+                                      indice.limites(inicio, fim, 'data_atendimento'))
+        return _resultado(contagens, dimensao, 'count')
+
+    def faturacao_por_convenio(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        indice, filtros = self._indice_hospital(caminho), self._filtros_convenio(convenios)
+        intervalo = indice.limites(inicio, fim, 'data_atendimento')
+        categorias = indice.valores('convenio')
+        codigos = indice.codigos('convenio', filtros, intervalo)
+        # Somas de centavos inteiros em float64: exatas até 2**53.
+        somas = np.bincount(codigos, weights=_centavos(indice.coluna('valor_total_atendimento', filtros, intervalo)),
+                            minlength=len(categorias))
+        presentes = np.bincount(codigos, minlength=len(categorias)) > 0
+        return _resultado(pd.DataFrame({'convenio': np.array(categorias, dtype=object)[presentes],
+                                        'valor_total_atendimento': somas[presentes]}),
+                          'convenio', 'valor_total_atendimento', centavos=True)
+
+    def serie_hospital(self, frequencia='D', caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        """
+        Atendimentos e faturação por hora ('h') ou por dia ('D').
+
+        Como os atendimentos estão ordenados por data, as linhas de cada
+        período formam blocos consecutivos: bastam o início de cada bloco e
+        uma soma por blocos (`reduceat`), sem agrupamento por hash.
+        """
+        unidade = FREQUENCIAS_SERIE[frequencia][0]
+        indice, filtros = self._indice_hospital(caminho), self._filtros_convenio(convenios)
+        intervalo = indice.limites(inicio, fim, 'data_atendimento')
+        periodos = indice.coluna('data_atendimento', filtros, intervalo).astype(f'datetime64[{unidade}]')
+        centavos = _centavos(indice.coluna('valor_total_atendimento', filtros, intervalo))
+        inicios = np.flatnonzero(np.r_[True, periodos[1:] != periodos[:-1]]) if len(periodos) else np.zeros(0, int)
+        return _serie(pd.DataFrame({
+            'data_atendimento': periodos[inicios],
+            'count': np.diff(np.r_[inicios, len(periodos)]),
+            'valor_total_atendimento': np.add.reduceat(centavos, inicios) if len(inicios) else centavos[:0],
+        }))
+
+    # --- 3.2. Supply Chain ---
+    # O período é uma fatia contígua (sem cópia) dos pedidos ordenados por data.
+    def _supply_chain(self, caminho, inicio=None, fim=None):
+        df = _exigir(carregar_dados_supply_chain(caminho, colunas=[
+            'nome_fornecedor', 'categoria_item', 'data_pedido', 'custo_total_pedido', 'status_entrega'
+        ]), caminho)
+        return fatiar_periodo(df, inicio, fim, 'data_pedido')
+
+    def kpis_supply_chain(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        df = self._supply_chain(caminho, inicio, fim)
+        return _kpis_supply_chain(len(df), (df['status_entrega'] == 'Atrasado').sum(),
+                                  _centavos(df['custo_total_pedido']).sum())
+
+    def custo_por(self, dimensao, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        df = self._supply_chain(caminho, inicio, fim)
+        somas = pd.Series(_centavos(df['custo_total_pedido'])).groupby(df[dimensao].to_numpy()).sum()
+        return _resultado(somas.rename_axis(dimensao).rename('custo_total_pedido').reset_index(),
+                          dimensao, 'custo_total_pedido', centavos=True)
+
+    def custos_mensais(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        df = self._supply_chain(caminho, inicio, fim)
+        meses = df['data_pedido'].dt.to_period('M').dt.to_timestamp().to_numpy()
+        somas = pd.Series(_centavos(df['custo_total_pedido'])).groupby(meses).sum()
+        return _resultado(somas.rename_axis('data_pedido').rename('custo_total_pedido').reset_index(),
+                          'data_pedido', 'custo_total_pedido', centavos=True)
+
+    # --- 3.3. Período Disponível ---
+    def periodo_disponivel(self, dataset, caminho):
+        """
+        Primeira e última data de um dataset ('hospital' ou 'supply_chain').
+
+        Returns:
+            tuple: (pandas.Timestamp, pandas.Timestamp), ou (None, None) se o
+                   dataset estiver vazio.
+        """
+        if dataset == 'hospital':
+            datas = self._indice_hospital(caminho).coluna('data_atendimento')
+        else:
+            datas = self._supply_chain(caminho)['data_pedido'].to_numpy()
+        # Os dados estão ordenados pela data: os extremos são a 1.ª e a última linha.
+        if len(datas) == 0:
+            return None, None
+        return pd.Timestamp(datas[0]), pd.Timestamp(datas[-1])
+
+    # --- 3.4. Recursos Humanos ---
+    def _indice_rh(self, caminho):
+        return _exigir(carregar_indice('rh', caminho), caminho)
+
+    @staticmethod
+    def _filtros_departamento(departamento):
+        return None if departamento is None else {'departamento': [departamento]}
+
+    def kpis_rh(self, caminho=CAMINHO_RH, departamento=None):
+        indice, filtros = self._indice_rh(caminho), self._filtros_departamento(departamento)
+        return _kpis_rh(indice.contar(filtros), pd.notna(indice.coluna('data_termino', filtros)).sum(),
+                        indice.coluna('idade', filtros).sum(dtype=np.int64),
+                        indice.coluna('satisfacao_trabalho', filtros).sum(dtype=np.int64))
+
+    def saidas_por_motivo(self, caminho=CAMINHO_RH, departamento=None):
+        indice, filtros = self._indice_rh(caminho), self._filtros_departamento(departamento)
+        saiu = pd.notna(indice.coluna('data_termino', filtros))
+        contagens = pd.Series(indice.coluna('motivo_saida', filtros)[saiu]).value_counts()
+        contagens = contagens.rename_axis('motivo_saida').rename('count').reset_index()
+        return _resultado(contagens[contagens['count'] > 0], 'motivo_saida', 'count')
+
+    def salario_medio_por_departamento(self, caminho=CAMINHO_RH):
+        indice = self._indice_rh(caminho)
+        categorias = indice.valores('departamento')
+        codigos = indice.codigos('departamento')
+        somas = np.bincount(codigos, weights=_centavos(indice.coluna('salario_mensal')), minlength=len(categorias))
+        contagens = np.bincount(codigos, minlength=len(categorias))
+        presentes = contagens > 0
+        return pd.DataFrame({
+            'departamento': np.array(categorias, dtype=object)[presentes].astype(str),
+            'salario_mensal': [_media(s, n, escala=100) for s, n in zip(somas[presentes], contagens[presentes])],
+        }).sort_values('departamento', ignore_index=True)
+
+
+# --- 4. Motor DuckDB ---
+# O DuckDB lê os dados diretamente dos ficheiros: o hospital e o supply chain
+# a partir das partições Parquet ano/mês (ver data_loader), o RH a partir do
+# CSV. Só as colunas referidas na consulta são lidas, os filtros do WHERE são
+# aplicados durante a leitura e a execução usa todos os núcleos disponíveis.
+# Nada fica residente em memória para além do resultado agregado.
+class MotorDuckDB:
+    """Calcula as mesmas agregações que `MotorPandas`, em SQL, com o DuckDB."""
+
+    nome = 'duckdb'
+
+    def __init__(self):
+        if duckdb is None:
+            raise ImportError("O motor 'duckdb' requer o pacote duckdb (pip install duckdb).")
+        # As ligações do DuckDB não devem ser partilhadas entre threads; cada
+        # thread do servidor (uma por sessão) usa a sua.
+        self._local = threading.local()
+
+    def _ligacao(self):
+        if not hasattr(self._local, 'ligacao'):
+            self._local.ligacao = duckdb.connect()
+        return self._local.ligacao
+
+    @staticmethod
+    def _literal(texto):
+        return "'" + texto.replace("'", "''") + "'"
+
+    def _origem(self, dataset, caminho):
+        """Expressão FROM para um dataset (Parquet particionado ou CSV)."""
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(caminho)
+        diretorio = obter_diretorio_particoes(dataset, caminho)
+        if diretorio is not None:
+            padrao = os.path.join(diretorio, '**', '*.parquet')
+            return f"read_parquet({self._literal(padrao)}, hive_partitioning = true)"
+        if caminho.lower().endswith('.parquet'):
+            return f"read_parquet({self._literal(caminho)})"
+        return f"read_csv({self._literal(caminho)}, delim = ';', decimal_separator = ',', header = true)"
+
+    def _consultar(self, sql, parametros=None):
+        return self._ligacao().execute(sql, parametros or []).df()
+
+    @staticmethod
+    def _filtro(coluna, valores, parametros):
+        """Acrescenta um filtro `coluna IN (...)` parametrizado (ou nenhum)."""
+        if valores is None:
+            return 'TRUE'
+        parametros.append([str(v) for v in valores])
+        return f"list_contains(?, {coluna})"
+
+    @staticmethod
+    def _periodo(coluna, inicio, fim, parametros):
+        """Acrescenta o filtro parametrizado do período [inicio, fim)."""
+        condicoes = ['TRUE']
+        if inicio is not None:
+            parametros.append(pd.Timestamp(inicio).to_pydatetime())
+            condicoes.append(f"{coluna} >= ?")
+        if fim is not None:
+            parametros.append(pd.Timestamp(fim).to_pydatetime())
+            condicoes.append(f"{coluna} < ?")
+        return ' AND '.join(condicoes)
+
+    # --- 4.1. Hospital ---
+    _CENTAVOS_HOSPITAL = "CAST(round(CAST(valor_total_atendimento AS DOUBLE) * 100) AS BIGINT)"
+
+    def kpis_hospital(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        parametros = []
+        linha = self._consultar(f"""
+            SELECT count(*) AS total, count(DISTINCT paciente_id) AS pacientes,
+                   coalesce(sum({self._CENTAVOS_HOSPITAL}), 0) AS centavos
+            FROM {self._origem('hospital', caminho)}
+            WHERE {self._filtro('convenio', convenios, parametros)}
+              AND {self._periodo('data_atendimento', inicio, fim, parametros)}
+        """, parametros).iloc[0]
+        return _kpis_hospital(linha['total'], linha['pacientes'], linha['centavos'])
+
+    def atendimentos_por(self, dimensao, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT {dimensao}, count(*) AS count
+            FROM {self._origem('hospital', caminho)}
+            WHERE {self._filtro('convenio', convenios, parametros)}
+              AND {self._periodo('data_atendimento', inicio, fim, parametros)}
+            GROUP BY {dimensao}
+        """, parametros)
+        return _resultado(df, dimensao, 'count')
+
+    def faturacao_por_convenio(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT convenio, sum({self._CENTAVOS_HOSPITAL}) AS valor_total_atendimento
+            FROM {self._origem('hospital', caminho)}
+            WHERE {self._filtro('convenio', convenios, parametros)}
+              AND {self._periodo('data_atendimento', inicio, fim, parametros)}
+            GROUP BY convenio
+        """, parametros)
+        return _resultado(df, 'convenio', 'valor_total_atendimento', centavos=True)
+
+    def serie_hospital(self, frequencia='D', caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT date_trunc('{FREQUENCIAS_SERIE[frequencia][1]}', data_atendimento) AS data_atendimento,
+                   count(*) AS count, sum({self._CENTAVOS_HOSPITAL}) AS valor_total_atendimento
+            FROM {self._origem('hospital', caminho)}
+            WHERE {self._filtro('convenio', convenios, parametros)}
+              AND {self._periodo('data_atendimento', inicio, fim, parametros)}
+            GROUP BY 1
+        """, parametros)
+        return _serie(df)
+
+    # --- 4.2. Supply Chain ---
+    _CENTAVOS_SUPPLY = "CAST(round(CAST(custo_total_pedido AS DOUBLE) * 100) AS BIGINT)"
+
+    def kpis_supply_chain(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        parametros = []
+        linha = self._consultar(f"""
+            SELECT count(*) AS total,
+                   count(*) FILTER (WHERE status_entrega = 'Atrasado') AS atrasados,
+                   coalesce(sum({self._CENTAVOS_SUPPLY}), 0) AS centavos
+            FROM {self._origem('supply_chain', caminho)}
+            WHERE {self._periodo('data_pedido', inicio, fim, parametros)}
+        """, parametros).iloc[0]
+        return _kpis_supply_chain(linha['total'], linha['atrasados'], linha['centavos'])
+
+    def custo_por(self, dimensao, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT {dimensao}, sum({self._CENTAVOS_SUPPLY}) AS custo_total_pedido
+            FROM {self._origem('supply_chain', caminho)}
+            WHERE {self._periodo('data_pedido', inicio, fim, parametros)}
+            GROUP BY {dimensao}
+        """, parametros)
+        return _resultado(df, dimensao, 'custo_total_pedido', centavos=True)
+
+    def custos_mensais(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT date_trunc('month', data_pedido) AS data_pedido,
+                   sum({self._CENTAVOS_SUPPLY}) AS custo_total_pedido
+            FROM {self._origem('supply_chain', caminho)}
+            WHERE {self._periodo('data_pedido', inicio, fim, parametros)}
+            GROUP BY 1
+        """, parametros)
+        return _resultado(df, 'data_pedido', 'custo_total_pedido', centavos=True)
+
+    # --- 4.3. Período Disponível ---
+    def periodo_disponivel(self, dataset, caminho):
+        """Primeira e última data de um dataset (ver `MotorPandas`)."""
+        coluna = 'data_atendimento' if dataset == 'hospital' else 'data_pedido'
+        linha = self._consultar(f"""
+            SELECT min({coluna}) AS inicio, max({coluna}) AS fim
+            FROM {self._origem(dataset, caminho)}
+        """).iloc[0]
+        if pd.isna(linha['inicio']):
+            return None, None
+        return pd.Timestamp(linha['inicio']), pd.Timestamp(linha['fim'])
+
+    # --- 4.4. Recursos Humanos ---
+    def kpis_rh(self, caminho=CAMINHO_RH, departamento=None):
+        parametros = []
+        linha = self._consultar(f"""
+            SELECT count(*) AS total, count(data_termino) AS saidas,
+                   coalesce(sum(idade), 0) AS soma_idade,
+                   coalesce(sum(satisfacao_trabalho), 0) AS soma_satisfacao
+            FROM {self._origem('rh', caminho)}
+            WHERE {self._filtro('departamento', None if departamento is None else [departamento], parametros)}
+        """, parametros).iloc[0]
+        return _kpis_rh(linha['total'], linha['saidas'], linha['soma_idade'], linha['soma_satisfacao'])
+
+    def saidas_por_motivo(self, caminho=CAMINHO_RH, departamento=None):
+        parametros = []
+        df = self._consultar(f"""
+            SELECT motivo_saida, count(*) AS count
+            FROM {self._origem('rh', caminho)}
+            WHERE data_termino IS NOT NULL AND motivo_saida IS NOT NULL
+              AND {self._filtro('departamento', None if departamento is None else [departamento], parametros)}
+            GROUP BY motivo_saida
+        """, parametros)
+        return _resultado(df, 'motivo_saida', 'count')
+
+    def salario_medio_por_departamento(self, caminho=CAMINHO_RH):
+        df = self._consultar(f"""
+            SELECT departamento,
+                   sum(CAST(round(salario_mensal * 100) AS BIGINT)) AS soma, count(*) AS n
+            FROM {self._origem('rh', caminho)}
+            GROUP BY departamento
+        """)
+        return pd.DataFrame({
+            'departamento': df['departamento'].astype(str),
+            'salario_mensal': [_media(s, n, escala=100) for s, n in zip(df['soma'], df['n'])],
+        }).sort_values('departamento', ignore_index=True)
+
+
+# --- 5. Motor Snapshot ---
+# Responde a partir do snapshot pré-calculado (modules/snapshots.py), sem ler
+# os datasets: as tabelas estão agregadas por dia e por categoria, pelo que
+# cada consulta filtra e soma algumas dezenas de milhares de linhas, qualquer
+# que seja o tamanho dos dados de origem. Diferenças para os outros motores:
+#   - o período é resolvido ao dia (um dia conta se intersetar [inicio, fim);
+#     as páginas só pedem períodos de dias inteiros, em que o resultado é igual);
+#   - a série do hospital existe apenas por dia;
+#   - `atendimentos_por` existe apenas para as dimensões guardadas no
+#     snapshot (setor e tipo de atendimento, as da visão geral);
+#   - `pacientes_unicos` dos KPIs filtrados é uma estimativa HyperLogLog
+#     (erro padrão de `sketches.ERRO_PADRAO`, 0,81%), da união dos esboços
+#     por mês e convénio, com o período alargado aos meses que interseta.
+#     Sem filtros, é o número exato calculado na geração.
+class MotorSnapshot:
+    """Calcula as consultas das páginas a partir da versão atual do snapshot."""
+
+    nome = 'snapshot'
+
+    def versao(self):
+        """A versão do snapshot servida (chave das caches em `consultar`)."""
+        return carregar_snapshot().versao
+
+    def _tabela(self, dataset, nome, caminho):
+        snapshot = carregar_snapshot()
+        if os.path.normpath(snapshot.origem(dataset)['caminho']) != os.path.normpath(caminho):
+            raise FileNotFoundError(caminho)
+        return snapshot.tabela(nome)
+
+    @staticmethod
+    def _periodo(df, inicio, fim):
+        """As linhas dos dias que intersetam [inicio, fim)."""
+        mascara = np.ones(len(df), dtype=bool)
+        if inicio is not None:
+            mascara &= (df['dia'] + pd.Timedelta(days=1) > pd.Timestamp(inicio)).to_numpy()
+        if fim is not None:
+            mascara &= (df['dia'] < pd.Timestamp(fim)).to_numpy()
+        return df[mascara]
+
+    # --- 5.1. Hospital ---
+    def _hospital(self, caminho, convenios, inicio, fim, tabela='hospital_diario'):
+        df = self._periodo(self._tabela('hospital', tabela, caminho), inicio, fim)
+        return df if convenios is None else df[df['convenio'].isin([str(c) for c in convenios])]
+
+    def _pacientes_estimados(self, caminho, convenios, inicio, fim):
+        """Estimativa dos pacientes distintos, unindo os esboços dos meses e convénios selecionados."""
+        df = self._tabela('hospital', 'hospital_pacientes', caminho)
+        mascara = np.ones(len(df), dtype=bool)
+        if inicio is not None:
+            mascara &= (df['mes'] >= pd.Timestamp(inicio).to_period('M').to_timestamp()).to_numpy()
+        if fim is not None:
+            mascara &= (df['mes'] < pd.Timestamp(fim)).to_numpy()
+        if convenios is not None:
+            mascara &= df['convenio'].isin([str(c) for c in convenios]).to_numpy()
+        precisao = carregar_snapshot().manifesto['precisao_pacientes']
+        esbocos = np.frombuffer(b''.join(df['registos'][mascara]), dtype=np.uint8).reshape(-1, 1 << precisao)
+        if not len(esbocos):
+            return 0
+        return int(round(sketches.estimar(esbocos.max(axis=0), precisao)))
+
+    def kpis_hospital(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        df = self._hospital(caminho, convenios, inicio, fim)
+        if convenios is None and inicio is None and fim is None:
+            pacientes = carregar_snapshot().visao_geral().pacientes_unicos()
+        else:
+            pacientes = self._pacientes_estimados(caminho, convenios, inicio, fim)
+        return _kpis_hospital(df['count'].sum(), pacientes, df['centavos'].sum())
+
+    def atendimentos_por(self, dimensao, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        if dimensao not in carregar_snapshot().manifesto['dimensoes']:
+            raise ValueError(f"O snapshot não guarda atendimentos por '{dimensao}'.")
+        df = self._hospital(caminho, convenios, inicio, fim, tabela='hospital_dimensoes_diario')
+        contagens = df[df['dimensao'] == dimensao].groupby('valor')['count'].sum()
+        return _resultado(contagens.rename_axis(dimensao).reset_index(), dimensao, 'count')
+
+    def faturacao_por_convenio(self, caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        somas = self._hospital(caminho, convenios, inicio, fim).groupby('convenio')['centavos'].sum()
+        return _resultado(somas.rename('valor_total_atendimento').reset_index(),
+                          'convenio', 'valor_total_atendimento', centavos=True)
+
+    def serie_hospital(self, frequencia='D', caminho=CAMINHO_HOSPITAL, convenios=None, inicio=None, fim=None):
+        if frequencia != 'D':
+            raise ValueError("O snapshot guarda apenas a série diária do hospital.")
+        somas = self._hospital(caminho, convenios, inicio, fim).groupby('dia')[['count', 'centavos']].sum()
+        return _serie(somas.reset_index().rename(columns={
+            'dia': 'data_atendimento', 'centavos': 'valor_total_atendimento'
+        }))
+
+    # --- 5.2. Supply Chain ---
+    def _supply_chain(self, caminho, inicio, fim):
+        return self._periodo(self._tabela('supply_chain', 'supply_chain_diario', caminho), inicio, fim)
+
+    def kpis_supply_chain(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        df = self._supply_chain(caminho, inicio, fim)
+        return _kpis_supply_chain(df['count'].sum(), df['atrasados'].sum(), df['centavos'].sum())
+
+    def custo_por(self, dimensao, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        somas = self._supply_chain(caminho, inicio, fim).groupby(dimensao)['centavos'].sum()
+        return _resultado(somas.rename('custo_total_pedido').reset_index(),
+                          dimensao, 'custo_total_pedido', centavos=True)
+
+    def custos_mensais(self, caminho=CAMINHO_SUPPLY_CHAIN, inicio=None, fim=None):
+        df = self._supply_chain(caminho, inicio, fim)
+        somas = df['centavos'].groupby(df['dia'].dt.to_period('M').dt.to_timestamp().to_numpy()).sum()
+        return _resultado(somas.rename_axis('data_pedido').rename('custo_total_pedido').reset_index(),
+                          'data_pedido', 'custo_total_pedido', centavos=True)
+
+    # --- 5.3. Período Disponível ---
+    def periodo_disponivel(self, dataset, caminho):
+        self._tabela(dataset, f'{dataset}_diario', caminho)
+        return carregar_snapshot().periodo(dataset)
+
+    # --- 5.4. Recursos Humanos ---
+    def _departamentos(self, caminho, departamento):
+        df = self._tabela('rh', 'rh_departamentos', caminho)
+        return df if departamento is None else df[df['departamento'] == departamento]
+
+    def kpis_rh(self, caminho=CAMINHO_RH, departamento=None):
+        df = self._departamentos(caminho, departamento)
+        return _kpis_rh(df['total'].sum(), df['saidas'].sum(), df['soma_idade'].sum(), df['soma_satisfacao'].sum())
+
+    def saidas_por_motivo(self, caminho=CAMINHO_RH, departamento=None):
+        df = self._tabela('rh', 'rh_saidas', caminho)
+        if departamento is not None:
+            df = df[df['departamento'] == departamento]
+        contagens = df.groupby('motivo_saida')['count'].sum().reset_index()
+        return _resultado(contagens[contagens['count'] > 0], 'motivo_saida', 'count')
+
+    def salario_medio_por_departamento(self, caminho=CAMINHO_RH):
+        df = self._departamentos(caminho, None)
+        df = df[df['total'] > 0]
+        return pd.DataFrame({
+            'departamento': df['departamento'].astype(str),
+            'salario_mensal': [_media(s, n, escala=100) for s, n in zip(df['salario_centavos'], df['total'])],
+        }).sort_values('departamento', ignore_index=True)
+
+
+# --- 6. Acesso ao Motor Configurado ---
+_motores = {}
+_trinco = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _avisar_sem_duckdb():
+    """Regista, uma única vez por processo, que o DuckDB pedido não existe."""
+    LOGGER.warning("%s=duckdb, mas o pacote duckdb não está instalado: a usar o motor pandas.", VARIAVEL_MOTOR)
+
+
+def obter_motor(nome=None):
+    """
+    Devolve o motor de consultas (uma instância por processo).
+
+    Args:
+        nome (str, optional): 'pandas', 'duckdb' ou 'snapshot'. Por omissão,
+                              o valor da variável de ambiente
+                              HVP_MOTOR_CONSULTAS, ou 'pandas' se não estiver
+                              definida (ou se pedir 'duckdb' sem o pacote
+                              instalado).
+
+    Returns:
+        MotorPandas, MotorDuckDB ou MotorSnapshot: O motor pedido.
+    """
+    classes = {'pandas': MotorPandas, 'duckdb': MotorDuckDB, 'snapshot': MotorSnapshot}
+    if nome is None:
+        nome = (os.environ.get(VARIAVEL_MOTOR) or MOTOR_PADRAO).lower()
+        if nome == MotorDuckDB.nome and duckdb is None:
+            _avisar_sem_duckdb()
+            nome = MotorPandas.nome
+    nome = nome.lower()
+    if nome not in classes:
+        raise ValueError(f"Motor de consultas desconhecido: '{nome}'. Use 'pandas', 'duckdb' ou 'snapshot'.")
+    with _trinco:
+        if nome not in _motores:
+            _motores[nome] = classes[nome]()
+        return _motores[nome]
+
+
+def modo_snapshot():
+    """True se as páginas devem ser desenhadas apenas a partir do snapshot."""
+    return obter_motor().nome == MotorSnapshot.nome
+
+
+# --- 6.1. Consultas em Cache ---
+# O Streamlit volta a executar a página (ou o fragmento) a cada interação.
+# `consultar` guarda o resultado de cada consulta com `st.cache_data`, com
+# uma chave formada apenas pelo que a consulta realmente usa: o motor, o
+# método, a impressão digital do ficheiro (ou, no modo snapshot, a versão do
+# snapshot) e os seus próprios filtros. Assim, mudar o departamento não
+# invalida o gráfico de salários (que não depende dele), e uma nova versão do
+# ficheiro invalida tudo o que o lê.
+@st.cache_data(max_entries=512, show_spinner=False)
+def _consultar_versao(nome_motor, metodo, caminho, impressao, parametros):
+    """Executa uma consulta (chamada apenas em falha de cache)."""
+    return getattr(obter_motor(nome_motor), metodo)(caminho=caminho, **dict(parametros))
+
+
+@cronometrar('agregacao', nome=lambda metodo, *args, **kwargs: metodo)
+def consultar(metodo, caminho, **parametros):
+    """
+    Executa `metodo` do motor configurado, com cache por filtros.
+
+    Args:
+        metodo (str): O nome do método do motor (ex.: 'kpis_rh').
+        caminho (str): O ficheiro CSV consultado.
+        **parametros: Os restantes argumentos do método, por nome
+                      (ex.: departamento='Vendas').
+
+    Returns:
+        dict ou pandas.DataFrame: O resultado do método (uma cópia, que a
+                                  página pode ordenar ou alterar à vontade).
+        Levanta FileNotFoundError se o ficheiro não existir.
+    """
+    parametros = tuple(sorted(
+        (nome, tuple(valor) if isinstance(valor, list) else valor) for nome, valor in parametros.items()
+    ))
+    motor = obter_motor()
+    # No modo snapshot, os CSV podem nem existir no servidor.
+    impressao = motor.versao() if motor.nome == MotorSnapshot.nome else impressao_digital(caminho)
+    return _consultar_versao(motor.nome, metodo, caminho, impressao, parametros)
+
+
+# --- 7. Verificação de Paridade ---
+# Executa todas as consultas nos dois motores e compara os resultados. É
+# coberta pelos testes (tests/test_query_backend.py, sobre datasets gerados)
+# e pode também ser corrida sobre os dados reais, a partir da raiz do projeto:
+#     python -m modules.query_backend
+CAMINHOS_PADRAO = {'hospital': CAMINHO_HOSPITAL, 'supply_chain': CAMINHO_SUPPLY_CHAIN, 'rh': CAMINHO_RH}
+
+
+def _consultas_paridade(caminhos=None):
+    """
+    Lista (descrição, chamada) de todas as consultas usadas pelas páginas,
+    com seleções filtradas e vazias.
+
+    Args:
+        caminhos (dict, optional): {'hospital', 'supply_chain', 'rh'} ->
+                                   ficheiro. Por omissão, os datasets em /data/.
+    """
+    caminhos = caminhos or CAMINHOS_PADRAO
+    h, s, r = ({'caminho': caminhos[d]} for d in ('hospital', 'supply_chain', 'rh'))
+    convenios = ['Amil', 'SUS']
+    periodo = {'inicio': '2022-03-15', 'fim': '2023-07-01'}
+    vazio = {'inicio': '2030-01-01', 'fim': '2031-01-01'}
+    return [
+        ('kpis_hospital', lambda m: m.kpis_hospital(**h)),
+        ('kpis_hospital[convenios]', lambda m: m.kpis_hospital(convenios=convenios, **h)),
+        ('kpis_hospital[vazio]', lambda m: m.kpis_hospital(convenios=[], **h)),
+        ('atendimentos_por[setor]', lambda m: m.atendimentos_por('setor_atendimento', **h)),
+        ('atendimentos_por[tipo]', lambda m: m.atendimentos_por('tipo_atendimento', convenios=convenios, **h)),
+        ('atendimentos_por[vazio]', lambda m: m.atendimentos_por('setor_atendimento', convenios=[], **h)),
+        ('faturacao_por_convenio', lambda m: m.faturacao_por_convenio(**h)),
+        ('faturacao_por_convenio[convenios]', lambda m: m.faturacao_por_convenio(convenios=convenios, **h)),
+        ('kpis_hospital[periodo]', lambda m: m.kpis_hospital(convenios=convenios, **periodo, **h)),
+        ('kpis_hospital[periodo_vazio]', lambda m: m.kpis_hospital(**vazio, **h)),
+        ('atendimentos_por[periodo]', lambda m: m.atendimentos_por('setor_atendimento', **periodo, **h)),
+        ('faturacao_por_convenio[periodo]',
+         lambda m: m.faturacao_por_convenio(convenios=convenios, **periodo, **h)),
+        ('faturacao_por_convenio[periodo_vazio]', lambda m: m.faturacao_por_convenio(**vazio, **h)),
+        ('serie_hospital[dia]', lambda m: m.serie_hospital('D', **h)),
+        ('serie_hospital[hora]', lambda m: m.serie_hospital('h', convenios=convenios, **periodo, **h)),
+        ('serie_hospital[vazio]', lambda m: m.serie_hospital('D', convenios=[], **h)),
+        ('periodo_disponivel[hospital]', lambda m: m.periodo_disponivel('hospital', caminhos['hospital'])),
+        ('kpis_supply_chain', lambda m: m.kpis_supply_chain(**s)),
+        ('custo_por[fornecedor]', lambda m: m.custo_por('nome_fornecedor', **s)),
+        ('custo_por[categoria]', lambda m: m.custo_por('categoria_item', **s)),
+        ('custos_mensais', lambda m: m.custos_mensais(**s)),
+        ('kpis_supply_chain[periodo]', lambda m: m.kpis_supply_chain(**periodo, **s)),
+        ('kpis_supply_chain[periodo_vazio]', lambda m: m.kpis_supply_chain(**vazio, **s)),
+        ('custo_por[periodo]', lambda m: m.custo_por('nome_fornecedor', **periodo, **s)),
+        ('custo_por[periodo_vazio]', lambda m: m.custo_por('nome_fornecedor', **vazio, **s)),
+        ('custos_mensais[periodo]', lambda m: m.custos_mensais(**periodo, **s)),
+        ('custos_mensais[periodo_vazio]', lambda m: m.custos_mensais(**vazio, **s)),
+        ('periodo_disponivel[supply_chain]',
+         lambda m: m.periodo_disponivel('supply_chain', caminhos['supply_chain'])),
+        ('kpis_rh', lambda m: m.kpis_rh(**r)),
+        ('kpis_rh[departamento]', lambda m: m.kpis_rh(departamento='Vendas', **r)),
+        ('kpis_rh[vazio]', lambda m: m.kpis_rh(departamento='Inexistente', **r)),
+        ('saidas_por_motivo', lambda m: m.saidas_por_motivo(**r)),
+        ('saidas_por_motivo[departamento]', lambda m: m.saidas_por_motivo(departamento='Vendas', **r)),
+        ('saidas_por_motivo[vazio]', lambda m: m.saidas_por_motivo(departamento='Inexistente', **r)),
+        ('salario_medio_por_departamento', lambda m: m.salario_medio_por_departamento(**r)),
+    ]
+
+
+def _iguais(a, b):
+    if isinstance(a, tuple):
+        return a == b
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(
+            a[k] == b[k] or (pd.isna(a[k]) and pd.isna(b[k])) for k in a
+        )
+    return a.equals(b)
+
+
+def verificar_paridade(caminhos=None):
+    """
+    Compara os resultados dos motores pandas e DuckDB.
+
+    Args:
+        caminhos (dict, optional): Os ficheiros dos datasets (ver
+                                   `_consultas_paridade`).
+
+    Returns:
+        list: As descrições das consultas cujos resultados diferem
+              (lista vazia se os motores estiverem de acordo).
+    """
+    pandas_, duck = obter_motor('pandas'), obter_motor('duckdb')
+    return [descricao for descricao, consulta in _consultas_paridade(caminhos)
+            if not _iguais(consulta(pandas_), consulta(duck))]
+
+
+if __name__ == '__main__':
+    diferencas = verificar_paridade()
+    for descricao in diferencas:
+        print(f"DIFERENTE: {descricao}")
+    print("Paridade pandas/DuckDB: " + ("FALHOU" if diferencas else "OK"))
+    sys.exit(1 if diferencas else 0)
@@ -0,0 +1,356 @@
+# ==============================================================================
+# Arquivo: rollup.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Este módulo constrói e consulta o "cubo" de agregados (rollup) do
+#            dataset do hospital. O cubo é calculado uma única vez por versão
+#            do dataset e permite que as páginas obtenham KPIs e séries para
+#            gráficos sem voltarem a percorrer as 500 mil linhas originais.
+# ==============================================================================
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modules.data_loader import carregar_dados, impressao_digital, obter_estado_ingestao
+from modules.instrumentacao import cronometrar
+from modules.sketches import EsbocosPorCelula
+
+# --- 1. Definição do Cubo ---
+# O cubo é um conjunto de arrays NumPy densos com uma dimensão por eixo de
+# análise: setor x tipo x convénio x status x mês. Cada célula guarda o número
+# de atendimentos e a soma da faturação. Com 8 setores, 4 tipos, 7 convénios,
+# 4 status e 120 meses, o cubo tem cerca de 100 mil células (menos de 2 MB),
+# e qualquer filtro é resolvido com uma seleção de índices e uma soma.
+DIMENSOES_CUBO = ['setor_atendimento', 'tipo_atendimento', 'convenio', 'status_pagamento', 'mes']
+COLUNAS_CUBO = [
+    'paciente_id', 'data_atendimento', 'setor_atendimento', 'tipo_atendimento',
+    'convenio', 'status_pagamento', 'valor_total_atendimento'
+]
+
+# O cubo é partilhado por todas as sessões: as contagens exatas de pacientes
+# já calculadas ficam numa cache LRU limitada, protegida por um trinco.
+MAX_DISTINTOS_EM_CACHE = 256
+
+
+class CuboHospital:
+    """
+    Cubo de agregados do hospital, imutável depois de construído.
+
+    Atributos:
+        eixos (dict): Para cada dimensão, a lista ordenada dos seus valores.
+        contagens (numpy.ndarray): Número de atendimentos por célula.
+        somas (numpy.ndarray): Soma de `valor_total_atendimento` por célula,
+                               em centavos inteiros (guardados em float64,
+                               exatos até 2**53), como nos motores de consulta.
+
+    Para contar pacientes únicos, o cubo guarda também os pares distintos
+    (célula, paciente) ordenados por célula. Assim, a contagem exata de
+    pacientes distintos para qualquer combinação de filtros não precisa do
+    DataFrame original. A partir desses pares é construído, no carregamento,
+    um esboço HyperLogLog por célula (modules/sketches.py), que responde às
+    contagens aproximadas sem ordenar nem deduplicar pacientes.
+    """
+
+    def __init__(self, eixos, contagens, somas, celulas_pares, pacientes_pares):
+        self.eixos = eixos
+        self.contagens = contagens
+        self.somas = somas
+        self._celulas_pares = celulas_pares
+        self._pacientes_pares = pacientes_pares
+        self._esbocos = EsbocosPorCelula(celulas_pares, pacientes_pares, contagens.shape)
+        self._cache_distintos = OrderedDict()   # filtros -> pacientes distintos (exato)
+        self._trinco_distintos = threading.Lock()
+
+    # --- 1.1. Seleção de Células ---
+    def _indices(self, filtros):
+        """Converte um dicionário {dimensão: valores} em índices por eixo."""
+        filtros = filtros or {}
+        indices = []
+        for dimensao in DIMENSOES_CUBO:
+            if dimensao in filtros:
+                posicao = {valor: i for i, valor in enumerate(self.eixos[dimensao])}
+                selecao = [posicao[v] for v in filtros[dimensao] if v in posicao]
+                indices.append(np.array(selecao, dtype=np.intp))
+            else:
+                indices.append(np.arange(len(self.eixos[dimensao])))
+        return indices
+
+    def _selecionar(self, array, filtros):
+        """Devolve o sub-cubo correspondente aos filtros."""
+        if not filtros:
+            return array
+        return array[np.ix_(*self._indices(filtros))]
+
+    # --- 1.2. Consultas ---
+    def valores(self, dimensao):
+        """Devolve a lista de valores possíveis de uma dimensão."""
+        return list(self.eixos[dimensao])
+
+    @cronometrar('agregacao')
+    def total_atendimentos(self, filtros=None):
+        """Número de atendimentos que satisfazem os filtros."""
+        return int(self._selecionar(self.contagens, filtros).sum())
+
+    @cronometrar('agregacao')
+    def faturacao_total(self, filtros=None):
+        """Soma da faturação dos atendimentos que satisfazem os filtros."""
+        return float(self._selecionar(self.somas, filtros).sum()) / 100
+
+    @cronometrar('agregacao')
+    def ticket_medio(self, filtros=None):
+        """Faturação média por atendimento (NaN se não houver atendimentos)."""
+        total = self.total_atendimentos(filtros)
+        return self.faturacao_total(filtros) / total if total else float('nan')
+
+    @cronometrar('agregacao')
+    def por(self, dimensao, filtros=None):
+        """
+        Agrega o cubo por uma dimensão.
+
+        Args:
+            dimensao (str): Uma das `DIMENSOES_CUBO`.
+            filtros (dict, optional): {dimensão: lista de valores selecionados}.
+
+        Returns:
+            pandas.DataFrame: Colunas [dimensao, 'count', 'valor_total_atendimento'],
+                              apenas com os valores que têm atendimentos.
+        """
+        eixo = DIMENSOES_CUBO.index(dimensao)
+        outros_eixos = tuple(i for i in range(len(DIMENSOES_CUBO)) if i != eixo)
+        indices = self._indices(filtros)
+        contagens = self._selecionar(self.contagens, filtros).sum(axis=outros_eixos)
+        somas = self._selecionar(self.somas, filtros).sum(axis=outros_eixos)
+        rotulos = np.asarray(self.eixos[dimensao], dtype=object)[indices[eixo]]
+        resultado = pd.DataFrame({
+            dimensao: rotulos,
+            'count': contagens,
+            'valor_total_atendimento': somas / 100
+        })
+        return resultado[resultado['count'] > 0].reset_index(drop=True)
+
+    @cronometrar('agregacao')
+    def pacientes_unicos(self, filtros=None, exato=True):
+        """
+        Número de pacientes distintos que satisfazem os filtros.
+
+        Args:
+            filtros (dict, optional): {dimensão: lista de valores selecionados}.
+            exato (bool): Por omissão, conta os pacientes exatamente
+                          (deduplicando os pares célula/paciente selecionados).
+                          Se False, devolve a estimativa HyperLogLog, com um
+                          erro padrão relativo de `sketches.ERRO_PADRAO` (0,81%).
+
+        Returns:
+            int: O número (exato ou estimado) de pacientes distintos.
+        """
+        if not exato:
+            eixos_filtrados = [DIMENSOES_CUBO.index(d) for d in (filtros or {})]
+            return int(round(self._esbocos.estimar(self._indices(filtros), eixos_filtrados)))
+        chave = tuple(sorted((d, tuple(v)) for d, v in (filtros or {}).items()))
+        with self._trinco_distintos:
+            if chave in self._cache_distintos:
+                self._cache_distintos.move_to_end(chave)
+                return self._cache_distintos[chave]
+        # A contagem é feita fora do trinco, para não bloquear as outras sessões.
+        if filtros:
+            mascara_celulas = np.zeros(self.contagens.shape, dtype=bool)
+            mascara_celulas[np.ix_(*self._indices(filtros))] = True
+            selecionados = self._pacientes_pares[mascara_celulas.ravel()[self._celulas_pares]]
+        else:
+            selecionados = self._pacientes_pares
+        distintos = int(np.unique(selecionados).size)
+        with self._trinco_distintos:
+            self._cache_distintos[chave] = distintos
+            self._cache_distintos.move_to_end(chave)
+            while len(self._cache_distintos) > MAX_DISTINTOS_EM_CACHE:
+                self._cache_distintos.popitem(last=False)
+        return distintos
+
+    @cronometrar('agregacao')
+    def pacientes_unicos_por(self, dimensao, filtros=None):
+        """
+        Estimativa de pacientes distintos por valor de uma dimensão.
+
+        Returns:
+            pandas.DataFrame: Colunas [dimensao, 'pacientes_unicos'], apenas
+                              com os valores que têm atendimentos.
+        """
+        filtros = dict(filtros or {})
+        valores = filtros.pop(dimensao, self.eixos[dimensao])
+        linhas = []
+        for valor in valores:
+            if self.total_atendimentos({**filtros, dimensao: [valor]}) > 0:
+                linhas.append((valor, self.pacientes_unicos({**filtros, dimensao: [valor]}, exato=False)))
+        return pd.DataFrame(linhas, columns=[dimensao, 'pacientes_unicos'])
+
+
+# --- 2. Construção do Cubo ---
+def construir_cubo_hospital(df):
+    """
+    Constrói o cubo de agregados a partir do DataFrame do hospital.
+
+    Args:
+        df (pd.DataFrame): DataFrame com pelo menos as `COLUNAS_CUBO`.
+
+    Returns:
+        CuboHospital: O cubo pronto a consultar.
+    """
+    eixos = {}
+    codigos = []
+    for dimensao in DIMENSOES_CUBO[:-1]:
+        categorias = df[dimensao].astype('category').cat
+        eixos[dimensao] = list(categorias.categories)
+        codigos.append(categorias.codes.to_numpy())
+
+    # O mês é representado pelo seu primeiro dia, contando meses desde o
+    # primeiro mês presente no dataset.
+    datas = df['data_atendimento']
+    meses_absolutos = (datas.dt.year * 12 + datas.dt.month - 1).to_numpy()
+    primeiro_mes = int(meses_absolutos.min()) if len(df) else 0
+    ultimo_mes = int(meses_absolutos.max()) if len(df) else -1
+    eixos['mes'] = [
+        pd.Timestamp(year=m // 12, month=m % 12 + 1, day=1)
+        for m in range(primeiro_mes, ultimo_mes + 1)
+    ]
+    codigos.append(meses_absolutos - primeiro_mes)
+
+    forma = tuple(len(eixos[d]) for d in DIMENSOES_CUBO)
+    celulas = np.ravel_multi_index(codigos, forma)
+    n_celulas = int(np.prod(forma))
+
+    contagens = np.bincount(celulas, minlength=n_celulas).reshape(forma)
+    valores = np.rint(df['valor_total_atendimento'].to_numpy(dtype='float64') * 100)
+    somas = np.bincount(celulas, weights=valores, minlength=n_celulas).reshape(forma)
+
+    # Pares distintos (célula, paciente), ordenados por célula.
+    pares = np.unique(celulas.astype(np.int64) << 32 | df['paciente_id'].to_numpy().astype(np.int64))
+    celulas_pares = (pares >> 32).astype(np.int64)
+    pacientes_pares = (pares & 0xFFFFFFFF).astype(np.int32)
+
+    return CuboHospital(eixos, contagens, somas, celulas_pares, pacientes_pares)
+
+
+# --- 2.1. Atualização Incremental ---
+# Quando o dataset cresce por append (ver a ingestão incremental do
+# data_loader), não reconstruímos o cubo inteiro: construímos um cubo só com
+# as linhas novas e somamo-lo ao anterior. Se o delta trouxer valores novos
+# (um mês ou um convénio que ainda não existia), os eixos são alargados.
+def _unir_eixos(eixos_a, eixos_b):
+    """Une os eixos de dois cubos, mantendo o mês como um intervalo contínuo."""
+    eixos = {}
+    for dimensao in DIMENSOES_CUBO[:-1]:
+        eixos[dimensao] = sorted(set(eixos_a[dimensao]) | set(eixos_b[dimensao]))
+    meses = [m for m in eixos_a['mes'] + eixos_b['mes']]
+    if meses:
+        eixos['mes'] = list(pd.date_range(min(meses), max(meses), freq='MS'))
+    else:
+        eixos['mes'] = []
+    return eixos
+
+
+def _reindexar(cubo, eixos):
+    """Expande os arrays de um cubo para eixos mais largos."""
+    forma = tuple(len(eixos[d]) for d in DIMENSOES_CUBO)
+    mapas = []
+    for dimensao in DIMENSOES_CUBO:
+        posicao = {valor: i for i, valor in enumerate(eixos[dimensao])}
+        mapas.append(np.array([posicao[v] for v in cubo.eixos[dimensao]], dtype=np.intp))
+
+    contagens = np.zeros(forma, dtype=cubo.contagens.dtype)
+    somas = np.zeros(forma, dtype=cubo.somas.dtype)
+    if cubo.contagens.size:
+        contagens[np.ix_(*mapas)] = cubo.contagens
+        somas[np.ix_(*mapas)] = cubo.somas
+
+    if cubo._celulas_pares.size:
+        multi = np.unravel_index(cubo._celulas_pares, cubo.contagens.shape)
+        celulas_pares = np.ravel_multi_index([m[i] for m, i in zip(mapas, multi)], forma).astype(np.int64)
+    else:
+        celulas_pares = cubo._celulas_pares
+    return contagens, somas, celulas_pares
+
+
+def combinar_cubos(cubo_a, cubo_b):
+    """
+    Soma dois cubos (ex.: o cubo existente e o cubo das linhas novas).
+
+    Returns:
+        CuboHospital: Um novo cubo; os cubos de entrada não são alterados.
+    """
+    eixos = _unir_eixos(cubo_a.eixos, cubo_b.eixos)
+    contagens_a, somas_a, celulas_a = _reindexar(cubo_a, eixos)
+    contagens_b, somas_b, celulas_b = _reindexar(cubo_b, eixos)
+    # Os eixos unidos preservam a ordem, por isso ambos os conjuntos de pares
+    # continuam ordenados: a ordenação estável (timsort) funde-os em tempo linear.
+    pares = np.sort(np.concatenate([
+        celulas_a << 32 | cubo_a._pacientes_pares.astype(np.int64),
+        celulas_b << 32 | cubo_b._pacientes_pares.astype(np.int64)
+    ]), kind='stable')
+    if pares.size:
+        pares = pares[np.concatenate(([True], pares[1:] != pares[:-1]))]
+    return CuboHospital(
+        eixos,
+        contagens_a + contagens_b,
+        somas_a + somas_b,
+        (pares >> 32).astype(np.int64),
+        (pares & 0xFFFFFFFF).astype(np.int32)
+    )
+
+
+# --- 3. Carregamento com Cache ---
+# O cubo é um objeto partilhado e só de leitura; por isso usamos
+# `st.cache_resource`, que devolve a mesma instância a todas as sessões em vez
+# de uma cópia. Tal como nos loaders, a chave inclui a impressão digital do
+# ficheiro: o cubo é reconstruído apenas quando os dados mudam.
+#
+# O último cubo construído para cada ficheiro é também guardado, com a geração
+# e o número de linhas da ingestão que o originou. Se o ficheiro apenas
+# cresceu, a nova versão do cubo é obtida somando o cubo das linhas novas.
+#
+# A geração é lida antes e depois de carregar os dados: se uma releitura
+# completa (noutra sessão, ou nesta chamada) a mudar entretanto, não se sabe
+# de que geração é o DataFrame, e o cubo é construído de raiz sem ficar
+# registado como base para as ingestões seguintes.
+_ultimos_cubos = {}   # caminho -> dict(cubo, geracao, linhas)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _construir_cubo_versao(caminho_arquivo, impressao):
+    """Constrói o cubo de uma versão concreta do dataset do hospital."""
+    antes = obter_estado_ingestao(caminho_arquivo)
+    df = carregar_dados(caminho_arquivo, colunas=COLUNAS_CUBO)
+    if df is None:
+        return None
+    depois = obter_estado_ingestao(caminho_arquivo)
+
+    # Antes da primeira ingestão não há estado; a primeira geração é a 0.
+    geracao_antes = antes['geracao'] if antes is not None else 0
+    estavel = depois is not None and depois['geracao'] == geracao_antes and depois['linhas'] == len(df)
+    anterior = _ultimos_cubos.get(caminho_arquivo)
+    if estavel and anterior is not None and anterior['geracao'] == depois['geracao'] and anterior['linhas'] <= len(df):
+        cubo = combinar_cubos(anterior['cubo'], construir_cubo_hospital(df.iloc[anterior['linhas']:]))
+    else:
+        cubo = construir_cubo_hospital(df)
+
+    if estavel:
+        _ultimos_cubos[caminho_arquivo] = {'cubo': cubo, 'geracao': depois['geracao'], 'linhas': len(df)}
+    return cubo
+
+
+@cronometrar('carregamento')
+def carregar_cubo_hospital(caminho_arquivo):
+    """
+    Carrega o dataset do hospital e constrói o seu cubo de agregados.
+
+    Args:
+        caminho_arquivo (str): O caminho para o ficheiro CSV do hospital.
+
+    Returns:
+        CuboHospital: O cubo, ou None se os dados não puderem ser carregados.
+    """
+    try:
+        impressao = impressao_digital(caminho_arquivo)
+    except FileNotFoundError:
+        # Delegamos no loader a mensagem de erro habitual.
+        return carregar_dados(caminho_arquivo, colunas=COLUNAS_CUBO)
+    return _construir_cubo_versao(caminho_arquivo, impressao)
@@ -0,0 +1,127 @@
+# ==============================================================================
+# Arquivo: shared_store.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Armazém partilhado, só de leitura, dos datasets carregados. Cada
+#            dataset fica residente uma única vez por processo do servidor, e
+#            todas as sessões e reruns recebem vistas sem cópia (zero-copy)
+#            sobre os mesmos buffers.
+# ==============================================================================
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# --- 1. Proteção dos Dados Partilhados ---
+# O `st.cache_data` serializa o DataFrame e devolve uma cópia nova a cada
+# sessão e a cada rerun. Com dezenas de utilizadores, o dataset de 500 mil
+# linhas ficaria duplicado em memória muitas vezes. Aqui guardamos um único
+# DataFrame por versão e entregamos vistas rasas (`copy(deep=False)`).
+#
+# Para que nenhuma sessão altere os dados das outras, os arrays NumPy de cada
+# DataFrame guardado são marcados como só de leitura. Numa vista, acrescentar
+# ou substituir uma coluna inteira (`df['x'] = ...`) continua a funcionar, pois
+# só altera a vista; uma escrita no lugar (`.loc[...] = ...`, ou sobre o
+# resultado de `.to_numpy()`) levanta um erro em vez de corromper os buffers
+# partilhados. Quem precisar de alterar valores deve fazer primeiro
+# `df.copy()`.
+
+# --- 2. Regiões do Armazém ---
+# Cada região tem o seu próprio limite de entradas e a sua ordem LRU. Os
+# datasets completos (ou seleções de colunas) e os resultados das consultas
+# por período ficam em regiões separadas: uma série de consultas com datas
+# diferentes descarta apenas outros períodos, e nunca os datasets de base,
+# cuja recarga é muito mais cara.
+MAX_ENTRADAS = 8
+MAX_ENTRADAS_PERIODOS = 4
+LIMITES_REGIOES = {'datasets': MAX_ENTRADAS, 'periodos': MAX_ENTRADAS_PERIODOS}
+
+_entradas = {regiao: OrderedDict() for regiao in LIMITES_REGIOES}   # regiao -> chave -> DataFrame
+_trincos_chave = {}         # chave -> Lock (evita carregar a mesma chave duas vezes)
+_trinco = threading.Lock()
+
+
+def _vista(df):
+    """Devolve uma vista rasa (sem cópia dos dados) de um DataFrame partilhado."""
+    return df.copy(deep=False)
+
+
+def _so_de_leitura(df):
+    """Marca como só de leitura os arrays NumPy que guardam as colunas de `df`."""
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            array = serie.array.codes
+        else:
+            array = serie.to_numpy(copy=False)
+        # A coluna é uma vista sobre o bloco do DataFrame: a proteção é
+        # aplicada a toda a cadeia de arrays, até ao que detém a memória.
+        while isinstance(array, np.ndarray):
+            array.flags.writeable = False
+            array = array.base
+    return df
+
+
+def selecionar_colunas(df, colunas):
+    """
+    Devolve um DataFrame com um subconjunto das colunas, sem copiar os dados
+    (`df[lista]` copiaria as colunas selecionadas).
+
+    Args:
+        df (pandas.DataFrame): Os dados de origem.
+        colunas (list): As colunas a manter, pela ordem pretendida.
+
+    Returns:
+        pandas.DataFrame: Um DataFrame novo que partilha os arrays de `df`.
+    """
+    return pd.DataFrame({coluna: df[coluna] for coluna in colunas}, index=df.index, copy=False)
+
+
+def obter_ou_carregar(chave, carregar, regiao='datasets'):
+    """
+    Devolve uma vista sobre o DataFrame partilhado associado à chave.
+
+    Se a chave ainda não estiver no armazém, `carregar()` é chamado uma única
+    vez (mesmo com várias sessões a pedir a mesma chave em simultâneo) e o seu
+    resultado passa a ser partilhado. Quando a região excede o seu limite
+    (`LIMITES_REGIOES`), as entradas usadas há mais tempo são descartadas.
+
+    Args:
+        chave (tuple): Chave que identifica a versão dos dados (ex.: dataset,
+                       impressão digital do ficheiro e colunas).
+        carregar (callable): Função sem argumentos que devolve o DataFrame.
+        regiao (str): 'datasets' (por omissão) ou 'periodos'.
+
+    Returns:
+        pandas.DataFrame: Uma vista rasa, com arrays só de leitura, dos dados.
+    """
+    entradas = _entradas[regiao]
+    with _trinco:
+        if chave in entradas:
+            entradas.move_to_end(chave)
+            return _vista(entradas[chave])
+        trinco_chave = _trincos_chave.setdefault(chave, threading.Lock())
+
+    with trinco_chave:
+        # Outra sessão pode ter carregado a chave enquanto esperávamos.
+        with _trinco:
+            if chave in entradas:
+                entradas.move_to_end(chave)
+                return _vista(entradas[chave])
+
+        df = _so_de_leitura(carregar())
+
+        with _trinco:
+            entradas[chave] = df
+            entradas.move_to_end(chave)
+            while len(entradas) > LIMITES_REGIOES[regiao]:
+                entradas.popitem(last=False)
+            _trincos_chave.pop(chave, None)
+        return _vista(df)
+
+
+def limpar(regiao=None):
+    """Remove as entradas de uma região, ou de todo o armazém (ex.: para libertar memória)."""
+    with _trinco:
+        for nome, entradas in _entradas.items():
+            if regiao is None or nome == regiao:
+                entradas.clear()
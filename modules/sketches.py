@@ -0,0 +1,221 @@
+# ==============================================================================
+# Arquivo: sketches.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Esboços HyperLogLog para contagens aproximadas de valores
+#            distintos (ex.: pacientes únicos). Um esboço ocupa alguns KB,
+#            independentemente do número de valores, e dois esboços unem-se
+#            com um máximo registo a registo: a contagem de distintos de
+#            qualquer combinação de filtros obtém-se unindo os esboços das
+#            células selecionadas, sem voltar a percorrer os dados.
+# ==============================================================================
+import math
+import numpy as np
+
+# --- 1. Parâmetros e Erro Esperado ---
+# Com precisão p, o esboço tem m = 2**p registos e o erro padrão relativo da
+# estimativa é cerca de 1,04 / sqrt(m). Com p = 14 (16 384 registos, 16 KB
+# num esboço denso), o erro padrão é de 0,81%: em 95% dos casos a estimativa
+# fica a menos de ~1,6% do valor exato. Para poucas centenas de valores, a
+# estimativa é praticamente exata (quase todos os registos estão a zero).
+PRECISAO = 14
+ERRO_PADRAO = 1.04 / math.sqrt(2 ** PRECISAO)
+_ALFA_INFINITO = 1 / (2 * math.log(2))
+
+
+# --- 2. Hash e Registos ---
+def hash64(valores):
+    """
+    Hash de 64 bits bem distribuído (finalizador do splitmix64) de inteiros.
+
+    Args:
+        valores (array-like): Valores inteiros (ex.: `paciente_id`).
+
+    Returns:
+        numpy.ndarray: Os hashes, em uint64.
+    """
+    x = np.asarray(valores).astype(np.uint64)
+    # A aritmética de uint64 dá a volta (módulo 2**64), como pretendido.
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _comprimento_bits(x):
+    """Número de bits significativos de cada uint64 (0 para o zero)."""
+    for deslocamento in (1, 2, 4, 8, 16, 32):
+        x = x | (x >> np.uint64(deslocamento))
+    return np.bitwise_count(x)
+
+
+def registos_e_ordens(valores, precisao=PRECISAO):
+    """
+    Calcula, para cada valor, o registo do esboço e a sua ordem.
+
+    O registo são os primeiros `precisao` bits do hash; a ordem é a posição
+    do primeiro bit a 1 nos restantes q = 64 - precisao bits (q + 1 se forem
+    todos zero).
+
+    Returns:
+        tuple: (registos em int64, ordens em uint8).
+    """
+    q = 64 - precisao
+    hashes = hash64(valores)
+    registos = (hashes >> np.uint64(q)).astype(np.int64)
+    resto = hashes & np.uint64((1 << q) - 1)
+    ordens = (q + 1 - _comprimento_bits(resto)).astype(np.uint8)
+    return registos, ordens
+
+
+# --- 3. Estimativa ---
+# Usamos o estimador melhorado de O. Ertl ("New cardinality estimation
+# algorithms for HyperLogLog sketches", 2017), que dispensa as tabelas
+# empíricas de correção de enviesamento do HyperLogLog++ e é não enviesado
+# em toda a gama, desde poucos valores até milhares de milhões.
+def _sigma(x):
+    if x == 1.0:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        anterior = z
+        z += x * y
+        y += y
+        if z == anterior:
+            return z
+
+
+def _tau(x):
+    if x in (0.0, 1.0):
+        return 0.0
+    y, z = 1.0, 1.0 - x
+    while True:
+        x = math.sqrt(x)
+        anterior = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == anterior:
+            return z / 3
+
+
+def estimar(registos, precisao=PRECISAO):
+    """
+    Estima o número de valores distintos a partir de um esboço denso.
+
+    Args:
+        registos (numpy.ndarray): Os 2**precisao registos (ordens máximas).
+        precisao (int): A precisão do esboço.
+
+    Returns:
+        float: A estimativa (0.0 para um esboço vazio).
+    """
+    m, q = 1 << precisao, 64 - precisao
+    c = np.bincount(registos, minlength=q + 2)
+    if c[0] == m:
+        return 0.0
+    z = m * _tau(1 - c[q + 1] / m)
+    for k in range(q, 0, -1):
+        z = 0.5 * (z + c[k])
+    z += m * _sigma(c[0] / m)
+    return _ALFA_INFINITO * m * m / z
+
+
+class HyperLogLog:
+    """Esboço HyperLogLog denso, para contar distintos num fluxo de valores."""
+
+    def __init__(self, precisao=PRECISAO, registos=None):
+        self.precisao = precisao
+        self.registos = registos if registos is not None else np.zeros(1 << precisao, dtype=np.uint8)
+
+    def adicionar(self, valores):
+        """Acrescenta valores inteiros ao esboço."""
+        registos, ordens = registos_e_ordens(valores, self.precisao)
+        np.maximum.at(self.registos, registos, ordens)
+        return self
+
+    def unir(self, outro):
+        """Devolve o esboço da união dos dois conjuntos de valores."""
+        return HyperLogLog(self.precisao, np.maximum(self.registos, outro.registos))
+
+    def estimar(self):
+        """Estimativa do número de valores distintos."""
+        return estimar(self.registos, self.precisao)
+
+
+# --- 4. Esboços por Célula de um Cubo ---
+# Um esboço denso por célula do cubo do hospital (cerca de 100 mil células)
+# ocuparia 1,6 GB. Guardamos por isso os esboços de forma esparsa: apenas os
+# registos não nulos de cada célula, como entradas (célula, registo, ordem)
+# ordenadas por célula. A união de uma seleção de células é um máximo por
+# registo sobre as entradas dessas células.
+#
+# Para os filtros mais comuns, sobre uma única dimensão (um convénio, um mês,
+# um setor...), guardamos ainda um esboço denso por valor de cada dimensão:
+# a união reduz-se então a um máximo sobre poucas linhas de 16 KB.
+class EsbocosPorCelula:
+    """
+    Esboços HyperLogLog esparsos de cada célula de um cubo denso.
+
+    Args:
+        celulas (numpy.ndarray): Índice plano da célula de cada valor.
+        valores (numpy.ndarray): Os valores a contar (ex.: `paciente_id`).
+        forma (tuple): A forma do cubo.
+        precisao (int): A precisão dos esboços.
+    """
+
+    def __init__(self, celulas, valores, forma, precisao=PRECISAO):
+        self.precisao = precisao
+        self.forma = tuple(forma)
+        m = 1 << precisao
+        registos, ordens = registos_e_ordens(valores, precisao)
+        # Uma entrada por (célula, registo), com a maior ordem: depois de
+        # ordenar por chave e ordem, a última entrada de cada chave.
+        chaves = np.asarray(celulas, dtype=np.int64) * m + registos
+        ordenacao = np.lexsort((ordens, chaves))
+        chaves, ordens = chaves[ordenacao], ordens[ordenacao]
+        ultimas = np.ones(len(chaves), dtype=bool)
+        ultimas[:-1] = chaves[1:] != chaves[:-1]
+        self._celulas = chaves[ultimas] // m
+        self._registos = (chaves[ultimas] % m).astype(np.int64)
+        self._ordens = ordens[ultimas]
+        # As entradas da célula c estão nas posições [inicio[c], inicio[c + 1]).
+        self._inicio = np.searchsorted(self._celulas, np.arange(int(np.prod(self.forma)) + 1))
+
+        # Esboços densos por valor de cada dimensão.
+        coordenadas = np.unravel_index(self._celulas, self.forma) if len(self._celulas) else [
+            np.zeros(0, dtype=np.intp) for _ in self.forma
+        ]
+        self._marginais = []
+        for eixo, codigos in enumerate(coordenadas):
+            densos = np.zeros(self.forma[eixo] * m, dtype=np.uint8)
+            np.maximum.at(densos, codigos * m + self._registos, self._ordens)
+            self._marginais.append(densos.reshape(self.forma[eixo], m))
+
+    def registos(self, indices, eixos_filtrados):
+        """
+        Esboço denso da união das células selecionadas.
+
+        Args:
+            indices (list): Para cada eixo, os índices selecionados.
+            eixos_filtrados (list): Os eixos efetivamente restringidos.
+
+        Returns:
+            numpy.ndarray: Os registos do esboço unido.
+        """
+        m = 1 << self.precisao
+        if len(eixos_filtrados) <= 1:
+            eixo = eixos_filtrados[0] if eixos_filtrados else 0
+            linhas = self._marginais[eixo][indices[eixo]]
+            return linhas.max(axis=0) if len(linhas) else np.zeros(m, dtype=np.uint8)
+        # Junta as entradas das células selecionadas (blocos contíguos).
+        celulas = np.ravel_multi_index(np.ix_(*indices), self.forma).ravel()
+        inicios, tamanhos = self._inicio[celulas], self._inicio[celulas + 1] - self._inicio[celulas]
+        deslocamentos = np.repeat(inicios - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+        selecionadas = np.arange(int(tamanhos.sum())) + deslocamentos
+        registos = np.zeros(m, dtype=np.uint8)
+        np.maximum.at(registos, self._registos[selecionadas], self._ordens[selecionadas])
+        return registos
+
+    def estimar(self, indices, eixos_filtrados):
+        """Estimativa do número de distintos nas células selecionadas."""
+        return estimar(self.registos(indices, eixos_filtrados), self.precisao)
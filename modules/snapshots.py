@@ -0,0 +1,285 @@
+# ==============================================================================
+# Arquivo: snapshots.py
+# Localização: /hospital_vida_plena_dashboard/modules/
+# Descrição: Snapshots pré-calculados dos KPIs e das séries das páginas. O
+#            script `scripts/gerar_snapshots.py` lê os datasets uma vez, em
+#            batch, e grava numa nova versão (uma pasta por versão) tabelas
+#            pequenas, agregadas por dia e por categoria. No modo snapshot
+#            (HVP_MOTOR_CONSULTAS=snapshot), as páginas são desenhadas só a
+#            partir dessas tabelas: o tempo de carregamento deixa de depender
+#            do tamanho dos datasets, e o servidor não precisa dos CSV.
+#
+#            Estrutura em disco:
+#                data/snapshots/ATUAL                 <- nome da versão servida
+#                data/snapshots/20250101T020000/
+#                    manifesto.json                   <- origens, períodos, KPIs
+#                    hospital_diario.parquet
+#                    ...
+# ==============================================================================
+import json
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# --- 1. Configuração ---
+# A versão servida é a indicada no ficheiro ATUAL, escrito no fim de cada
+# geração. A variável de ambiente HVP_SNAPSHOT fixa uma versão concreta (ex.:
+# para voltar à anterior sem gerar de novo).
+PASTA_SNAPSHOTS = 'data/snapshots'
+VARIAVEL_SNAPSHOT = 'HVP_SNAPSHOT'
+FICHEIRO_ATUAL = 'ATUAL'
+FICHEIRO_MANIFESTO = 'manifesto.json'
+VERSOES_MANTIDAS = 5
+
+# Versão do formato das tabelas, incrementada quando muda o seu conteúdo.
+VERSAO_FORMATO = 2
+_PADRAO_VERSAO = re.compile(r'^\d{8}T\d{6}(_\d+)?$')
+
+# As tabelas de um snapshot. Os valores monetários estão em centavos
+# inteiros, como nos motores de consulta, para que as somas de qualquer
+# seleção de linhas sejam exatas.
+TABELAS = {
+    # dia, convenio, count, centavos
+    'hospital_diario': 'Atendimentos e faturação por dia e convénio',
+    # dimensao, valor, count, centavos, pacientes_unicos
+    'hospital_dimensoes': 'Atendimentos e pacientes por setor e por tipo',
+    # dia, convenio, dimensao, valor, count
+    'hospital_dimensoes_diario': 'Atendimentos por dia, convénio e setor ou tipo',
+    # mes, convenio, registos (os 2**precisao bytes de um esboço HyperLogLog denso)
+    'hospital_pacientes': 'Esboços dos pacientes distintos por mês e convénio',
+    # dia, nome_fornecedor, categoria_item, count, atrasados, centavos
+    'supply_chain_diario': 'Pedidos, atrasos e custos por dia, fornecedor e categoria',
+    # departamento, total, saidas, soma_idade, soma_satisfacao, salario_centavos
+    'rh_departamentos': 'Totais de RH por departamento',
+    # departamento, motivo_saida, count
+    'rh_saidas': 'Saídas por departamento e motivo',
+    # coluna, departamento, classe, count
+    'rh_histogramas': 'Classes dos histogramas de RH por departamento',
+}
+
+
+# --- 2. Leitura ---
+class VisaoGeralSnapshot:
+    """
+    Os KPIs e as distribuições da visão geral, com os métodos do
+    `CuboHospital` que a página usa (apenas sem filtros).
+    """
+
+    def __init__(self, kpis, dimensoes):
+        self._kpis = kpis
+        self._dimensoes = dimensoes
+
+    def total_atendimentos(self):
+        return self._kpis['total_atendimentos']
+
+    def pacientes_unicos(self, exato=True):
+        """O número exato de pacientes distintos (calculado na geração)."""
+        return self._kpis['pacientes_unicos']
+
+    def faturacao_total(self):
+        return self._kpis['faturacao_centavos'] / 100
+
+    def ticket_medio(self):
+        total = self.total_atendimentos()
+        return self.faturacao_total() / total if total else float('nan')
+
+    def _linhas(self, dimensao):
+        linhas = self._dimensoes[self._dimensoes['dimensao'] == dimensao]
+        return linhas.rename(columns={'valor': dimensao}).reset_index(drop=True)
+
+    def por(self, dimensao):
+        """Colunas [dimensao, 'count', 'valor_total_atendimento'], como `CuboHospital.por`."""
+        linhas = self._linhas(dimensao)
+        return pd.DataFrame({
+            dimensao: linhas[dimensao].astype(object),
+            'count': linhas['count'],
+            'valor_total_atendimento': linhas['centavos'] / 100,
+        })
+
+    def pacientes_unicos_por(self, dimensao):
+        """Colunas [dimensao, 'pacientes_unicos'] (estimativas HyperLogLog do cubo)."""
+        return self._linhas(dimensao)[[dimensao, 'pacientes_unicos']]
+
+
+class Snapshot:
+    """
+    Uma versão de snapshot aberta: o manifesto e as tabelas, só de leitura.
+
+    Atributos:
+        versao (str): O nome da versão (a data da geração, ex.: '20250101T020000').
+        manifesto (dict): O conteúdo de manifesto.json.
+    """
+
+    def __init__(self, manifesto, tabelas):
+        self.versao = manifesto['versao']
+        self.manifesto = manifesto
+        self._tabelas = tabelas
+
+    def tabela(self, nome):
+        """Uma das `TABELAS` (o DataFrame partilhado: não o altere)."""
+        return self._tabelas[nome]
+
+    def origem(self, dataset):
+        """
+        Os dados de origem de um dataset ('hospital', 'supply_chain' ou 'rh').
+
+        Returns:
+            dict: {'caminho', 'impressao', 'linhas'} do ficheiro lido na geração.
+        """
+        return self.manifesto['origens'][dataset]
+
+    def periodo(self, dataset):
+        """Primeira e última data do dataset, como em `periodo_disponivel`."""
+        primeira, ultima = self.manifesto['periodos'][dataset]
+        if primeira is None:
+            return None, None
+        return pd.Timestamp(primeira), pd.Timestamp(ultima)
+
+    def visao_geral(self):
+        return VisaoGeralSnapshot(self.manifesto['visao_geral'], self._tabelas['hospital_dimensoes'])
+
+    def departamentos(self):
+        """Os departamentos de RH, pela ordem do índice de filtros."""
+        return list(self.manifesto['departamentos'])
+
+    def histograma(self, coluna, departamento=None):
+        """
+        As classes de um histograma de RH.
+
+        Args:
+            coluna (str): A coluna (ex.: 'idade').
+            departamento (str, optional): Por omissão, todos os departamentos.
+
+        Returns:
+            tuple: (arestas, contagens), em numpy.ndarray.
+        """
+        arestas = np.asarray(self.manifesto['arestas'][coluna], dtype=np.float64)
+        classes = self._tabelas['rh_histogramas']
+        classes = classes[classes['coluna'] == coluna]
+        if departamento is not None:
+            classes = classes[classes['departamento'] == departamento]
+        contagens = np.bincount(classes['classe'].to_numpy(dtype=np.int64), weights=classes['count'],
+                                minlength=len(arestas) - 1)
+        return arestas, contagens.astype(np.int64)
+
+
+def listar_versoes(pasta=PASTA_SNAPSHOTS):
+    """As versões gravadas em `pasta`, da mais antiga para a mais recente."""
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(nome for nome in os.listdir(pasta)
+                  if _PADRAO_VERSAO.match(nome) and os.path.isfile(os.path.join(pasta, nome, FICHEIRO_MANIFESTO)))
+
+
+def versao_atual(pasta=PASTA_SNAPSHOTS):
+    """
+    O nome da versão a servir (HVP_SNAPSHOT ou o ficheiro ATUAL).
+
+    Returns:
+        str: A versão, ou None se ainda não houver nenhum snapshot.
+    """
+    versao = os.environ.get(VARIAVEL_SNAPSHOT)
+    if versao:
+        return versao
+    try:
+        with open(os.path.join(pasta, FICHEIRO_ATUAL), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Uma versão nunca muda depois de gravada: o nome basta como chave da cache.
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _abrir_versao(pasta, versao):
+    """Lê o manifesto e as tabelas de uma versão."""
+    diretorio = os.path.join(pasta, versao)
+    with open(os.path.join(diretorio, FICHEIRO_MANIFESTO), encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('formato') != VERSAO_FORMATO:
+        raise ValueError(f"O snapshot '{versao}' tem o formato {manifesto.get('formato')}; "
+                         f"esperado {VERSAO_FORMATO}. Gere-o de novo com scripts/gerar_snapshots.py.")
+    tabelas = {nome: pd.read_parquet(os.path.join(diretorio, f'{nome}.parquet')) for nome in TABELAS}
+    return Snapshot(manifesto, tabelas)
+
+
+def carregar_snapshot(pasta=PASTA_SNAPSHOTS):
+    """
+    Abre a versão atual do snapshot.
+
+    Args:
+        pasta (str): A pasta dos snapshots.
+
+    Returns:
+        Snapshot: A versão atual. Levanta FileNotFoundError se não houver
+                  nenhum snapshot (ou se a versão indicada não existir).
+    """
+    versao = versao_atual(pasta)
+    if versao is None or not os.path.isfile(os.path.join(pasta, versao, FICHEIRO_MANIFESTO)):
+        raise FileNotFoundError(os.path.join(pasta, versao or FICHEIRO_ATUAL))
+    return _abrir_versao(pasta, versao)
+
+
+# --- 3. Escrita ---
+# Uma nova versão é gravada numa pasta temporária e só depois renomeada e
+# apontada pelo ficheiro ATUAL (`os.replace`, atómico): um servidor que leia
+# o snapshot durante a geração continua a ver a versão anterior, completa.
+def _nova_versao(pasta, data):
+    base = data.strftime('%Y%m%dT%H%M%S')
+    versao, n = base, 1
+    while os.path.exists(os.path.join(pasta, versao)):
+        versao, n = f'{base}_{n}', n + 1
+    return versao
+
+
+def gravar_snapshot(tabelas, manifesto, pasta=PASTA_SNAPSHOTS, manter=VERSOES_MANTIDAS):
+    """
+    Grava uma nova versão e torna-a a versão atual.
+
+    Args:
+        tabelas (dict): {nome: DataFrame}, com todas as `TABELAS`.
+        manifesto (dict): Os restantes dados (origens, períodos, KPIs...).
+        pasta (str): A pasta dos snapshots.
+        manter (int): Quantas versões guardar; as mais antigas são apagadas.
+
+    Returns:
+        str: O nome da nova versão.
+    """
+    em_falta = set(TABELAS) - set(tabelas)
+    if em_falta:
+        raise ValueError(f"Faltam tabelas no snapshot: {sorted(em_falta)}")
+    os.makedirs(pasta, exist_ok=True)
+    data = pd.Timestamp.now()
+    versao = _nova_versao(pasta, data)
+    temporaria = os.path.join(pasta, f'.{versao}.tmp')
+    os.makedirs(temporaria)
+    try:
+        for nome in TABELAS:
+            tabelas[nome].to_parquet(os.path.join(temporaria, f'{nome}.parquet'), index=False)
+        manifesto = {'versao': versao, 'formato': VERSAO_FORMATO,
+                     'gerado_em': data.isoformat(timespec='seconds'), **manifesto}
+        with open(os.path.join(temporaria, FICHEIRO_MANIFESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        os.rename(temporaria, os.path.join(pasta, versao))
+    except BaseException:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+
+    ponteiro = os.path.join(pasta, f'.{FICHEIRO_ATUAL}.tmp')
+    with open(ponteiro, 'w', encoding='utf-8') as f:
+        f.write(versao + '\n')
+    os.replace(ponteiro, os.path.join(pasta, FICHEIRO_ATUAL))
+    limpar_versoes(pasta, manter)
+    return versao
+
+
+def limpar_versoes(pasta=PASTA_SNAPSHOTS, manter=VERSOES_MANTIDAS):
+    """Apaga as versões mais antigas, mantendo as `manter` mais recentes e a atual."""
+    atual = versao_atual(pasta)
+    versoes = listar_versoes(pasta)
+    apagadas = [v for v in versoes[:max(0, len(versoes) - manter)] if v != atual]
+    for versao in apagadas:
+        shutil.rmtree(os.path.join(pasta, versao), ignore_errors=True)
+    return apagadas
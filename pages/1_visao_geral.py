@@ -7,8 +7,13 @@
 # ==============================================================================
 import streamlit as st
 import pandas as pd
-from modules.data_loader import carregar_dados
-from modules.plotting import plotar_donut_chart
+from modules.aquecimento import iniciar_aquecimento
+from modules.instrumentacao import exibir_grafico, iniciar_pagina, terminar_pagina
+from modules.query_backend import modo_snapshot
+from modules.rollup import carregar_cubo_hospital
+from modules.plotting import plotar_donut_chart, plotar_bar_chart_horizontal
+from modules.sketches import ERRO_PADRAO
+from modules.snapshots import carregar_snapshot
 from modules.style import CSS_STYLE
 
 # --- 1. Configuração Inicial da Página ---
@@ -18,27 +23,41 @@ st.set_page_config(layout="wide", page_title="Visão Geral | Hospital Vida Plena
 # Aplica o nosso estilo CSS customizado para garantir a consistência visual.
 st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
+# Mede os tempos desta execução (ver modules/instrumentacao.py).
+iniciar_pagina('visao_geral')
+# Quem entra diretamente nesta página também lança o aquecimento dos outros datasets.
+iniciar_aquecimento()
+
 # --- 2. Carregamento dos Dados ---
-# Chama a nossa função centralizada do módulo data_loader para carregar os dados.
-# O resultado fica guardado em cache para alta performance.
-df = carregar_dados('data/hospital_vida_plena_dataset_500k.csv')
+# Em vez do DataFrame com 500 mil linhas, esta página lê apenas o cubo de
+# agregados do módulo rollup, construído uma única vez por versão do dataset.
+# Todos os KPIs e gráficos abaixo são consultas a esse cubo. No modo snapshot,
+# os mesmos valores vêm do snapshot pré-calculado (modules/snapshots.py).
+if modo_snapshot():
+    try:
+        cubo = carregar_snapshot().visao_geral()
+    except FileNotFoundError:
+        cubo = None
+else:
+    cubo = carregar_cubo_hospital('data/hospital_vida_plena_dataset_500k.csv')
 
 # --- 3. Título da Página ---
 st.title("Visão Geral da Operação")
 
 # --- 4. Renderização do Conteúdo ---
-# BOA PRÁTICA: Verifica se o DataFrame foi carregado com sucesso antes de
-# tentar renderizar qualquer componente que dependa dele. Isto evita erros
+# BOA PRÁTICA: Verifica se os dados foram carregados com sucesso antes de
+# tentar renderizar qualquer componente que dependa deles. Isto evita erros
 # caso o ficheiro de dados não seja encontrado.
-if df is not None:
+if cubo is not None:
     # --- 4.1. Cálculo e Exibição dos KPIs ---
     st.subheader("Indicadores-Chave de Performance (KPIs)")
 
-    # Realiza os cálculos necessários para os KPIs.
-    total_atendimentos = len(df)
-    total_pacientes_unicos = df['paciente_id'].nunique()
-    faturacao_total = df['valor_total_atendimento'].sum()
-    ticket_medio = df['valor_total_atendimento'].mean()
+    # Obtém os KPIs a partir do cubo (somas já acumuladas em centavos). O total
+    # de pacientes únicos é exato; é calculado uma vez por versão do cubo.
+    total_atendimentos = cubo.total_atendimentos()
+    total_pacientes_unicos = cubo.pacientes_unicos(exato=True)
+    faturacao_total = cubo.faturacao_total()
+    ticket_medio = cubo.ticket_medio()
 
     # Utiliza st.columns para criar uma grelha e organizar os KPIs em cartões.
     col1, col2, col3, col4 = st.columns(4)
@@ -55,21 +74,36 @@ if df is not None:
 
     with col_graf1:
         # Prepara os dados para o gráfico: conta o número de atendimentos por setor.
-        atendimentos_por_setor = df['setor_atendimento'].value_counts().reset_index()
+        atendimentos_por_setor = cubo.por('setor_atendimento')
         # Chama a nossa função de plotagem reutilizável do módulo plotting.
         fig_setor = plotar_donut_chart(atendimentos_por_setor, 'setor_atendimento', 'count', "Atendimentos por Setor")
         # Exibe o gráfico na aplicação.
-        st.plotly_chart(fig_setor, use_container_width=True)
+        exibir_grafico(fig_setor, use_container_width=True)
 
     with col_graf2:
         # Prepara os dados para o gráfico: conta o número de atendimentos por tipo.
-        atendimentos_por_tipo = df['tipo_atendimento'].value_counts().reset_index()
+        atendimentos_por_tipo = cubo.por('tipo_atendimento')
         # Chama a nossa função de plotagem reutilizável.
         fig_tipo = plotar_donut_chart(atendimentos_por_tipo, 'tipo_atendimento', 'count', "Distribuição por Tipo de Atendimento")
         # Exibe o gráfico na aplicação.
-        st.plotly_chart(fig_tipo, use_container_width=True)
+        exibir_grafico(fig_tipo, use_container_width=True)
+
+    # --- 4.3. Pacientes Únicos por Setor ---
+    # Contagens por setor estimadas com os esboços HyperLogLog do cubo: cada
+    # barra é uma união de esboços (microssegundos), e não uma contagem de
+    # distintos sobre as linhas de atendimento.
+    pacientes_por_setor = cubo.pacientes_unicos_por('setor_atendimento').sort_values('pacientes_unicos')
+    fig_pacientes = plotar_bar_chart_horizontal(
+        pacientes_por_setor, 'pacientes_unicos', 'setor_atendimento', "Pacientes Únicos por Setor"
+    )
+    exibir_grafico(fig_pacientes, use_container_width=True)
+    erro = f"{ERRO_PADRAO:.1%}".replace('.', ',')
+    st.caption(f"Valores estimados (HyperLogLog), com um erro padrão de cerca de {erro}.")
 
 else:
     # Mensagem exibida caso o carregamento de dados falhe.
     st.error("Não foi possível carregar os dados para exibir esta página.")
 
+# --- 5. Perfil de Desempenho ---
+# Regista a execução e, se ativado na barra lateral, mostra o seu perfil.
+terminar_pagina()
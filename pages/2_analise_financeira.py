@@ -7,8 +7,11 @@
 # ==============================================================================
 import streamlit as st
 import pandas as pd
-from modules.data_loader import carregar_dados
-from modules.plotting import plotar_bar_chart_horizontal
+from modules.aquecimento import iniciar_aquecimento
+from modules.exportacao import secao_exportacao
+from modules.instrumentacao import exibir_grafico, iniciar_pagina, medir_fragmento, terminar_pagina
+from modules.query_backend import consultar, modo_snapshot
+from modules.plotting import ORCAMENTO_PONTOS, plotar_bar_chart_horizontal, plotar_timeseries_chart
 from modules.style import CSS_STYLE
 
 # --- 1. Configuração Inicial da Página ---
@@ -18,53 +21,69 @@ st.set_page_config(layout="wide", page_title="Análise Financeira | Hospital Vid
 # Aplica o nosso estilo CSS customizado para garantir a consistência visual.
 st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
-# --- 2. Carregamento dos Dados ---
-# Chama a nossa função centralizada do módulo data_loader para carregar os dados.
-df = carregar_dados('data/hospital_vida_plena_dataset_500k.csv')
+# Mede os tempos desta execução (ver modules/instrumentacao.py).
+iniciar_pagina('analise_financeira')
+# Quem entra diretamente nesta página também lança o aquecimento dos outros datasets.
+iniciar_aquecimento()
 
-# --- 3. Título da Página ---
-st.title("Análise Financeira Detalhada")
+# --- 2. Carregamento dos Dados ---
+# As agregações são pedidas ao motor de consultas configurado (ver
+# modules/query_backend.py). O filtro de datas desce até ao dia, pelo que a
+# página consulta os atendimentos (ordenados por data) em vez do cubo mensal:
+# um período é uma fatia contígua encontrada por pesquisa binária, e os
+# convénios são combinados com o índice de bitmaps. Os resultados ficam em
+# cache por combinação de filtros (ver `consultar`).
+CAMINHO_DADOS = 'data/hospital_vida_plena_dataset_500k.csv'
+try:
+    primeira_data, ultima_data = consultar('periodo_disponivel', CAMINHO_DADOS, dataset='hospital')
+    # Os convénios disponíveis são os que aparecem no dataset completo.
+    convenios_disponiveis = consultar('faturacao_por_convenio', CAMINHO_DADOS)['convenio'].tolist()
+    dados_disponiveis = True
+except FileNotFoundError:
+    st.error(f"Erro Crítico: O ficheiro de dados não foi encontrado em '{CAMINHO_DADOS}'.")
+    dados_disponiveis = False
 
-# --- 4. Renderização do Conteúdo ---
-# Verifica se o DataFrame foi carregado com sucesso.
-if df is not None:
-    # --- 4.1. Filtros Interativos ---
+# --- 3. Secção Filtrada por Convénio ---
+# Os KPIs e o gráfico vivem num fragmento: mudar a seleção de convénios volta
+# a executar (e a enviar ao browser) apenas esta secção. O período vem da
+# barra lateral, fora do fragmento, e é recebido como argumento.
+@st.fragment
+@medir_fragmento
+def secao_convenios(inicio, fim):
     st.subheader("Filtros de Análise")
 
     # Cria um filtro multiselect para que o utilizador possa escolher um ou mais convénios.
-    # `unique()` pega todos os valores únicos da coluna 'convenio'.
     # `default` define quais opções vêm pré-selecionadas.
     convenios_selecionados = st.multiselect(
         "Selecione os Convénios para Análise",
-        options=df['convenio'].unique(),
-        default=df['convenio'].unique()
+        options=convenios_disponiveis,
+        default=convenios_disponiveis
     )
 
-    # Aplica o filtro ao DataFrame. Apenas as linhas cujo 'convenio' está na
-    # lista de `convenios_selecionados` serão mantidas.
-    df_filtrado = df[df['convenio'].isin(convenios_selecionados)]
-
     st.markdown("---")
 
-    # --- 4.2. KPIs Financeiros Dinâmicos ---
+    # --- 3.1. KPIs Financeiros Dinâmicos ---
     # Os KPIs agora são calculados com base nos dados filtrados, tornando-os dinâmicos.
     st.subheader("KPIs Financeiros (Baseado na Seleção)")
+    kpis = consultar('kpis_hospital', CAMINHO_DADOS, convenios=convenios_selecionados, inicio=inicio, fim=fim)
+
+    # Programação defensiva: verifica se a seleção contém atendimentos.
+    if kpis['total_atendimentos'] > 0:
+        faturacao_filtrada = kpis['faturacao_total']
+        ticket_medio = kpis['ticket_medio']
 
-    # Programação defensiva: verifica se o dataframe filtrado não está vazio.
-    if not df_filtrado.empty:
-        faturacao_filtrada = df_filtrado['valor_total_atendimento'].sum()
-        ticket_medio = df_filtrado['valor_total_atendimento'].mean()
-        
         col1, col2 = st.columns(2)
         col1.metric("Faturação (Seleção)", f"R$ {faturacao_filtrada:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
         col2.metric("Ticket Médio (Seleção)", f"R$ {ticket_medio:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
 
         st.markdown("---")
 
-        # --- 4.3. Gráficos Financeiros ---
+        # --- 3.2. Gráficos Financeiros ---
         # Prepara os dados para o gráfico: agrupa por convénio e soma a faturação.
-        faturacao_por_convenio = df_filtrado.groupby('convenio')['valor_total_atendimento'].sum().sort_values().reset_index()
-        
+        faturacao_por_convenio = consultar(
+            'faturacao_por_convenio', CAMINHO_DADOS, convenios=convenios_selecionados, inicio=inicio, fim=fim
+        ).sort_values('valor_total_atendimento')
+
         # Chama a nossa função de plotagem reutilizável.
         fig_convenio = plotar_bar_chart_horizontal(
             faturacao_por_convenio,
@@ -74,12 +93,105 @@ if df is not None:
         )
         # Formata os valores no gráfico para o formato de moeda (R$).
         fig_convenio.update_traces(texttemplate='R$ %{x:,.2f}')
-        st.plotly_chart(fig_convenio, use_container_width=True)
+        exibir_grafico(fig_convenio, use_container_width=True)
+
+        # Evolução temporal da mesma seleção (ver secção 3.3).
+        secao_evolucao(convenios_selecionados, inicio, fim)
+
+        # Os atendimentos da seleção, para descarregar (não há linhas no modo snapshot).
+        if not modo_snapshot():
+            secao_exportacao('hospital', CAMINHO_DADOS, {'convenio': convenios_selecionados}, inicio, fim,
+                             nome='atendimentos_filtrados', chave='exportacao_atendimentos')
 
     else:
         # Mensagem exibida se a seleção de filtros não retornar nenhum dado.
         st.warning("Nenhum dado encontrado para os filtros selecionados. Por favor, ajuste a sua seleção.")
 
+
+# --- 3.3. Evolução Temporal com Ampliação ---
+# A série é desenhada reduzida (LTTB) e em WebGL. Para ver mais detalhe, o
+# utilizador seleciona um intervalo com o rato (seleção em caixa): a série é
+# pedida de novo, apenas para esse intervalo e, abaixo de
+# `DIAS_SERIE_HORARIA` dias, por hora em vez de por dia (no modo snapshot,
+# que só guarda a série diária, a série é sempre diária). O Streamlit não
+# comunica ao servidor o zoom nativo do Plotly, apenas as seleções.
+DIAS_SERIE_HORARIA = 90
+CHAVE_VISTA = 'vista_serie_faturacao'
+
+
+def secao_evolucao(convenios_selecionados, inicio, fim):
+    limite_inicio = inicio if inicio is not None else primeira_data.normalize()
+    limite_fim = fim if fim is not None else ultima_data.normalize() + pd.Timedelta(days=1)
+
+    # A vista guarda o intervalo ampliado e um contador que muda a chave do
+    # gráfico a cada ampliação (um gráfico novo começa sem seleção).
+    vista = st.session_state.setdefault(CHAVE_VISTA, {'nivel': 0, 'intervalo': None})
+    chave_grafico = f"serie_faturacao_{vista['nivel']}"
+    estado = st.session_state.get(chave_grafico)
+    caixas = estado['selection']['box'] if estado else []
+    if caixas:
+        x0, x1 = sorted(pd.Timestamp(x) for x in caixas[0]['x'])
+        vista['intervalo'], vista['nivel'] = (x0, x1), vista['nivel'] + 1
+    col_titulo, col_repor = st.columns([4, 1])
+    if col_repor.button("Repor vista", disabled=vista['intervalo'] is None):
+        vista['intervalo'], vista['nivel'] = None, vista['nivel'] + 1
+
+    # A vista ampliada é limitada ao período escolhido na barra lateral.
+    vista_inicio, vista_fim = limite_inicio, limite_fim
+    if vista['intervalo'] is not None:
+        vista_inicio = max(vista['intervalo'][0], limite_inicio)
+        vista_fim = min(vista['intervalo'][1], limite_fim)
+        if vista_inicio >= vista_fim:
+            vista['intervalo'], vista_inicio, vista_fim = None, limite_inicio, limite_fim
+
+    horaria = vista_fim - vista_inicio <= pd.Timedelta(days=DIAS_SERIE_HORARIA) and not modo_snapshot()
+    frequencia = 'h' if horaria else 'D'
+    serie = consultar('serie_hospital', CAMINHO_DADOS, frequencia=frequencia, convenios=convenios_selecionados,
+                      inicio=vista_inicio, fim=vista_fim)
+    col_titulo.caption(
+        f"Faturação {'por hora' if frequencia == 'h' else 'diária'} de "
+        f"{vista_inicio:%d/%m/%Y} a {(vista_fim - pd.Timedelta(seconds=1)):%d/%m/%Y}. "
+        "Selecione um intervalo no gráfico para ver mais detalhe."
+    )
+    fig_serie = plotar_timeseries_chart(
+        serie, 'data_atendimento', 'valor_total_atendimento', "Evolução Temporal da Faturação",
+        max_pontos=ORCAMENTO_PONTOS
+    )
+    fig_serie.update_layout(dragmode='select', selectdirection='h')
+    exibir_grafico(fig_serie, use_container_width=True, key=f"serie_faturacao_{vista['nivel']}",
+                    on_select='rerun', selection_mode='box')
+
+
+# --- 4. Título da Página ---
+st.title("Análise Financeira Detalhada")
+
+# --- 5. Renderização do Conteúdo ---
+# Verifica se os dados foram carregados com sucesso.
+if dados_disponiveis and primeira_data is not None:
+    # --- 5.1. Período de Análise ---
+    # Período de análise na barra lateral. O `date_input` devolve as datas
+    # inclusivas; o motor usa [inicio, fim), por isso o fim é o dia seguinte.
+    periodo = st.sidebar.date_input(
+        "Período de Atendimento",
+        value=(primeira_data.date(), ultima_data.date()),
+        min_value=primeira_data.date(),
+        max_value=ultima_data.date()
+    )
+    # Enquanto o utilizador escolhe o intervalo, só a data inicial existe.
+    if isinstance(periodo, (tuple, list)) and len(periodo) == 2:
+        inicio, fim = pd.Timestamp(periodo[0]), pd.Timestamp(periodo[1]) + pd.Timedelta(days=1)
+    else:
+        inicio, fim = None, None
+
+    secao_convenios(inicio, fim)
+
+elif dados_disponiveis:
+    st.warning("O dataset de atendimentos está vazio.")
+
 else:
     # Mensagem exibida caso o carregamento de dados inicial falhe.
     st.error("Não foi possível carregar os dados para exibir esta página.")
+
+# --- 6. Perfil de Desempenho ---
+# Regista a execução e, se ativado na barra lateral, mostra o seu perfil.
+terminar_pagina()
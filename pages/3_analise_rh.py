@@ -6,43 +6,90 @@
 # ==============================================================================
 import streamlit as st
 import pandas as pd
-from modules.data_loader import carregar_dados_rh
-from modules.plotting import plotar_bar_chart_horizontal, plotar_donut_chart, plotar_histograma
+from modules.filter_index import carregar_indice
+from modules.aquecimento import iniciar_aquecimento
+from modules.exportacao import secao_exportacao
+from modules.instrumentacao import exibir_grafico, iniciar_pagina, medir, medir_fragmento, terminar_pagina
+from modules.query_backend import consultar, modo_snapshot
+from modules.plotting import (
+    plotar_bar_chart_horizontal, plotar_donut_chart, plotar_histograma, plotar_histograma_classes, calcular_arestas
+)
+from modules.snapshots import carregar_snapshot
 from modules.style import CSS_STYLE
 
 # --- Configuração da Página ---
 st.set_page_config(layout="wide", page_title="People Analytics | Hospital Vida Plena")
 st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
+# Mede os tempos desta execução (ver modules/instrumentacao.py).
+iniciar_pagina('analise_rh')
+# Quem entra diretamente nesta página também lança o aquecimento dos outros datasets.
+iniciar_aquecimento()
+
 # --- Carregamento dos Dados ---
-df_rh = carregar_dados_rh('data/people_analytics_dataset.csv')
+# Os KPIs e os agregados são pedidos ao motor de consultas configurado
+# (pandas ou DuckDB, ver modules/query_backend.py) através de `consultar`,
+# que os guarda em cache com os filtros de que cada um depende. Os
+# histogramas ainda precisam das colunas individuais, lidas através do índice
+# de filtros (modules/filter_index.py): o filtro por departamento seleciona
+# posições, sem copiar o DataFrame. No modo snapshot, os departamentos e as
+# classes dos histogramas vêm já contados do snapshot (modules/snapshots.py).
+CAMINHO_DADOS = 'data/people_analytics_dataset.csv'
+COLUNAS_HISTOGRAMAS = ['idade', 'avaliacao_desempenho_anual']
+indice_rh = snapshot_rh = None
+if modo_snapshot():
+    try:
+        snapshot_rh = carregar_snapshot()
+        departamentos = snapshot_rh.departamentos()
+    except FileNotFoundError:
+        snapshot_rh = None
+else:
+    indice_rh = carregar_indice('rh', CAMINHO_DADOS)
+    departamentos = indice_rh.valores('departamento') if indice_rh is not None else []
+dados_disponiveis = indice_rh is not None or snapshot_rh is not None
 
-st.title("Análise de Capital Humano (People Analytics)")
 
-if df_rh is not None:
-    # --- Filtros na Barra Lateral ---
-    st.sidebar.header("Filtros de RH")
-    departamento_selecionado = st.sidebar.selectbox(
+def figura_histograma(coluna, titulo, departamento, dados_histogramas):
+    """Histograma de `coluna`, a partir do snapshot ou dos dados do índice."""
+    if snapshot_rh is not None:
+        arestas, contagens = snapshot_rh.histograma(coluna, departamento)
+        return plotar_histograma_classes(arestas, contagens, coluna, titulo)
+    return plotar_histograma(dados_histogramas, coluna, titulo, arestas=indice_rh.arestas(coluna, calcular_arestas))
+
+
+# --- Secção Filtrada por Departamento ---
+# Tudo o que depende do departamento vive num fragmento: ao mudar a seleção,
+# o Streamlit volta a executar (e a enviar ao browser) apenas esta secção, e
+# não o resto da página. Por isso o filtro fica dentro do fragmento, e não na
+# barra lateral (um fragmento não pode desenhar widgets fora do seu corpo).
+@st.fragment
+@medir_fragmento
+def secao_departamento():
+    departamento_selecionado = st.selectbox(
         "Filtrar por Departamento",
-        options=['Todos'] + list(df_rh['departamento'].unique()),
+        options=['Todos'] + departamentos,
         index=0
     )
 
-    df_filtrado = df_rh.copy()
-    if departamento_selecionado != 'Todos':
-        df_filtrado = df_rh[df_rh['departamento'] == departamento_selecionado]
+    departamento = None if departamento_selecionado == 'Todos' else departamento_selecionado
+    filtros = None if departamento is None else {'departamento': [departamento]}
+    # Apenas as duas colunas dos histogramas, nas linhas selecionadas. As
+    # classes são contadas no servidor, com arestas fixas por coluna.
+    dados_histogramas = None
+    if indice_rh is not None:
+        with medir('agregacao', 'colunas_histogramas'):
+            dados_histogramas = {coluna: indice_rh.coluna(coluna, filtros) for coluna in COLUNAS_HISTOGRAMAS}
 
     # --- KPIs de RH ---
     st.subheader("KPIs de Recursos Humanos")
-    
-    total_funcionarios = len(df_filtrado)
-    funcionarios_ativos = df_filtrado[df_filtrado['data_termino'].isnull()]
-    total_saidas = df_filtrado[df_filtrado['data_termino'].notnull()]
-    
+
+    kpis = consultar('kpis_rh', CAMINHO_DADOS, departamento=departamento)
+    total_funcionarios = kpis['total_funcionarios']
+
     # Cálculo de Turnover Anualizado (simplificado)
-    turnover_rate = (len(total_saidas) / total_funcionarios) * 100 if total_funcionarios > 0 else 0
-    idade_media = df_filtrado['idade'].mean()
-    satisfacao_media = df_filtrado['satisfacao_trabalho'].mean()
+    turnover_rate = kpis['turnover_rate']
+    idade_media = kpis['idade_media']
+    satisfacao_media = kpis['satisfacao_media']
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total de Funcionários (Seleção)", f"{total_funcionarios}")
@@ -56,35 +103,49 @@ if df_rh is not None:
     col_graf1, col_graf2 = st.columns(2)
     with col_graf1:
         # Gráfico de Turnover por Motivo
-        if not total_saidas.empty:
-            turnover_por_motivo = total_saidas['motivo_saida'].value_counts().reset_index()
+        turnover_por_motivo = consultar('saidas_por_motivo', CAMINHO_DADOS, departamento=departamento)
+        if not turnover_por_motivo.empty:
+            turnover_por_motivo = turnover_por_motivo.sort_values('count', ascending=False, kind='stable')
             fig_motivo = plotar_donut_chart(turnover_por_motivo, 'motivo_saida', 'count', "Principais Motivos de Saída")
-            st.plotly_chart(fig_motivo, use_container_width=True)
+            exibir_grafico(fig_motivo, use_container_width=True)
         else:
             st.info("Não há dados de saída para a seleção atual.")
 
     with col_graf2:
         # Gráfico de Distribuição de Idade
-        fig_idade = plotar_histograma(df_filtrado, 'idade', "Distribuição de Idade dos Funcionários")
-        st.plotly_chart(fig_idade, use_container_width=True)
-        
+        fig_idade = figura_histograma('idade', "Distribuição de Idade dos Funcionários",
+                                      departamento, dados_histogramas)
+        exibir_grafico(fig_idade, use_container_width=True)
+
+    # Gráfico de Distribuição da Avaliação de Desempenho
+    fig_performance = figura_histograma('avaliacao_desempenho_anual', "Distribuição da Avaliação de Desempenho",
+                                        departamento, dados_histogramas)
+    exibir_grafico(fig_performance, use_container_width=True)
+
+    # Os funcionários da seleção, para descarregar (não há linhas no modo snapshot).
+    if indice_rh is not None:
+        secao_exportacao('rh', CAMINHO_DADOS, filtros, nome='funcionarios_filtrados', chave='exportacao_rh')
+
+
+st.title("Análise de Capital Humano (People Analytics)")
+
+if dados_disponiveis:
+    secao_departamento()
+
     st.markdown("---")
 
-    # --- Análise de Performance e Salário ---
-    st.subheader("Análise de Performance e Remuneração")
-    
-    col_graf3, col_graf4 = st.columns(2)
-    with col_graf3:
-        # Gráfico de Salário por Departamento
-        salario_por_depto = df_rh.groupby('departamento')['salario_mensal'].mean().sort_values().reset_index()
-        fig_salario = plotar_bar_chart_horizontal(salario_por_depto, 'salario_mensal', 'departamento', "Salário Médio por Departamento")
-        fig_salario.update_traces(texttemplate='R$ %{x:,.2f}')
-        st.plotly_chart(fig_salario, use_container_width=True)
-        
-    with col_graf4:
-        # Gráfico de Distribuição da Avaliação de Desempenho
-        fig_performance = plotar_histograma(df_filtrado, 'avaliacao_desempenho_anual', "Distribuição da Avaliação de Desempenho")
-        st.plotly_chart(fig_performance, use_container_width=True)
+    # --- Análise de Remuneração ---
+    # O salário médio por departamento não depende do filtro: fica fora do
+    # fragmento e não é recalculado nem reenviado quando a seleção muda.
+    st.subheader("Análise de Remuneração")
+    salario_por_depto = consultar('salario_medio_por_departamento', CAMINHO_DADOS).sort_values('salario_mensal')
+    fig_salario = plotar_bar_chart_horizontal(salario_por_depto, 'salario_mensal', 'departamento', "Salário Médio por Departamento")
+    fig_salario.update_traces(texttemplate='R$ %{x:,.2f}')
+    exibir_grafico(fig_salario, use_container_width=True)
 
 else:
     st.error("Não foi possível carregar os dados de People Analytics para exibir esta página.")
+
+# --- Perfil de Desempenho ---
+# Regista a execução e, se ativado na barra lateral, mostra o seu perfil.
+terminar_pagina()
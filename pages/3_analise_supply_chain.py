@@ -6,7 +6,9 @@
 # ==============================================================================
 import streamlit as st
 import pandas as pd
-from modules.data_loader import carregar_dados_supply_chain
+from modules.aquecimento import iniciar_aquecimento
+from modules.instrumentacao import exibir_grafico, iniciar_pagina, terminar_pagina
+from modules.query_backend import consultar
 from modules.plotting import plotar_bar_chart_horizontal, plotar_timeseries_chart
 from modules.style import CSS_STYLE
 
@@ -14,18 +16,47 @@ from modules.style import CSS_STYLE
 st.set_page_config(layout="wide", page_title="Supply Chain | Hospital Vida Plena")
 st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
+# Mede os tempos desta execução (ver modules/instrumentacao.py).
+iniciar_pagina('analise_supply_chain')
+# Quem entra diretamente nesta página também lança o aquecimento dos outros datasets.
+iniciar_aquecimento()
+
 # --- Carregamento dos Dados ---
-df_supply = carregar_dados_supply_chain('data/hospital_supply_chain_dataset.csv')
+# As agregações são pedidas ao motor de consultas configurado (pandas ou
+# DuckDB, ver modules/query_backend.py); a página recebe apenas os resultados,
+# guardados em cache por período (ver `consultar`).
+CAMINHO_DADOS = 'data/hospital_supply_chain_dataset.csv'
+try:
+    primeira_data, ultima_data = consultar('periodo_disponivel', CAMINHO_DADOS, dataset='supply_chain')
+except FileNotFoundError:
+    st.error(f"Erro: O ficheiro de supply chain não foi encontrado em '{CAMINHO_DADOS}'.")
+    primeira_data = ultima_data = None
+
+# --- Filtro de Período ---
+# Os pedidos estão ordenados por `data_pedido`: o período escolhido é servido
+# como uma fatia contígua, sem filtrar as linhas uma a uma. O `date_input`
+# devolve datas inclusivas; o motor usa [inicio, fim).
+inicio = fim = None
+if primeira_data is not None:
+    periodo = st.sidebar.date_input(
+        "Período dos Pedidos",
+        value=(primeira_data.date(), ultima_data.date()),
+        min_value=primeira_data.date(),
+        max_value=ultima_data.date()
+    )
+    # Enquanto o utilizador escolhe o intervalo, só a data inicial existe.
+    if isinstance(periodo, (tuple, list)) and len(periodo) == 2:
+        inicio, fim = pd.Timestamp(periodo[0]), pd.Timestamp(periodo[1]) + pd.Timedelta(days=1)
+kpis = consultar('kpis_supply_chain', CAMINHO_DADOS, inicio=inicio, fim=fim) if primeira_data is not None else None
 
 st.title("Análise da Cadeia de Suprimentos (Supply Chain)")
 
-if df_supply is not None:
+if kpis is not None:
     # --- KPIs ---
     st.subheader("KPIs de Compras e Logística")
-    custo_total = df_supply['custo_total_pedido'].sum()
-    pedidos_atrasados = df_supply[df_supply['status_entrega'] == 'Atrasado'].shape[0]
-    total_pedidos = len(df_supply)
-    taxa_atraso = (pedidos_atrasados / total_pedidos) * 100 if total_pedidos > 0 else 0
+    custo_total = kpis['custo_total']
+    pedidos_atrasados = kpis['pedidos_atrasados']
+    taxa_atraso = kpis['taxa_atraso']
     
     col1, col2, col3 = st.columns(3)
     col1.metric("Custo Total de Aquisições", f"R$ {custo_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
@@ -38,7 +69,7 @@ if df_supply is not None:
     col_graf1, col_graf2 = st.columns(2)
     with col_graf1:
         # Custo por Fornecedor
-        custo_por_fornecedor = df_supply.groupby('nome_fornecedor')['custo_total_pedido'].sum().sort_values().reset_index()
+        custo_por_fornecedor = consultar('custo_por', CAMINHO_DADOS, dimensao='nome_fornecedor', inicio=inicio, fim=fim).sort_values('custo_total_pedido')
         fig_fornecedor = plotar_bar_chart_horizontal(
             custo_por_fornecedor,
             'custo_total_pedido',
@@ -46,11 +77,11 @@ if df_supply is not None:
             "Custo Total por Fornecedor"
         )
         fig_fornecedor.update_traces(texttemplate='R$ %{x:,.2f}')
-        st.plotly_chart(fig_fornecedor, use_container_width=True)
+        exibir_grafico(fig_fornecedor, use_container_width=True)
 
     with col_graf2:
         # Custo por Categoria de Item
-        custo_por_categoria = df_supply.groupby('categoria_item')['custo_total_pedido'].sum().sort_values().reset_index()
+        custo_por_categoria = consultar('custo_por', CAMINHO_DADOS, dimensao='categoria_item', inicio=inicio, fim=fim).sort_values('custo_total_pedido')
         fig_categoria = plotar_bar_chart_horizontal(
             custo_por_categoria,
             'custo_total_pedido',
@@ -58,17 +89,21 @@ if df_supply is not None:
             "Custo Total por Categoria de Item"
         )
         fig_categoria.update_traces(texttemplate='R$ %{x:,.2f}')
-        st.plotly_chart(fig_categoria, use_container_width=True)
+        exibir_grafico(fig_categoria, use_container_width=True)
     
     st.markdown("---")
     
     # Análise Temporal de Custos
     st.subheader("Análise Temporal de Custos de Aquisição")
-    custos_mensais = df_supply.set_index('data_pedido').resample('M')['custo_total_pedido'].sum().reset_index()
+    custos_mensais = consultar('custos_mensais', CAMINHO_DADOS, inicio=inicio, fim=fim)
     fig_temporal = plotar_timeseries_chart(
         custos_mensais,
         'data_pedido',
         'custo_total_pedido',
         "Evolução Mensal dos Custos de Aquisição"
     )
-    st.plotly_chart(fig_temporal, use_container_width=True)
+    exibir_grafico(fig_temporal, use_container_width=True)
+
+# --- Perfil de Desempenho ---
+# Regista a execução e, se ativado na barra lateral, mostra o seu perfil.
+terminar_pagina()
@@ -0,0 +1,563 @@
+# ==============================================================================
+# JM ANALYTICS - PROJETO HOSPITAL VIDA PLENA
+# Arquivo: benchmark.py
+# Localização: /hospital_vida_plena_dashboard/scripts/
+# Descrição: Suite de benchmarks de desempenho, executada sem interface sobre
+#            datasets gerados a várias escalas (por omissão 500 mil, 5 milhões
+#            e 50 milhões de atendimentos). Mede:
+#              - os três geradores de dados (scripts/*_generator.py);
+#              - os três loaders, a frio (CSV) e a quente (sidecar);
+#              - a construção do cubo e dos índices e todas as agregações
+#                usadas pelas páginas, nos dois motores de consulta;
+#              - a construção e serialização das figuras (modules/plotting).
+#
+# Cada grupo de casos corre num processo Python novo, para que o tempo de um
+# caso não dependa de caches deixadas pelos anteriores. Dentro do grupo, o
+# pico de memória (RSS) é reposto antes de cada caso, para que o pico
+# registado seja o desse caso e não o acumulado do processo. Para cada caso
+# regista-se o tempo de relógio, o pico de RSS, a memória que o caso
+# acrescentou (delta) e as linhas por segundo, num histórico JSON que pode
+# ser comparado com uma execução de referência (baseline).
+#
+# Exemplos:
+#   python scripts/benchmark.py --escalas 500k --guardar-baseline
+#   python scripts/benchmark.py --escalas 500k 5M --comparar
+#   python scripts/benchmark.py --escalas 500k --grupos agregacoes figuras --sem-geradores
+# ==============================================================================
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS não é medido.
+    resource = None
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_SCRIPTS = os.path.join(RAIZ_PROJETO, 'scripts')
+
+# --- 1. CONFIGURAÇÃO ---
+ESCALAS_PADRAO = ['500k', '5M', '50M']
+PASTA_PADRAO = os.path.join('data', 'benchmark')
+NOME_HISTORICO = 'historico.json'
+NOME_BASELINE = 'baseline.json'
+REPETICOES_PADRAO = 3
+# Uma variação só é considerada regressão se ultrapassar a tolerância
+# relativa e, no tempo, também este mínimo absoluto (ruído de medição).
+TOLERANCIA_PADRAO = 0.10
+MINIMO_SEGUNDOS_REGRESSAO = 0.005
+
+# Os datasets de supply chain e de RH têm um décimo das linhas do hospital,
+# a mesma proporção dos datasets de origem (500 mil / 50 mil).
+DIVISOR_DATASETS_SECUNDARIOS = 10
+
+# Os caminhos relativos são os dos módulos (e das páginas); cada processo de
+# medição corre com a pasta da escala como diretório de trabalho.
+CAMINHO_HOSPITAL = os.path.join('data', 'hospital_vida_plena_dataset_500k.csv')
+CAMINHO_SUPPLY_CHAIN = os.path.join('data', 'hospital_supply_chain_dataset.csv')
+CAMINHO_RH = os.path.join('data', 'people_analytics_dataset.csv')
+
+GRUPOS = ['geradores', 'carregadores', 'agregacoes', 'figuras']
+MARCADOR_RESULTADO = 'RESULTADO_BENCHMARK '
+
+
+def ler_escala(texto):
+    """Converte '500k', '5M' ou '50000' no número de linhas."""
+    multiplicadores = {'k': 1_000, 'm': 1_000_000}
+    texto = texto.strip().lower().replace('_', '')
+    if texto and texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(texto)
+
+
+def rotulo_escala(linhas):
+    """Rótulo curto de uma escala (ex.: 5000000 -> '5M')."""
+    for divisor, sufixo in ((1_000_000, 'M'), (1_000, 'k')):
+        if linhas >= divisor and linhas % divisor == 0:
+            return f"{linhas // divisor}{sufixo}"
+    return str(linhas)
+
+
+def linhas_por_dataset(escala):
+    """Número de linhas de cada dataset numa escala."""
+    secundario = max(1, escala // DIVISOR_DATASETS_SECUNDARIOS)
+    return {'hospital': escala, 'supply_chain': secundario, 'rh': secundario}
+
+
+# --- 2. MEDIÇÃO (dentro do processo de cada grupo) ---
+# O pico de RSS de `getrusage` é cumulativo: depois de um caso pesado, todos
+# os seguintes do mesmo grupo mostrariam esse pico. No Linux, escrever '5' em
+# /proc/self/clear_refs repõe o pico do processo (VmHWM) no RSS atual, e o
+# VmHWM lido no fim do caso é o pico desse caso. Noutros sistemas, o delta é
+# o aumento do pico cumulativo, um limite inferior da memória do caso.
+def _memoria_mb(campo):
+    """Um campo de /proc/self/status ('VmRSS' ou 'VmHWM') em MB, ou None fora do Linux."""
+    try:
+        with open('/proc/self/status', 'rb') as f:
+            for linha in f:
+                if linha.startswith(campo.encode() + b':'):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _maxrss_mb(quem):
+    """Pico cumulativo de `getrusage` ('RUSAGE_SELF' ou 'RUSAGE_CHILDREN') em MB."""
+    if resource is None:
+        return None
+    # No Linux, ru_maxrss vem em KB; no macOS, em bytes.
+    unidade = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(getattr(resource, quem)).ru_maxrss * unidade / 2 ** 20
+
+
+def _pico_processo_mb(reposto):
+    """Pico de RSS do processo: desde a última reposição, ou cumulativo."""
+    return _memoria_mb('VmHWM') if reposto else _maxrss_mb('RUSAGE_SELF')
+
+
+def repor_pico_rss():
+    """Repõe o pico de RSS do processo no RSS atual (True se for possível)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def memoria_do_caso():
+    """
+    Mede a memória de um bloco (gestor de contexto).
+
+    Devolve um dicionário que, no fim do bloco, tem 'pico_rss_mb' (o maior
+    RSS durante o bloco, deste processo ou de um filho terminado nele) e
+    'delta_rss_mb' (esse pico menos o RSS no início do bloco).
+    """
+    medicao = {'pico_rss_mb': None, 'delta_rss_mb': None}
+    rss_antes = _memoria_mb('VmRSS')
+    filhos_antes = _maxrss_mb('RUSAGE_CHILDREN')
+    reposto = repor_pico_rss()
+    pico_antes = _pico_processo_mb(reposto)
+    yield medicao
+    pico = _pico_processo_mb(reposto)
+    if pico is None:
+        return
+    # Um processo filho (ex.: os workers do gerador) que terminou durante o
+    # caso e ultrapassou o pico dos filhos anteriores também conta.
+    filhos = _maxrss_mb('RUSAGE_CHILDREN')
+    if filhos is not None and filhos_antes is not None and filhos > filhos_antes:
+        pico = max(pico, filhos)
+    base = rss_antes if reposto and rss_antes is not None else pico_antes
+    medicao['pico_rss_mb'] = round(pico, 1)
+    medicao['delta_rss_mb'] = round(max(0.0, pico - base), 1)
+
+
+class Medidor:
+    """Acumula os resultados dos casos de um grupo."""
+
+    def __init__(self, escala, repeticoes):
+        self.escala = escala
+        self.repeticoes = repeticoes
+        self.resultados = []
+
+    def medir(self, caso, funcao, linhas, repeticoes=None):
+        """
+        Mede `funcao()` e regista o caso.
+
+        O tempo registado é a mediana de `repeticoes` execuções; o pico e o
+        delta de RSS são os deste caso (ver `memoria_do_caso`).
+
+        Returns:
+            O valor devolvido pela última execução de `funcao`.
+        """
+        tempos = []
+        with memoria_do_caso() as memoria:
+            for _ in range(repeticoes or self.repeticoes):
+                inicio = time.perf_counter()
+                valor = funcao()
+                tempos.append(time.perf_counter() - inicio)
+        segundos = statistics.median(tempos)
+        self.resultados.append({
+            'caso': caso,
+            'escala': self.escala,
+            'linhas': int(linhas),
+            'segundos': round(segundos, 6),
+            'pico_rss_mb': memoria['pico_rss_mb'],
+            'delta_rss_mb': memoria['delta_rss_mb'],
+            'linhas_por_segundo': round(linhas / segundos, 1) if segundos > 0 else None,
+        })
+        return valor
+
+
+def _importar_script(nome):
+    """Importa um dos scripts geradores como módulo."""
+    if PASTA_SCRIPTS not in sys.path:
+        sys.path.insert(0, PASTA_SCRIPTS)
+    return importlib.import_module(nome)
+
+
+def _executar_silencioso(funcao, *args):
+    """Executa `funcao` sem a saída de progresso dos geradores."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcao(*args)
+
+
+def _apagar_derivados(caminho_csv):
+    """Remove o sidecar e as partições de um CSV (para uma leitura a frio)."""
+    base = os.path.splitext(caminho_csv)[0]
+    if os.path.exists(base + '.feather'):
+        os.remove(base + '.feather')
+    shutil.rmtree(base + '_particoes', ignore_errors=True)
+
+
+def grupo_geradores(medidor, argumentos):
+    """Gera os três datasets da escala com os scripts do projeto."""
+    linhas = linhas_por_dataset(medidor.escala)
+    os.makedirs('data', exist_ok=True)
+    semente = ['--semente', '42']
+
+    gerador_hospital = _importar_script('data_generator')
+    argv_hospital = ['--modo', 'vetorizado', '--total', str(linhas['hospital']),
+                     '--workers', str(argumentos.workers), '--saida', CAMINHO_HOSPITAL] + semente
+    medidor.medir('gerar[hospital]', lambda: _executar_silencioso(gerador_hospital.main, argv_hospital),
+                  linhas['hospital'], repeticoes=1)
+
+    gerador_supply = _importar_script('supply_chain_generator')
+    argv_supply = ['--total', str(linhas['supply_chain']), '--saida', CAMINHO_SUPPLY_CHAIN] + semente
+    medidor.medir('gerar[supply_chain]', lambda: _executar_silencioso(gerador_supply.main, argv_supply),
+                  linhas['supply_chain'], repeticoes=1)
+
+    gerador_rh = _importar_script('people_analytics_generator')
+    argv_rh = ['--total', str(linhas['rh']), '--saida', CAMINHO_RH] + semente
+    medidor.medir('gerar[rh]', lambda: _executar_silencioso(gerador_rh.main, argv_rh),
+                  linhas['rh'], repeticoes=1)
+
+
+def _carregador(dataset):
+    from modules import data_loader
+    funcoes = {
+        'hospital': (data_loader.carregar_dados, CAMINHO_HOSPITAL),
+        'supply_chain': (data_loader.carregar_dados_supply_chain, CAMINHO_SUPPLY_CHAIN),
+        'rh': (data_loader.carregar_dados_rh, CAMINHO_RH),
+    }
+    return funcoes[dataset]
+
+
+def grupo_carregador(medidor, argumentos, dataset, modo):
+    """
+    Carrega um dataset: a frio (parsing do CSV e escrita do sidecar) ou a
+    quente (sidecar já existente, lido por um processo novo).
+    """
+    funcao, caminho = _carregador(dataset)
+    if modo == 'frio':
+        _apagar_derivados(caminho)
+    df = medidor.medir(f'carregar[{dataset},{modo}]', lambda: funcao(caminho),
+                       linhas_por_dataset(medidor.escala)[dataset], repeticoes=1)
+    if df is None:
+        raise FileNotFoundError(caminho)
+
+
+def _dataset_da_consulta(descricao):
+    """O dataset sobre o qual corre cada consulta da verificação de paridade."""
+    if descricao.startswith(('kpis_supply_chain', 'custo_por', 'custos_mensais', 'periodo_disponivel[supply')):
+        return 'supply_chain'
+    if descricao.startswith(('kpis_rh', 'saidas_por_motivo', 'salario_medio')):
+        return 'rh'
+    return 'hospital'
+
+
+def grupo_agregacoes(medidor, argumentos, motor):
+    """
+    Constrói as estruturas de consulta e executa todas as agregações das
+    páginas (as consultas da verificação de paridade) num dos motores.
+    """
+    from modules import query_backend
+    from modules.data_loader import carregar_dados, carregar_dados_rh, carregar_dados_supply_chain
+    linhas = linhas_por_dataset(medidor.escala)
+
+    # Os dados são lidos do sidecar antes de começar: o tempo de leitura é
+    # medido no grupo dos carregadores.
+    carregar_dados(CAMINHO_HOSPITAL)
+    carregar_dados_supply_chain(CAMINHO_SUPPLY_CHAIN)
+    carregar_dados_rh(CAMINHO_RH)
+
+    if motor == 'pandas':
+        from modules.rollup import carregar_cubo_hospital
+        cubo = medidor.medir('cubo[hospital]', lambda: carregar_cubo_hospital(CAMINHO_HOSPITAL),
+                             linhas['hospital'], repeticoes=1)
+        medidor.medir('cubo:pacientes_unicos[exato]', lambda: cubo.pacientes_unicos(exato=True), linhas['hospital'])
+        medidor.medir('cubo:pacientes_unicos[hll]', lambda: cubo.pacientes_unicos(exato=False), linhas['hospital'])
+        medidor.medir('cubo:por[setor]', lambda: cubo.por('setor_atendimento'), linhas['hospital'])
+        medidor.medir('cubo:pacientes_unicos_por[setor]',
+                      lambda: cubo.pacientes_unicos_por('setor_atendimento'), linhas['hospital'])
+        # Os mesmos índices (e colunas) que o motor pandas usa.
+        indices = query_backend.obter_motor('pandas')
+        medidor.medir('indice[hospital]', lambda: indices._indice_hospital(CAMINHO_HOSPITAL),
+                      linhas['hospital'], repeticoes=1)
+        medidor.medir('indice[rh]', lambda: indices._indice_rh(CAMINHO_RH), linhas['rh'], repeticoes=1)
+
+    instancia = query_backend.obter_motor(motor)
+    consultas = query_backend._consultas_paridade()
+    # A primeira execução inclui o trabalho feito uma única vez por versão
+    # dos dados (índices, partições Parquet, ligação ao DuckDB).
+    medidor.medir(f'consultas[{motor}]:preparacao', lambda: [consulta(instancia) for _, consulta in consultas],
+                  linhas['hospital'], repeticoes=1)
+    for descricao, consulta in consultas:
+        medidor.medir(f'consulta[{motor}]:{descricao}', lambda: consulta(instancia),
+                      linhas[_dataset_da_consulta(descricao)])
+
+
+def grupo_figuras(medidor, argumentos):
+    """
+    Constrói e serializa cada figura das páginas, sem cache (construção
+    completa) e com a cache de figuras (página já visitada).
+    """
+    import numpy as np
+    from modules import plotting
+    from modules.filter_index import carregar_indice
+    from modules.query_backend import obter_motor
+
+    motor = obter_motor('pandas')
+    indice_rh = carregar_indice('rh', CAMINHO_RH)
+    arestas = plotting.calcular_arestas(indice_rh.coluna('idade'))
+    contagens, _ = np.histogram(indice_rh.coluna('idade'), bins=arestas)
+    figuras = {
+        'donut': (plotting.plotar_donut_chart, (
+            motor.atendimentos_por('setor_atendimento'), 'setor_atendimento', 'count', "Atendimentos por Setor")),
+        'barras': (plotting.plotar_bar_chart_horizontal, (
+            motor.faturacao_por_convenio(), 'valor_total_atendimento', 'convenio', "Faturação por Convénio")),
+        'medidor': (plotting.plotar_gauge_chart, (
+            motor.kpis_rh()['turnover_rate'], "Turnover", 15)),
+        'serie': (plotting.plotar_timeseries_chart, (
+            motor.custos_mensais(), 'data_pedido', 'custo_total_pedido', "Custos Mensais")),
+        'serie_grande': (plotting.plotar_timeseries_chart, (
+            motor.serie_hospital('h'), 'data_atendimento', 'valor_total_atendimento', "Faturação por Hora")),
+        'histograma': (plotting.plotar_histograma_classes, (arestas, contagens, 'idade', "Idade")),
+    }
+    for nome, (funcao, args) in figuras.items():
+        linhas = len(args[0]) if hasattr(args[0], '__len__') else 1
+        medidor.medir(f'figura[{nome}]', lambda: inspect.unwrap(funcao)(*args).to_json(), linhas)
+        funcao(*args)
+        medidor.medir(f'figura[{nome},cache]', lambda: funcao(*args).to_json(), linhas)
+
+
+def executar_grupo(argumentos):
+    """Ponto de entrada do processo filho: executa um grupo e imprime o JSON."""
+    sys.path.insert(0, RAIZ_PROJETO)
+    medidor = Medidor(argumentos.escala, argumentos.repeticoes)
+    nome, _, parametro = argumentos.grupo.partition(':')
+    rss_inicial = _memoria_mb('VmRSS') or _maxrss_mb('RUSAGE_SELF')
+    rss_inicial = round(rss_inicial, 1) if rss_inicial is not None else None
+    if nome == 'geradores':
+        grupo_geradores(medidor, argumentos)
+    elif nome == 'carregadores':
+        dataset, modo = parametro.split(',')
+        grupo_carregador(medidor, argumentos, dataset, modo)
+    elif nome == 'agregacoes':
+        grupo_agregacoes(medidor, argumentos, parametro)
+    elif nome == 'figuras':
+        grupo_figuras(medidor, argumentos)
+    else:
+        raise ValueError(f"Grupo desconhecido: {argumentos.grupo}")
+    for resultado in medidor.resultados:
+        resultado['rss_inicial_mb'] = rss_inicial
+    print(MARCADOR_RESULTADO + json.dumps(medidor.resultados))
+
+
+# --- 3. ORQUESTRAÇÃO (processo principal) ---
+def planear_grupos(grupos, sem_geradores):
+    """Lista os processos a lançar por escala, pela ordem de execução."""
+    planeados = []
+    if 'geradores' in grupos and not sem_geradores:
+        planeados.append('geradores')
+    if 'carregadores' in grupos:
+        for dataset in ('hospital', 'supply_chain', 'rh'):
+            planeados += [f'carregadores:{dataset},frio', f'carregadores:{dataset},quente']
+    if 'agregacoes' in grupos:
+        planeados.append('agregacoes:pandas')
+        try:
+            import duckdb  # noqa: F401 (apenas para saber se o motor existe)
+            planeados.append('agregacoes:duckdb')
+        except ImportError:
+            print("DuckDB não instalado: o motor DuckDB não será medido.")
+    if 'figuras' in grupos:
+        planeados.append('figuras')
+    return planeados
+
+
+def lancar_grupo(grupo, escala, pasta_escala, argumentos):
+    """Executa um grupo num processo Python novo e devolve os resultados."""
+    comando = [sys.executable, os.path.abspath(__file__), '--grupo', grupo, '--escala', str(escala),
+               '--repeticoes', str(argumentos.repeticoes), '--workers', str(argumentos.workers)]
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ_PROJETO)
+    processo = subprocess.run(comando, cwd=pasta_escala, env=ambiente, capture_output=True, text=True)
+    for linha in processo.stdout.splitlines():
+        if linha.startswith(MARCADOR_RESULTADO):
+            return json.loads(linha[len(MARCADOR_RESULTADO):])
+    print(f"  ERRO no grupo '{grupo}' (código {processo.returncode}):")
+    print('  ' + '\n  '.join(processo.stderr.strip().splitlines()[-10:]))
+    return []
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ_PROJETO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def gravar_json(caminho, conteudo):
+    """Grava de forma atómica (ficheiro temporário + rename)."""
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def imprimir_resultados(resultados):
+    print(f"\n{'Caso':<58} {'Escala':>6} {'Tempo (s)':>11} {'Pico RSS (MB)':>14} {'Delta (MB)':>11} {'Linhas/s':>15}")
+    for r in resultados:
+        linhas_s = f"{r['linhas_por_segundo']:,.0f}" if r['linhas_por_segundo'] else '-'
+        rss = f"{r['pico_rss_mb']:,.1f}" if r['pico_rss_mb'] is not None else '-'
+        delta = f"{r['delta_rss_mb']:,.1f}" if r.get('delta_rss_mb') is not None else '-'
+        print(f"{r['caso']:<58} {rotulo_escala(r['escala']):>6} {r['segundos']:>11.4f} {rss:>14} {delta:>11} {linhas_s:>15}")
+
+
+def comparar(execucao, baseline, tolerancia):
+    """
+    Compara uma execução com a baseline, caso a caso (mesmo caso e escala).
+
+    Returns:
+        list: As regressões, como (caso, escala, métrica, base, atual).
+    """
+    base = {(r['caso'], r['escala']): r for r in baseline['resultados']}
+    regressoes = []
+    print(f"\nComparação com a baseline de {baseline['data']} (commit {baseline.get('commit') or '?'}):")
+    print(f"{'Caso':<58} {'Escala':>6} {'Base (s)':>10} {'Atual (s)':>10} {'Var.':>8} {'Var. RSS':>9}")
+    for r in execucao['resultados']:
+        anterior = base.get((r['caso'], r['escala']))
+        if anterior is None:
+            continue
+        variacao = r['segundos'] / anterior['segundos'] - 1 if anterior['segundos'] else 0.0
+        variacao_rss = (r['pico_rss_mb'] / anterior['pico_rss_mb'] - 1
+                        if r['pico_rss_mb'] and anterior['pico_rss_mb'] else 0.0)
+        marcas = ''
+        if variacao > tolerancia and r['segundos'] - anterior['segundos'] > MINIMO_SEGUNDOS_REGRESSAO:
+            regressoes.append((r['caso'], r['escala'], 'segundos', anterior['segundos'], r['segundos']))
+            marcas += ' <- tempo'
+        if variacao_rss > tolerancia:
+            regressoes.append((r['caso'], r['escala'], 'pico_rss_mb', anterior['pico_rss_mb'], r['pico_rss_mb']))
+            marcas += ' <- memória'
+        print(f"{r['caso']:<58} {rotulo_escala(r['escala']):>6} {anterior['segundos']:>10.4f} "
+              f"{r['segundos']:>10.4f} {variacao:>+8.1%} {variacao_rss:>+9.1%}{marcas}")
+    print(f"\n{len(regressoes)} regressão(ões) acima de {tolerancia:.0%}.")
+    return regressoes
+
+
+def ler_argumentos(argv=None):
+    """Lê as opções da linha de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do painel Hospital Vida Plena.")
+    parser.add_argument('--escalas', nargs='+', default=ESCALAS_PADRAO,
+                        help="Número de atendimentos de cada escala (ex.: 500k 5M 50M).")
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=GRUPOS,
+                        help="Grupos de casos a executar.")
+    parser.add_argument('--pasta', default=PASTA_PADRAO,
+                        help="Pasta dos datasets gerados, do histórico e da baseline.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO,
+                        help="Repetições de cada caso rápido (regista-se a mediana).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos do gerador de atendimentos.")
+    parser.add_argument('--sem-geradores', action='store_true',
+                        help="Reutiliza os datasets já gerados (não mede os geradores).")
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help="Guarda esta execução como baseline.")
+    parser.add_argument('--comparar', action='store_true',
+                        help="Compara esta execução com a baseline.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help="Variação relativa a partir da qual um caso é uma regressão.")
+    parser.add_argument('--falhar-em-regressao', action='store_true',
+                        help="Termina com código 1 se houver regressões (para CI).")
+    # Opções internas dos processos de medição.
+    parser.add_argument('--grupo', help=argparse.SUPPRESS)
+    parser.add_argument('--escala', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.repeticoes < 1 or args.workers < 1:
+        parser.error("--repeticoes e --workers devem ser pelo menos 1.")
+    return args
+
+
+def main(argv=None):
+    args = ler_argumentos(argv)
+    if args.grupo:
+        executar_grupo(args)
+        return 0
+
+    escalas = [ler_escala(e) for e in args.escalas]
+    pasta = os.path.abspath(args.pasta)
+    execucao = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'escalas': escalas,
+        'repeticoes': args.repeticoes,
+        'resultados': [],
+    }
+
+    for escala in escalas:
+        pasta_escala = os.path.join(pasta, rotulo_escala(escala))
+        os.makedirs(os.path.join(pasta_escala, 'data'), exist_ok=True)
+        print(f"\n=== Escala {rotulo_escala(escala)} ({escala:,} atendimentos) ===")
+        for grupo in planear_grupos(args.grupos, args.sem_geradores):
+            inicio = time.perf_counter()
+            resultados = lancar_grupo(grupo, escala, pasta_escala, args)
+            execucao['resultados'] += resultados
+            print(f"  {grupo:<30} {len(resultados):>3} caso(s) em {time.perf_counter() - inicio:,.1f} s")
+
+    imprimir_resultados(execucao['resultados'])
+
+    caminho_historico = os.path.join(pasta, NOME_HISTORICO)
+    historico = ler_json(caminho_historico, {'execucoes': []})
+    historico['execucoes'].append(execucao)
+    gravar_json(caminho_historico, historico)
+    print(f"\nExecução acrescentada ao histórico: {caminho_historico}")
+
+    caminho_baseline = os.path.join(pasta, NOME_BASELINE)
+    regressoes = []
+    if args.comparar:
+        baseline = ler_json(caminho_baseline, None)
+        if baseline is None:
+            print(f"Sem baseline em '{caminho_baseline}': use --guardar-baseline para criar uma.")
+        else:
+            regressoes = comparar(execucao, baseline, args.tolerancia)
+    if args.guardar_baseline:
+        gravar_json(caminho_baseline, execucao)
+        print(f"Baseline guardada em: {caminho_baseline}")
+    return 1 if regressoes and args.falhar_em_regressao else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
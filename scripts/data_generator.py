@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
 from faker import Faker
+from faker.providers.person.pt_BR import Provider as ProvedorPessoasBR
 from tqdm import tqdm
+import argparse
 import random
 from datetime import datetime, timedelta
 import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # ==============================================================================
 # JM ANALYTICS - PROJETO HOSPITAL VIDA PLENA (MEGA PROJETO)
@@ -13,54 +19,106 @@ import os
 # Descrição: Script para geração de dados sintéticos em larga escala.
 # OBJETIVO: Criar um dataset robusto com 500 mil linhas, utilizando
 #           uma abordagem de chunking para garantir a eficiência de memória.
+#
+# Modos de geração:
+#   - clássico (por omissão): linha a linha, com `random` e Faker.
+#   - vetorizado: cada coluna do lote é sorteada de uma só vez como um array
+#     NumPy, a partir de um gerador com semente (resultado reprodutível).
+#
+# Exemplos:
+#   python scripts/data_generator.py --modo vetorizado --semente 42 --workers 4
+#   python scripts/data_generator.py --modo vetorizado --total 50000000 \
+#       --tamanho-lote 250000 --formato parquet --saida data/stress/atendimentos.parquet
+#
+# Os loaders do dashboard (modules/data_loader.py) leem os dois formatos.
 # ==============================================================================
 
-print("Iniciando a simulação do Hospital Vida Plena...")
-print("A geração de 500 mil linhas é um processo rápido.")
-
 # --- 1. CONFIGURAÇÃO DA SIMULAÇÃO ---
-fake = Faker('pt_BR')
 TOTAL_REGISTOS = 500_000
 TAMANHO_LOTE = 100_000  # Gerar 100 mil linhas por vez
-NUM_LOTES = TOTAL_REGISTOS // TAMANHO_LOTE
 # Garante que o ficheiro é guardado na pasta correta
 OUTPUT_DIR = 'data'
 OUTPUT_FILENAME = os.path.join(OUTPUT_DIR, 'hospital_vida_plena_dataset_500k.csv')
+# Os atributos dos pacientes (nome, data de nascimento) vivem numa tabela de
+# dimensão própria; a tabela de factos de atendimentos guarda apenas o
+# `paciente_id`, evitando repetir o nome em cada uma das 500 mil linhas.
+PACIENTES_FILENAME = os.path.join(OUTPUT_DIR, 'hospital_vida_plena_pacientes.csv')
 
 DATA_INICIAL = datetime(2015, 1, 1)
 DATA_FINAL = datetime(2024, 12, 31)
 
+NUM_PACIENTES = 100_000  # Pool de 100 mil pacientes únicos
+PRIMEIRO_ID_PACIENTE = 1_000_000
+IDADE_MAXIMA_PACIENTE = 95
+TAMANHO_BLOCO_COPIA = 8 * 1024 * 1024  # Bloco usado ao juntar as partes
+
 # --- 2. DEFINIÇÃO DAS LISTAS DE DIMENSÕES (Simulando tabelas de apoio) ---
 SETORES_HOSPITALARES = ['Cardiologia', 'Ortopedia', 'Neurologia', 'Pediatria', 'Oncologia', 'Clínica Geral', 'Pronto-Socorro', 'UTI']
 TIPOS_ATENDIMENTO = ['Ambulatorial', 'Internação', 'Emergência', 'Exame']
+PESOS_TIPOS_ATENDIMENTO = [0.4, 0.2, 0.3, 0.1]
 CONVENIOS = ['SulAmérica', 'Bradesco Saúde', 'Amil', 'Unimed', 'CASSI', 'SUS', 'Particular']
 STATUS_PAGAMENTO = ['Pago', 'Pendente', 'Atrasado', 'Cancelado']
 
+
 # --- 3. GERAÇÃO DE DADOS BASE (Pacientes) ---
-# Geramos um pool de pacientes para a simulação.
-print("\nPasso 1: Gerando um pool de pacientes para a simulação...")
-num_pacientes = 100_000 # Pool de 100 mil pacientes únicos
-pacientes = [{'paciente_id': 1000000 + i, 'nome_paciente': fake.name(), 'data_nascimento': fake.date_of_birth(minimum_age=0, maximum_age=95)} for i in tqdm(range(num_pacientes))]
+def gerar_pacientes(fake, num_pacientes=NUM_PACIENTES):
+    """Gera o pool de pacientes linha a linha, com o Faker (modo clássico)."""
+    return pd.DataFrame([
+        {
+            'paciente_id': PRIMEIRO_ID_PACIENTE + i,
+            'nome_paciente': fake.name(),
+            'data_nascimento_paciente': fake.date_of_birth(minimum_age=0, maximum_age=IDADE_MAXIMA_PACIENTE)
+        }
+        for i in tqdm(range(num_pacientes))
+    ])
+
+
+def gerar_pacientes_vetorizado(rng, num_pacientes=NUM_PACIENTES):
+    """
+    Gera o pool de pacientes com arrays NumPy (modo vetorizado).
+
+    Os nomes combinam um primeiro nome e um apelido sorteados das listas do
+    provedor pt_BR do Faker; as datas de nascimento são sorteadas
+    uniformemente nos 95 anos anteriores a `DATA_FINAL` (e não a hoje, para
+    que a mesma semente produza sempre o mesmo ficheiro).
+    """
+    primeiros = np.array(ProvedorPessoasBR.first_names, dtype=object)
+    apelidos = np.array(ProvedorPessoasBR.last_names, dtype=object)
+    nomes = (primeiros[rng.integers(0, len(primeiros), num_pacientes)] + ' '
+             + apelidos[rng.integers(0, len(apelidos), num_pacientes)])
+
+    referencia = np.datetime64(DATA_FINAL.date(), 'D')
+    dias_maximos = IDADE_MAXIMA_PACIENTE * 365
+    nascimentos = referencia - rng.integers(0, dias_maximos + 1, num_pacientes).astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'paciente_id': np.arange(PRIMEIRO_ID_PACIENTE, PRIMEIRO_ID_PACIENTE + num_pacientes),
+        'nome_paciente': nomes,
+        'data_nascimento_paciente': nascimentos,
+    })
+
 
 # --- 4. FUNÇÃO PARA GERAR UM LOTE DE DADOS ---
 # Esta função encapsula a lógica de criação de um único lote (chunk).
-def gerar_lote(numero_lote, total_lotes, tamanho_do_lote):
+def gerar_lote(numero_lote, total_lotes, tamanho_do_lote, ids_pacientes, fake, primeiro_id=None):
     """Gera um DataFrame do pandas com um lote de dados sintéticos."""
+    if primeiro_id is None:
+        primeiro_id = numero_lote * tamanho_do_lote
     print(f"\nGerando Lote {numero_lote + 1}/{total_lotes}...")
     registos_lote = []
     for i in tqdm(range(tamanho_do_lote)):
         # --- Seleciona um paciente aleatório do pool ---
-        paciente = random.choice(pacientes)
-        
+        paciente_id = random.choice(ids_pacientes)
+
         # --- Simula dados do atendimento ---
-        tipo_atendimento = random.choices(TIPOS_ATENDIMENTO, weights=[0.4, 0.2, 0.3, 0.1], k=1)[0]
+        tipo_atendimento = random.choices(TIPOS_ATENDIMENTO, weights=PESOS_TIPOS_ATENDIMENTO, k=1)[0]
         setor = random.choice(SETORES_HOSPITALARES)
         data_atendimento = fake.date_time_between(start_date=DATA_INICIAL, end_date=DATA_FINAL)
-        
+
         dias_internacao = 0
         if tipo_atendimento == 'Internação':
             dias_internacao = random.randint(1, 30)
-        
+
         # --- Simula dados financeiros ---
         convenio = random.choice(CONVENIOS)
         valor_base = random.uniform(150, 5000)
@@ -68,12 +126,10 @@ def gerar_lote(numero_lote, total_lotes, tamanho_do_lote):
         valor_final_cobrado = valor_base * fator_convenio
 
         # --- Consolida o registo ---
-        atendimento_id = (numero_lote * tamanho_do_lote) + i
+        atendimento_id = primeiro_id + i
         registos_lote.append({
             'atendimento_id': atendimento_id,
-            'paciente_id': paciente['paciente_id'],
-            'nome_paciente': paciente['nome_paciente'],
-            'data_nascimento_paciente': paciente['data_nascimento'],
+            'paciente_id': paciente_id,
             'data_atendimento': data_atendimento,
             'tipo_atendimento': tipo_atendimento,
             'setor_atendimento': setor,
@@ -84,35 +140,320 @@ def gerar_lote(numero_lote, total_lotes, tamanho_do_lote):
         })
     return pd.DataFrame(registos_lote)
 
-# --- 5. EXECUÇÃO PRINCIPAL DO PROCESSO DE CHUNKING ---
-# Este é o coração da operação: um ciclo que gera e grava os dados em lotes.
 
-# Garante que a pasta /data exista
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# --- 4.1. Lote Vetorizado ---
+# As mesmas regras do lote clássico, aplicadas a colunas inteiras:
+#   - tipo com pesos, setor/convénio/status uniformes (índices sorteados e
+#     convertidos em texto com `np.take`);
+#   - datas sorteadas como inteiros (microssegundos desde a época);
+#   - fator de preço do convénio com `np.select`.
+def gerar_lote_vetorizado(rng, numero_lote, tamanho_do_lote, ids_pacientes, primeiro_id=None):
+    """
+    Gera um lote com todas as colunas sorteadas de uma vez como arrays NumPy.
+
+    Args:
+        rng (numpy.random.Generator): Gerador aleatório (com semente).
+        numero_lote (int): Índice do lote (define os `atendimento_id`).
+        tamanho_do_lote (int): Número de linhas do lote.
+        ids_pacientes (numpy.ndarray): Os `paciente_id` do pool.
+        primeiro_id (int, optional): O primeiro `atendimento_id` do lote. Por
+                                     omissão, numero_lote * tamanho_do_lote.
+
+    Returns:
+        pandas.DataFrame: O lote, com as mesmas colunas do modo clássico.
+    """
+    n = tamanho_do_lote
+    tipos = np.take(TIPOS_ATENDIMENTO, rng.choice(len(TIPOS_ATENDIMENTO), size=n, p=PESOS_TIPOS_ATENDIMENTO))
+    setores = np.take(SETORES_HOSPITALARES, rng.integers(0, len(SETORES_HOSPITALARES), n))
+    convenios = np.take(CONVENIOS, rng.integers(0, len(CONVENIOS), n))
+    status = np.take(STATUS_PAGAMENTO, rng.integers(0, len(STATUS_PAGAMENTO), n))
+
+    inicio_us = np.datetime64(DATA_INICIAL, 'us').astype(np.int64)
+    fim_us = np.datetime64(DATA_FINAL, 'us').astype(np.int64)
+    datas = rng.integers(inicio_us, fim_us, n, endpoint=True).astype('datetime64[us]')
+
+    dias_internacao = np.where(tipos == 'Internação', rng.integers(1, 31, n), 0)
+
+    valor_base = rng.uniform(150, 5000, n)
+    fator_convenio = np.select(
+        [convenios == 'Particular', convenios == 'SUS'],
+        [1.0, 0.5],
+        default=rng.uniform(0.7, 0.9, n)
+    )
+
+    if primeiro_id is None:
+        primeiro_id = numero_lote * tamanho_do_lote
+    return pd.DataFrame({
+        'atendimento_id': np.arange(primeiro_id, primeiro_id + n),
+        'paciente_id': ids_pacientes[rng.integers(0, len(ids_pacientes), n)],
+        'data_atendimento': datas,
+        'tipo_atendimento': tipos,
+        'setor_atendimento': setores,
+        'dias_internacao': dias_internacao,
+        'convenio': convenios,
+        'valor_total_atendimento': np.round(valor_base * fator_convenio, 2),
+        'status_pagamento': status,
+    })
+
+
+# --- 4.2. Gravação em Streaming (CSV ou Parquet) ---
+# Cada lote é gravado assim que é gerado e descartado de seguida; a memória
+# usada depende do tamanho do lote e não do total de linhas. Em Parquet, cada
+# lote torna-se um row group do mesmo ficheiro.
+class EscritorCSV:
+    """Acrescenta lotes a um ficheiro CSV (cabeçalho apenas no primeiro)."""
+
+    def __init__(self, destino):
+        self.destino = destino
+        self._primeiro = True
+
+    def escrever(self, df_lote):
+        _gravar_lote(df_lote, self.destino, cabecalho=self._primeiro)
+        self._primeiro = False
+
+    def juntar_parte(self, caminho_parte):
+        # As partes CSV são texto já formatado: basta copiar os bytes.
+        with open(self.destino, 'ab') as saida, open(caminho_parte, 'rb') as parte:
+            shutil.copyfileobj(parte, saida, TAMANHO_BLOCO_COPIA)
+
+    def fechar(self):
+        pass
+
+
+class EscritorParquet:
+    """Grava cada lote como um row group de um único ficheiro Parquet."""
+
+    def __init__(self, destino):
+        import pyarrow.parquet as pq  # Apenas necessário para --formato parquet.
+        self._pq = pq
+        self.destino = destino
+        self._escritor = None
+
+    def _escrever_tabela(self, tabela):
+        if self._escritor is None:
+            self._escritor = self._pq.ParquetWriter(self.destino, tabela.schema)
+        self._escritor.write_table(tabela, row_group_size=tabela.num_rows)
+
+    def escrever(self, df_lote):
+        import pyarrow as pa
+        self._escrever_tabela(pa.Table.from_pandas(df_lote, preserve_index=False))
 
-# Remove o ficheiro antigo, se existir, para começar do zero.
-if os.path.exists(OUTPUT_FILENAME):
-    os.remove(OUTPUT_FILENAME)
-    print(f"Ficheiro antigo '{OUTPUT_FILENAME}' removido.")
+    def juntar_parte(self, caminho_parte):
+        self._escrever_tabela(self._pq.read_table(caminho_parte))
 
-for i in range(NUM_LOTES):
-    # Gera um novo lote de dados
-    df_lote = gerar_lote(i, NUM_LOTES, TAMANHO_LOTE)
-    
-    # Na primeira iteração (i=0), escreve o cabeçalho no ficheiro CSV.
-    # Nas iterações seguintes, adiciona os dados sem o cabeçalho (append).
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+ESCRITORES = {'csv': EscritorCSV, 'parquet': EscritorParquet}
+
+
+def _gravar_lote(df_lote, destino, cabecalho):
+    """Acrescenta um lote ao CSV de destino (com o cabeçalho, se pedido)."""
     df_lote.to_csv(
-        OUTPUT_FILENAME,
+        destino,
         mode='a',  # 'a' para append (adicionar ao fim do ficheiro)
-        header=(i == 0), # Escreve o cabeçalho apenas na primeira vez
+        header=cabecalho,
         index=False,
         sep=';',
         decimal=','
     )
-    print(f"Lote {i + 1} gravado com sucesso. Total de linhas geradas: {(i + 1) * TAMANHO_LOTE:,}")
 
-print("\n==========================================================")
-print("PROJETO HOSPITAL VIDA PLENA - GERAÇÃO DE DADOS CONCLUÍDA!")
-print(f"Dataset com {TOTAL_REGISTOS:,} linhas foi gerado.")
-print(f"Arquivo salvo como: {OUTPUT_FILENAME}")
-print("==========================================================")
+
+def planear_lotes(total_registos, tamanho_lote):
+    """Divide o total em lotes: lista de (número do lote, primeiro id, linhas)."""
+    return [
+        (i, inicio, min(tamanho_lote, total_registos - inicio))
+        for i, inicio in enumerate(range(0, total_registos, tamanho_lote))
+    ]
+
+
+# --- 4.3. Lotes em Paralelo ---
+# No modo vetorizado, cada lote tem o seu próprio gerador, derivado da semente
+# mestra com `SeedSequence.spawn` (um filho para o pool de pacientes e um por
+# lote). O conteúdo de cada lote depende apenas da semente e do número do lote,
+# e não de quem o gera nem por que ordem. Por isso, com `--workers N`, os lotes
+# são gerados num pool de processos, cada processo grava o seu ficheiro parcial
+# e as partes são acrescentadas ao ficheiro final por ordem de lote. O ficheiro
+# final é idêntico, byte a byte, para qualquer N.
+#
+# Para manter a memória (e o disco) limitados, só há no máximo
+# `LOTES_EM_CURSO_POR_WORKER` lotes por processo em curso; cada parte é
+# apagada logo que é acrescentada.
+LOTES_EM_CURSO_POR_WORKER = 2
+
+_ids_pacientes_worker = None
+
+
+def _iniciar_worker(ids_pacientes):
+    """Entrega o pool de pacientes a cada processo uma única vez."""
+    global _ids_pacientes_worker
+    _ids_pacientes_worker = ids_pacientes
+
+
+def _gerar_parte(tarefa):
+    """Gera um lote num processo do pool e grava-o no seu ficheiro parcial."""
+    numero_lote, primeiro_id, linhas, semente_lote, formato, caminho_parte = tarefa
+    rng = np.random.default_rng(semente_lote)
+    df_lote = gerar_lote_vetorizado(rng, numero_lote, linhas, _ids_pacientes_worker, primeiro_id=primeiro_id)
+    if formato == 'parquet':
+        df_lote.to_parquet(caminho_parte, index=False)
+    else:
+        _gravar_lote(df_lote, caminho_parte, cabecalho=(numero_lote == 0))
+    return caminho_parte
+
+
+def gerar_lotes_paralelo(lotes, sementes_lotes, ids_pacientes, escritor, formato, workers, ao_gravar):
+    """
+    Gera os lotes do modo vetorizado num pool de `workers` processos.
+
+    Args:
+        lotes (list): Os lotes, como devolvidos por `planear_lotes`.
+        sementes_lotes (list): Uma `numpy.random.SeedSequence` por lote.
+        ids_pacientes (numpy.ndarray): Os `paciente_id` do pool.
+        escritor (EscritorCSV ou EscritorParquet): O destino final.
+        formato (str): 'csv' ou 'parquet'.
+        workers (int): Número de processos.
+        ao_gravar (callable): Chamada com (número do lote, linhas) após cada lote.
+    """
+    pasta_partes = escritor.destino + '.partes'
+    shutil.rmtree(pasta_partes, ignore_errors=True)
+    os.makedirs(pasta_partes)
+    tarefas = iter([
+        (numero_lote, primeiro_id, linhas, sementes_lotes[numero_lote], formato,
+         os.path.join(pasta_partes, f'lote_{numero_lote:06d}.{formato}'))
+        for numero_lote, primeiro_id, linhas in lotes
+    ])
+    em_curso = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                             initargs=(ids_pacientes,)) as executor:
+        for numero_lote, _, linhas in lotes:
+            while len(em_curso) < workers * LOTES_EM_CURSO_POR_WORKER:
+                tarefa = next(tarefas, None)
+                if tarefa is None:
+                    break
+                em_curso.append(executor.submit(_gerar_parte, tarefa))
+            # As partes são juntadas pela ordem dos lotes.
+            caminho_parte = em_curso.popleft().result()
+            escritor.juntar_parte(caminho_parte)
+            os.remove(caminho_parte)
+            ao_gravar(numero_lote, linhas)
+    shutil.rmtree(pasta_partes, ignore_errors=True)
+
+
+# --- 5. EXECUÇÃO PRINCIPAL DO PROCESSO DE CHUNKING ---
+# Este é o coração da operação: um ciclo que gera e grava os dados em lotes.
+def ler_argumentos(argv=None):
+    """Lê as opções da linha de comandos."""
+    parser = argparse.ArgumentParser(description="Gera o dataset sintético do Hospital Vida Plena.")
+    parser.add_argument('--modo', choices=['classico', 'vetorizado'], default='classico',
+                        help="'classico' (linha a linha) ou 'vetorizado' (colunas NumPy).")
+    parser.add_argument('--semente', type=int, default=None,
+                        help="Semente aleatória, para resultados reprodutíveis.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de processos para gerar os lotes (apenas no modo vetorizado).")
+    parser.add_argument('--total', type=int, default=TOTAL_REGISTOS,
+                        help=f"Número total de atendimentos (por omissão, {TOTAL_REGISTOS:,}).")
+    parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE,
+                        help=f"Linhas por lote; define o teto de memória (por omissão, {TAMANHO_LOTE:,}).")
+    parser.add_argument('--formato', choices=sorted(ESCRITORES), default='csv',
+                        help="Formato do ficheiro de atendimentos.")
+    parser.add_argument('--saida', default=None,
+                        help="Ficheiro de atendimentos a gerar (por omissão, o dataset em /data/). "
+                             "A dimensão de pacientes é gravada na mesma pasta.")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1.")
+    if args.workers > 1 and args.modo != 'vetorizado':
+        parser.error("--workers só está disponível com --modo vetorizado.")
+    if args.total < 1 or args.tamanho_lote < 1:
+        parser.error("--total e --tamanho-lote devem ser positivos.")
+    if args.saida is None:
+        args.saida = OUTPUT_FILENAME
+        if args.formato == 'parquet':
+            args.saida = os.path.splitext(OUTPUT_FILENAME)[0] + '.parquet'
+    return args
+
+
+def main(argv=None):
+    args = ler_argumentos(argv)
+    vetorizado = args.modo == 'vetorizado'
+    lotes = planear_lotes(args.total, args.tamanho_lote)
+    pasta_saida = os.path.dirname(args.saida) or '.'
+    caminho_pacientes = os.path.join(pasta_saida, os.path.basename(PACIENTES_FILENAME))
+
+    print("Iniciando a simulação do Hospital Vida Plena...")
+    print(f"A gerar {args.total:,} linhas em {len(lotes)} lotes de até {args.tamanho_lote:,} "
+          f"(modo {args.modo}, formato {args.formato}, {args.workers} worker(s)).")
+
+    fake = Faker('pt_BR')
+    if args.semente is not None:
+        random.seed(args.semente)
+        Faker.seed(args.semente)
+    # Um gerador independente para o pool de pacientes e um para cada lote.
+    semente_pacientes, *sementes_lotes = np.random.SeedSequence(args.semente).spawn(len(lotes) + 1)
+
+    # Geramos um pool de pacientes para a simulação.
+    print("\nPasso 1: Gerando um pool de pacientes para a simulação...")
+    if vetorizado:
+        df_pacientes = gerar_pacientes_vetorizado(np.random.default_rng(semente_pacientes))
+    else:
+        df_pacientes = gerar_pacientes(fake)
+    ids_pacientes = df_pacientes['paciente_id'].to_numpy()
+
+    # Garante que a pasta de saída exista e grava a dimensão de pacientes uma única vez.
+    os.makedirs(pasta_saida, exist_ok=True)
+    df_pacientes.to_csv(caminho_pacientes, index=False, sep=';', decimal=',')
+    del df_pacientes
+    print(f"Dimensão de pacientes gravada em: {caminho_pacientes}")
+
+    # Remove o ficheiro antigo, se existir, para começar do zero.
+    if os.path.exists(args.saida):
+        os.remove(args.saida)
+        print(f"Ficheiro antigo '{args.saida}' removido.")
+
+    print("\nPasso 2: Gerando e gravando os atendimentos em lotes...")
+    escritor = ESCRITORES[args.formato](args.saida)
+    inicio = time.perf_counter()
+    progresso = {'linhas': 0}
+
+    def ao_gravar(numero_lote, linhas):
+        progresso['linhas'] += linhas
+        decorrido = time.perf_counter() - inicio
+        print(f"Lote {numero_lote + 1}/{len(lotes)} gravado com sucesso. "
+              f"Total de linhas geradas: {progresso['linhas']:,} "
+              f"({progresso['linhas'] / decorrido:,.0f} linhas/s)")
+
+    try:
+        if args.workers > 1:
+            gerar_lotes_paralelo(lotes, sementes_lotes, ids_pacientes, escritor,
+                                 args.formato, args.workers, ao_gravar)
+        else:
+            for numero_lote, primeiro_id, linhas in lotes:
+                # Gera um novo lote de dados
+                if vetorizado:
+                    rng = np.random.default_rng(sementes_lotes[numero_lote])
+                    df_lote = gerar_lote_vetorizado(rng, numero_lote, linhas, ids_pacientes,
+                                                    primeiro_id=primeiro_id)
+                else:
+                    df_lote = gerar_lote(numero_lote, len(lotes), linhas, ids_pacientes.tolist(), fake,
+                                         primeiro_id=primeiro_id)
+                escritor.escrever(df_lote)
+                del df_lote
+                ao_gravar(numero_lote, linhas)
+    finally:
+        escritor.fechar()
+    decorrido = time.perf_counter() - inicio
+
+    print("\n==========================================================")
+    print("PROJETO HOSPITAL VIDA PLENA - GERAÇÃO DE DADOS CONCLUÍDA!")
+    print(f"Dataset com {args.total:,} linhas foi gerado em {decorrido:,.1f} s "
+          f"({args.total / decorrido:,.0f} linhas/s).")
+    print(f"Arquivo salvo como: {args.saida}")
+    print(f"Dimensão de pacientes: {caminho_pacientes}")
+    print("==========================================================")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# ==============================================================================
+# JM ANALYTICS - PROJETO HOSPITAL VIDA PLENA
+# Arquivo: gerar_snapshots.py
+# Localização: /hospital_vida_plena_dashboard/scripts/
+# Descrição: Job batch que pré-calcula os KPIs e as séries de todas as
+#            páginas e os grava numa nova versão de snapshot
+#            (modules/snapshots.py). Usa os mesmos loaders, cubo e índices
+#            que as páginas, e a mesma aritmética em centavos que os motores
+#            de consulta, pelo que os números servidos no modo snapshot são
+#            os mesmos que as páginas calculariam ao vivo.
+#
+# Deve ser corrido a partir da raiz do projeto (os caminhos dos dados são
+# relativos), por exemplo de hora a hora ou depois de cada carga de dados:
+#   python scripts/gerar_snapshots.py
+#   python scripts/gerar_snapshots.py --manter 10
+#
+# E as páginas servidas apenas a partir do snapshot com:
+#   HVP_MOTOR_CONSULTAS=snapshot streamlit run app.py
+# ==============================================================================
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from modules.data_loader import carregar_dados, carregar_dados_supply_chain, impressao_digital  # noqa: E402
+from modules.filter_index import carregar_indice  # noqa: E402
+from modules.plotting import calcular_arestas  # noqa: E402
+from modules.query_backend import CAMINHO_HOSPITAL, CAMINHO_RH, CAMINHO_SUPPLY_CHAIN  # noqa: E402
+from modules.rollup import carregar_cubo_hospital  # noqa: E402
+from modules.sketches import PRECISAO, registos_e_ordens  # noqa: E402
+from modules.snapshots import PASTA_SNAPSHOTS, VERSOES_MANTIDAS, gravar_snapshot  # noqa: E402
+
+# --- 1. CONFIGURAÇÃO ---
+# As dimensões da visão geral e as colunas dos histogramas de RH, como nas páginas.
+DIMENSOES_VISAO_GERAL = ['setor_atendimento', 'tipo_atendimento']
+COLUNAS_HISTOGRAMAS = ['idade', 'avaliacao_desempenho_anual']
+
+
+def centavos(valores):
+    """Valores monetários em centavos inteiros (como `query_backend._centavos`)."""
+    return np.rint(np.asarray(valores, dtype='float64') * 100).astype(np.int64)
+
+
+def exigir(resultado, caminho):
+    if resultado is None:
+        raise FileNotFoundError(caminho)
+    return resultado
+
+
+def origem(caminho, linhas):
+    return {'caminho': caminho, 'impressao': impressao_digital(caminho), 'linhas': int(linhas)}
+
+
+def periodo(datas):
+    """Primeira e última data de uma coluna ordenada, em ISO (ou None)."""
+    if len(datas) == 0:
+        return [None, None]
+    return [pd.Timestamp(datas.iloc[0]).isoformat(), pd.Timestamp(datas.iloc[-1]).isoformat()]
+
+
+# --- 2. HOSPITAL ---
+def esbocos_pacientes(df):
+    """
+    Um esboço HyperLogLog denso dos pacientes por mês e convénio, em bytes.
+
+    Com 120 meses e 7 convénios, são 840 esboços de 16 KB (cerca de 13 MB),
+    qualquer que seja o número de atendimentos.
+    """
+    m = 1 << PRECISAO
+    registos, ordens = registos_e_ordens(df['paciente_id'].to_numpy(), PRECISAO)
+    meses = df['data_atendimento'].to_numpy().astype('datetime64[M]').astype('datetime64[ns]')
+    celulas, chaves = pd.MultiIndex.from_arrays([meses, df['convenio'].astype(str)]).factorize(sort=True)
+    densos = np.zeros((len(chaves), m), dtype=np.uint8)
+    np.maximum.at(densos, (celulas, registos), ordens)
+    return pd.DataFrame({
+        'mes': chaves.get_level_values(0),
+        'convenio': chaves.get_level_values(1),
+        'registos': [linha.tobytes() for linha in densos],
+    })
+
+
+def snapshot_hospital(caminho):
+    """Série diária por convénio, contagens por dimensão, esboços dos pacientes e a visão geral."""
+    df = exigir(carregar_dados(caminho, colunas=[
+        'data_atendimento', 'convenio', 'valor_total_atendimento', 'paciente_id'
+    ] + DIMENSOES_VISAO_GERAL), caminho)
+    diario = pd.DataFrame({
+        'dia': df['data_atendimento'].dt.floor('D'),
+        'convenio': df['convenio'],
+        'centavos': centavos(df['valor_total_atendimento']),
+    }).groupby(['dia', 'convenio'], observed=True, sort=True).agg(
+        count=('centavos', 'size'), centavos=('centavos', 'sum')
+    ).reset_index()
+    diario['convenio'] = diario['convenio'].astype(str)
+
+    dimensoes_diario = []
+    for dimensao in DIMENSOES_VISAO_GERAL:
+        contagens = pd.DataFrame({
+            'dia': df['data_atendimento'].dt.floor('D'),
+            'convenio': df['convenio'],
+            'valor': df[dimensao],
+        }).groupby(['dia', 'convenio', 'valor'], observed=True, sort=True).size().rename('count').reset_index()
+        dimensoes_diario.append(pd.DataFrame({
+            'dia': contagens['dia'],
+            'convenio': contagens['convenio'].astype(str),
+            'dimensao': dimensao,
+            'valor': contagens['valor'].astype(str),
+            'count': contagens['count'].astype(np.int64),
+        }))
+
+    cubo = exigir(carregar_cubo_hospital(caminho), caminho)
+    dimensoes = []
+    for dimensao in DIMENSOES_VISAO_GERAL:
+        por = cubo.por(dimensao).merge(cubo.pacientes_unicos_por(dimensao), on=dimensao, how='left')
+        dimensoes.append(pd.DataFrame({
+            'dimensao': dimensao,
+            'valor': por[dimensao].astype(str),
+            'count': por['count'].astype(np.int64),
+            'centavos': centavos(por['valor_total_atendimento']),
+            'pacientes_unicos': por['pacientes_unicos'].fillna(0).astype(np.int64),
+        }))
+    visao_geral = {
+        'total_atendimentos': int(cubo.total_atendimentos()),
+        'pacientes_unicos': int(cubo.pacientes_unicos(exato=True)),
+        'faturacao_centavos': int(diario['centavos'].sum()),
+    }
+    tabelas = {
+        'hospital_diario': diario,
+        'hospital_dimensoes': pd.concat(dimensoes, ignore_index=True),
+        'hospital_dimensoes_diario': pd.concat(dimensoes_diario, ignore_index=True),
+        'hospital_pacientes': esbocos_pacientes(df),
+    }
+    return tabelas, origem(caminho, len(df)), periodo(df['data_atendimento']), visao_geral
+
+
+# --- 3. SUPPLY CHAIN ---
+def snapshot_supply_chain(caminho):
+    """Pedidos, atrasos e custos por dia, fornecedor e categoria."""
+    df = exigir(carregar_dados_supply_chain(caminho, colunas=[
+        'nome_fornecedor', 'categoria_item', 'data_pedido', 'custo_total_pedido', 'status_entrega'
+    ]), caminho)
+    diario = pd.DataFrame({
+        'dia': df['data_pedido'].dt.floor('D'),
+        'nome_fornecedor': df['nome_fornecedor'],
+        'categoria_item': df['categoria_item'],
+        'atrasados': (df['status_entrega'] == 'Atrasado').to_numpy(dtype=np.int64),
+        'centavos': centavos(df['custo_total_pedido']),
+    }).groupby(['dia', 'nome_fornecedor', 'categoria_item'], observed=True, sort=True).agg(
+        count=('centavos', 'size'), atrasados=('atrasados', 'sum'), centavos=('centavos', 'sum')
+    ).reset_index()
+    for coluna in ('nome_fornecedor', 'categoria_item'):
+        diario[coluna] = diario[coluna].astype(str)
+    return {'supply_chain_diario': diario}, origem(caminho, len(df)), periodo(df['data_pedido'])
+
+
+# --- 4. RECURSOS HUMANOS ---
+def snapshot_rh(caminho):
+    """Totais, saídas e classes dos histogramas por departamento."""
+    indice = exigir(carregar_indice('rh', caminho), caminho)
+    departamentos = indice.valores('departamento')
+    arestas = {coluna: indice.arestas(coluna, calcular_arestas) for coluna in COLUNAS_HISTOGRAMAS}
+
+    totais, saidas, classes = [], [], []
+    for departamento in departamentos:
+        filtros = {'departamento': [departamento]}
+        saiu = pd.notna(indice.coluna('data_termino', filtros))
+        totais.append({
+            'departamento': str(departamento),
+            'total': indice.contar(filtros),
+            'saidas': int(saiu.sum()),
+            'soma_idade': int(indice.coluna('idade', filtros).sum(dtype=np.int64)),
+            'soma_satisfacao': int(indice.coluna('satisfacao_trabalho', filtros).sum(dtype=np.int64)),
+            'salario_centavos': int(centavos(indice.coluna('salario_mensal', filtros)).sum()),
+        })
+        motivos = pd.Series(indice.coluna('motivo_saida', filtros)[saiu]).value_counts()
+        saidas.extend({'departamento': str(departamento), 'motivo_saida': str(motivo), 'count': int(n)}
+                      for motivo, n in motivos.items() if n > 0)
+        for coluna in COLUNAS_HISTOGRAMAS:
+            contagens, _ = np.histogram(indice.coluna(coluna, filtros), bins=arestas[coluna])
+            classes.extend({'coluna': coluna, 'departamento': str(departamento), 'classe': k, 'count': int(n)}
+                           for k, n in enumerate(contagens) if n > 0)
+
+    tabelas = {
+        'rh_departamentos': pd.DataFrame(totais, columns=[
+            'departamento', 'total', 'saidas', 'soma_idade', 'soma_satisfacao', 'salario_centavos'
+        ]),
+        'rh_saidas': pd.DataFrame(saidas, columns=['departamento', 'motivo_saida', 'count']),
+        'rh_histogramas': pd.DataFrame(classes, columns=['coluna', 'departamento', 'classe', 'count']),
+    }
+    extras = {
+        'departamentos': [str(d) for d in departamentos],
+        'arestas': {coluna: a.tolist() for coluna, a in arestas.items()},
+    }
+    return tabelas, origem(caminho, indice.n_linhas), extras
+
+
+# --- 5. EXECUÇÃO ---
+def gerar(caminho_hospital=CAMINHO_HOSPITAL, caminho_supply_chain=CAMINHO_SUPPLY_CHAIN, caminho_rh=CAMINHO_RH,
+          pasta=PASTA_SNAPSHOTS, manter=VERSOES_MANTIDAS):
+    """
+    Calcula e grava uma nova versão do snapshot.
+
+    Returns:
+        str: O nome da versão gravada.
+    """
+    inicio = time.perf_counter()
+    tabelas_h, origem_h, periodo_h, visao_geral = snapshot_hospital(caminho_hospital)
+    print(f"Hospital:         {origem_h['linhas']:>12,} linhas -> {len(tabelas_h['hospital_diario']):>8,} "
+          f"({time.perf_counter() - inicio:.1f} s)")
+
+    marca = time.perf_counter()
+    tabelas_s, origem_s, periodo_s = snapshot_supply_chain(caminho_supply_chain)
+    print(f"Supply Chain:     {origem_s['linhas']:>12,} linhas -> {len(tabelas_s['supply_chain_diario']):>8,} "
+          f"({time.perf_counter() - marca:.1f} s)")
+
+    marca = time.perf_counter()
+    tabelas_r, origem_r, extras_rh = snapshot_rh(caminho_rh)
+    print(f"Recursos Humanos: {origem_r['linhas']:>12,} linhas -> {len(tabelas_r['rh_departamentos']):>8,} "
+          f"({time.perf_counter() - marca:.1f} s)")
+
+    manifesto = {
+        'origens': {'hospital': origem_h, 'supply_chain': origem_s, 'rh': origem_r},
+        'periodos': {'hospital': periodo_h, 'supply_chain': periodo_s},
+        'visao_geral': visao_geral,
+        'dimensoes': DIMENSOES_VISAO_GERAL,
+        'precisao_pacientes': PRECISAO,
+        **extras_rh,
+    }
+    versao = gravar_snapshot({**tabelas_h, **tabelas_s, **tabelas_r}, manifesto, pasta, manter)
+    print(f"Snapshot '{versao}' gravado em {pasta} ({time.perf_counter() - inicio:.1f} s).")
+    return versao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-calcula os KPIs e as séries das páginas (modo snapshot).")
+    parser.add_argument('--pasta', default=PASTA_SNAPSHOTS, help="Pasta dos snapshots (por omissão %(default)s).")
+    parser.add_argument('--manter', type=int, default=VERSOES_MANTIDAS,
+                        help="Número de versões a manter (por omissão %(default)s).")
+    parser.add_argument('--hospital', default=CAMINHO_HOSPITAL, help="CSV dos atendimentos.")
+    parser.add_argument('--supply-chain', default=CAMINHO_SUPPLY_CHAIN, help="CSV dos pedidos.")
+    parser.add_argument('--rh', default=CAMINHO_RH, help="CSV de People Analytics.")
+    args = parser.parse_args(argv)
+    try:
+        gerar(args.hospital, args.supply_chain, args.rh, args.pasta, args.manter)
+    except FileNotFoundError as erro:
+        print(f"Erro: ficheiro de dados não encontrado: {erro}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
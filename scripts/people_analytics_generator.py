@@ -3,23 +3,28 @@
 # Arquivo: people_analytics_generator.py
 # Descrição: Script para geração de dados sintéticos focados em Recursos Humanos
 #            e análise de pessoal (People Analytics).
+#
+# A geração é colunar: cada atributo é sorteado para todos os funcionários de
+# uma só vez como um array NumPy, a partir de um gerador com semente. Milhões
+# de linhas são sorteadas em segundos (a escrita do CSV passa a dominar o
+# tempo total) e a mesma semente produz sempre o mesmo ficheiro.
+#
+# Exemplo: python scripts/people_analytics_generator.py --total 2000000 --semente 42
 # ==============================================================================
+import argparse
 import pandas as pd
-from faker import Faker
-from tqdm import tqdm
-import random
-from datetime import datetime, timedelta
+import numpy as np
+from faker.providers.person.pt_BR import Provider as ProvedorPessoasBR
+from datetime import datetime
 import os
 
-print("Iniciando a simulação de dados para People Analytics...")
-
 # --- 1. CONFIGURAÇÃO DA SIMULAÇÃO ---
-fake = Faker('pt_BR')
 TOTAL_FUNCIONARIOS = 50_000
 OUTPUT_DIR = 'data'
 OUTPUT_FILENAME = os.path.join(OUTPUT_DIR, 'people_analytics_dataset.csv')
 DATA_INICIAL_CONTRATACAO = datetime(2020, 1, 1)
 DATA_ATUAL = datetime(2025, 8, 5)
+PRIMEIRO_EMPLOYEE_ID = 1000
 
 # --- 2. DEFINIÇÃO DAS LISTAS DE DIMENSÕES ---
 DEPARTAMENTOS = ['Vendas', 'Tecnologia', 'Marketing', 'Recursos Humanos', 'Financeiro', 'Operações']
@@ -31,89 +36,168 @@ CARGOS = {
     'Financeiro': ['Analista Financeiro', 'Contabilista', 'Controller'],
     'Operações': ['Analista de Logística', 'Coordenador de Operações', 'Gerente de Operações']
 }
+GENEROS = ['Masculino', 'Feminino']
 NIVEL_SENIORIDADE = ['Júnior', 'Pleno', 'Sénior', 'Liderança']
 MOTIVO_SAIDA = ['Voluntário - Outra Oportunidade', 'Voluntário - Insatisfação', 'Involuntário - Performance', 'Involuntário - Reestruturação']
 
-# --- 3. GERAÇÃO DOS DADOS ---
-print(f"Gerando {TOTAL_FUNCIONARIOS} registos de funcionários...")
-funcionarios = []
-for i in tqdm(range(TOTAL_FUNCIONARIOS)):
-    employee_id = 1000 + i
-    nome = fake.name()
-    genero = random.choice(['Masculino', 'Feminino'])
-    idade = random.randint(18, 65)
-    departamento = random.choice(DEPARTAMENTOS)
-    cargo = random.choice(CARGOS[departamento])
-    
-    # Lógica para definir senioridade e salário base
-    if any(s in cargo for s in ['Júnior', 'Representante', 'Analista']):
-        nivel_senioridade = 'Júnior'
-        salario_base = random.uniform(2500, 4500)
-    elif any(s in cargo for s in ['Pleno', 'Especialista', 'Contabilista']):
-        nivel_senioridade = 'Pleno'
-        salario_base = random.uniform(4500, 7500)
-    elif any(s in cargo for s in ['Sénior', 'Coordenador']):
-        nivel_senioridade = 'Sénior'
-        salario_base = random.uniform(7500, 12000)
-    else: # Gerente, Diretor, Arquiteto
-        nivel_senioridade = 'Liderança'
-        salario_base = random.uniform(12000, 25000)
-        
-    salario_mensal = round(salario_base, 2)
-    
-    data_contratacao = fake.date_time_between(start_date=DATA_INICIAL_CONTRATACAO, end_date=DATA_ATUAL)
-    
-    # Simulação de Turnover (Rotatividade)
-    tempo_empresa = (DATA_ATUAL - data_contratacao).days / 365.25
-    chance_saida = 0.05 + (0.3 / (1 + tempo_empresa)) # Maior chance de sair no início
-    
-    data_termino = None
-    motivo_saida = None
-    if random.random() < chance_saida:
-        data_termino = fake.date_time_between(start_date=data_contratacao + timedelta(days=180), end_date=DATA_ATUAL)
-        motivo_saida = random.choice(MOTIVO_SAIDA)
-
-    # Simulação de Performance e Satisfação (com alguma correlação)
-    satisfacao_trabalho = random.randint(1, 5)
-    avaliacao_desempenho = satisfacao_trabalho - random.choice([-1, 0, 0, 1])
-    avaliacao_desempenho = max(1, min(5, avaliacao_desempenho)) # Garante que a nota fica entre 1 e 5
-
-    if motivo_saida and 'Insatisfação' in motivo_saida:
-        satisfacao_trabalho = random.randint(1, 2)
-    
-    horas_extras_mes = random.randint(0, 40)
-    promovido_ultimo_ano = 'Não'
-    if avaliacao_desempenho >= 4 and tempo_empresa > 1.5 and random.random() < 0.3: # 30% de chance de promoção para bons funcionários
-        promovido_ultimo_ano = 'Sim'
-
-    funcionarios.append({
-        'employee_id': employee_id,
-        'nome_completo': nome,
-        'idade': idade,
-        'genero': genero,
-        'departamento': departamento,
-        'cargo': cargo,
-        'nivel_senioridade': nivel_senioridade,
-        'data_contratacao': data_contratacao.date(),
-        'data_termino': data_termino.date() if data_termino else None,
+# Regras de senioridade: o primeiro nível cujo termo aparece no cargo.
+# Cargos sem nenhum destes termos (Gerente, Diretor, Arquiteto...) são Liderança.
+TERMOS_SENIORIDADE = [
+    ('Júnior', ['Júnior', 'Representante', 'Analista']),
+    ('Pleno', ['Pleno', 'Especialista', 'Contabilista']),
+    ('Sénior', ['Sénior', 'Coordenador']),
+]
+FAIXA_SALARIAL = {
+    'Júnior': (2500, 4500),
+    'Pleno': (4500, 7500),
+    'Sénior': (7500, 12000),
+    'Liderança': (12000, 25000),
+}
+
+
+# --- 3. TABELAS DE CONSULTA ---
+# As regras de texto são avaliadas uma única vez por cargo (são 19 cargos),
+# e não uma vez por funcionário. O resultado são arrays indexados pelo código
+# do cargo, consultados com indexação NumPy.
+def _senioridade_do_cargo(cargo):
+    for nivel, termos in TERMOS_SENIORIDADE:
+        if any(termo in cargo for termo in termos):
+            return nivel
+    return 'Liderança'
+
+
+def construir_tabelas_cargos():
+    """
+    Devolve as tabelas de consulta dos cargos.
+
+    Returns:
+        dict: 'cargos' (todos os cargos, agrupados por departamento),
+              'inicio' e 'quantidade' (posição e número de cargos de cada
+              departamento), 'nivel' (código do nível de cada cargo) e
+              'salario_min'/'salario_max' (faixa salarial de cada cargo).
+    """
+    cargos, inicio, quantidade = [], [], []
+    for departamento in DEPARTAMENTOS:
+        inicio.append(len(cargos))
+        quantidade.append(len(CARGOS[departamento]))
+        cargos.extend(CARGOS[departamento])
+    niveis = [_senioridade_do_cargo(cargo) for cargo in cargos]
+    return {
+        'cargos': np.array(cargos, dtype=object),
+        'inicio': np.array(inicio),
+        'quantidade': np.array(quantidade),
+        'nivel': np.array([NIVEL_SENIORIDADE.index(n) for n in niveis]),
+        'salario_min': np.array([FAIXA_SALARIAL[n][0] for n in niveis], dtype=float),
+        'salario_max': np.array([FAIXA_SALARIAL[n][1] for n in niveis], dtype=float),
+    }
+
+
+def _datas_entre(rng, inicio, fim):
+    """
+    Sorteia instantes uniformes entre `inicio` e `fim` (arrays datetime64[us]).
+
+    Como no `fake.date_time_between`, quando `fim` é anterior a `inicio` o
+    resultado é o próprio `inicio`.
+    """
+    inicio = inicio.astype('datetime64[us]').astype(np.int64)
+    fim = fim.astype('datetime64[us]').astype(np.int64)
+    amplitude = np.maximum(fim - inicio, 0)
+    return (inicio + (rng.random(len(inicio)) * amplitude).astype(np.int64)).astype('datetime64[us]')
+
+
+# --- 4. GERAÇÃO DOS DADOS ---
+def gerar_funcionarios(rng, total=TOTAL_FUNCIONARIOS):
+    """
+    Gera o dataset de funcionários de forma colunar.
+
+    Args:
+        rng (numpy.random.Generator): Gerador aleatório (com semente).
+        total (int): Número de funcionários.
+
+    Returns:
+        pandas.DataFrame: Um funcionário por linha.
+    """
+    tabelas = construir_tabelas_cargos()
+    primeiros = np.array(ProvedorPessoasBR.first_names, dtype=object)
+    apelidos = np.array(ProvedorPessoasBR.last_names, dtype=object)
+    nomes = primeiros[rng.integers(0, len(primeiros), total)] + ' ' + apelidos[rng.integers(0, len(apelidos), total)]
+
+    generos = np.take(GENEROS, rng.integers(0, len(GENEROS), total))
+    idades = rng.integers(18, 66, total)
+
+    # Departamento uniforme; cargo uniforme dentro do departamento.
+    departamento = rng.integers(0, len(DEPARTAMENTOS), total)
+    cargo = tabelas['inicio'][departamento] + (rng.random(total) * tabelas['quantidade'][departamento]).astype(np.int64)
+    nivel = tabelas['nivel'][cargo]
+    salario_min, salario_max = tabelas['salario_min'][cargo], tabelas['salario_max'][cargo]
+    salario_mensal = np.round(salario_min + rng.random(total) * (salario_max - salario_min), 2)
+
+    # Contratação e tempo de empresa.
+    data_atual = np.full(total, np.datetime64(DATA_ATUAL, 'us'))
+    data_contratacao = _datas_entre(rng, np.full(total, np.datetime64(DATA_INICIAL_CONTRATACAO, 'us')), data_atual)
+    tempo_empresa = (data_atual - data_contratacao).astype('timedelta64[D]').astype(np.int64) / 365.25
+
+    # Simulação de Turnover (Rotatividade): maior chance de sair no início.
+    chance_saida = 0.05 + (0.3 / (1 + tempo_empresa))
+    saiu = rng.random(total) < chance_saida
+    data_termino = _datas_entre(rng, data_contratacao + np.timedelta64(180, 'D'), data_atual)
+    data_termino = np.where(saiu, data_termino, np.datetime64('NaT'))
+    motivo = rng.integers(0, len(MOTIVO_SAIDA), total)
+    motivo_saida = np.where(saiu, np.take(MOTIVO_SAIDA, motivo).astype(object), None)
+
+    # Simulação de Performance e Satisfação (com alguma correlação).
+    satisfacao_trabalho = rng.integers(1, 6, total)
+    avaliacao_desempenho = np.clip(satisfacao_trabalho - rng.choice([-1, 0, 0, 1], total), 1, 5)
+    insatisfeito = saiu & (motivo == MOTIVO_SAIDA.index('Voluntário - Insatisfação'))
+    satisfacao_trabalho = np.where(insatisfeito, rng.integers(1, 3, total), satisfacao_trabalho)
+
+    horas_extras_mes = rng.integers(0, 41, total)
+    # 30% de chance de promoção para bons funcionários.
+    promovido = (avaliacao_desempenho >= 4) & (tempo_empresa > 1.5) & (rng.random(total) < 0.3)
+
+    return pd.DataFrame({
+        'employee_id': np.arange(PRIMEIRO_EMPLOYEE_ID, PRIMEIRO_EMPLOYEE_ID + total),
+        'nome_completo': nomes,
+        'idade': idades,
+        'genero': generos,
+        'departamento': np.take(DEPARTAMENTOS, departamento),
+        'cargo': tabelas['cargos'][cargo],
+        'nivel_senioridade': np.take(NIVEL_SENIORIDADE, nivel),
+        'data_contratacao': data_contratacao.astype('datetime64[D]'),
+        'data_termino': data_termino.astype('datetime64[D]'),
         'motivo_saida': motivo_saida,
         'salario_mensal': salario_mensal,
         'avaliacao_desempenho_anual': avaliacao_desempenho,
         'satisfacao_trabalho': satisfacao_trabalho,
         'horas_extras_mes': horas_extras_mes,
-        'promovido_ultimo_ano': promovido_ultimo_ano,
-        'tempo_empresa_anos': round(tempo_empresa, 2)
+        'promovido_ultimo_ano': np.where(promovido, 'Sim', 'Não'),
+        'tempo_empresa_anos': np.round(tempo_empresa, 2),
     })
 
-df_funcionarios = pd.DataFrame(funcionarios)
 
-# --- 4. EXPORTAÇÃO PARA CSV ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-df_funcionarios.to_csv(OUTPUT_FILENAME, index=False, sep=';', decimal=',')
+# --- 5. EXPORTAÇÃO PARA CSV ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o dataset sintético de People Analytics.")
+    parser.add_argument('--total', type=int, default=TOTAL_FUNCIONARIOS,
+                        help=f"Número de funcionários (por omissão, {TOTAL_FUNCIONARIOS:,}).")
+    parser.add_argument('--semente', type=int, default=None,
+                        help="Semente aleatória, para resultados reprodutíveis.")
+    parser.add_argument('--saida', default=OUTPUT_FILENAME, help="Ficheiro CSV a gerar.")
+    args = parser.parse_args(argv)
+
+    print("Iniciando a simulação de dados para People Analytics...")
+    print(f"Gerando {args.total} registos de funcionários...")
+    df_funcionarios = gerar_funcionarios(np.random.default_rng(args.semente), args.total)
+
+    os.makedirs(os.path.dirname(args.saida) or '.', exist_ok=True)
+    df_funcionarios.to_csv(args.saida, index=False, sep=';', decimal=',')
+
+    print("\n==========================================================")
+    print("PROJETO PEOPLE ANALYTICS - GERAÇÃO DE DADOS CONCLUÍDA!")
+    print(f"Dataset com {len(df_funcionarios)} linhas foi gerado.")
+    print(f"Arquivo salvo como: {args.saida}")
+    print("==========================================================")
 
-print("\n==========================================================")
-print("PROJETO PEOPLE ANALYTICS - GERAÇÃO DE DADOS CONCLUÍDA!")
-print(f"Dataset com {len(df_funcionarios)} linhas foi gerado.")
-print(f"Arquivo salvo como: {OUTPUT_FILENAME}")
-print("==========================================================")
 
+if __name__ == '__main__':
+    main()
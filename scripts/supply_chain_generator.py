@@ -4,23 +4,26 @@
 # Localização: /hospital_vida_plena_dashboard/scripts/
 # Descrição: Script para geração de dados sintéticos focados na cadeia de
 #            suprimentos (Supply Chain) do hospital.
+#
+# A geração é colunar: cada coluna é sorteada para todos os pedidos de uma só
+# vez como um array NumPy, a partir de um gerador com semente, e as datas de
+# entrega são calculadas com aritmética de arrays datetime64.
+#
+# Exemplo: python scripts/supply_chain_generator.py --total 5000000 --semente 42
 # ==============================================================================
+import argparse
 import pandas as pd
-from faker import Faker
-from tqdm import tqdm
-import random
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
 import os
 
-print("Iniciando a simulação da Cadeia de Suprimentos do Hospital Vida Plena...")
-
 # --- 1. CONFIGURAÇÃO DA SIMULAÇÃO ---
-fake = Faker('pt_BR')
 TOTAL_PEDIDOS = 50_000
 OUTPUT_DIR = 'data'
 OUTPUT_FILENAME = os.path.join(OUTPUT_DIR, 'hospital_supply_chain_dataset.csv')
 DATA_INICIAL = datetime(2015, 1, 1)
 DATA_FINAL = datetime(2024, 12, 31)
+PRIMEIRO_PEDIDO_ID = 500000
 
 # --- 2. DEFINIÇÃO DAS LISTAS DE DIMENSÕES ---
 FORNECEDORES = [
@@ -30,6 +33,7 @@ FORNECEDORES = [
     {'fornecedor_id': 104, 'nome_fornecedor': 'CleanHealth Insumos'}
 ]
 STATUS_ENTREGA = ['Entregue', 'Pendente', 'Atrasado']
+PESOS_STATUS_ENTREGA = [0.85, 0.05, 0.10]
 
 # Catálogo de Produtos
 PRODUTOS = [
@@ -42,52 +46,86 @@ PRODUTOS = [
     {'item_id': 2007, 'nome_item': 'Gaze Estéril (pacote c/ 100)', 'categoria': 'Material Cirúrgico', 'custo_base': 25.00}
 ]
 
+
 # --- 3. GERAÇÃO DOS DADOS ---
-print(f"Gerando {TOTAL_PEDIDOS} registos de pedidos...")
-pedidos = []
-for i in tqdm(range(TOTAL_PEDIDOS)):
-    pedido_id = 500000 + i
-    produto = random.choice(PRODUTOS)
-    fornecedor = random.choice(FORNECEDORES)
-    data_pedido = fake.date_time_between(start_date=DATA_INICIAL, end_date=DATA_FINAL)
-    quantidade = random.randint(10, 500)
-    
+def _coluna(registos, chave):
+    """Extrai um atributo do catálogo como array, indexável por código."""
+    return np.array([registo[chave] for registo in registos], dtype=object)
+
+
+def gerar_pedidos(rng, total=TOTAL_PEDIDOS):
+    """
+    Gera o dataset de pedidos de forma colunar.
+
+    Args:
+        rng (numpy.random.Generator): Gerador aleatório (com semente).
+        total (int): Número de pedidos.
+
+    Returns:
+        pandas.DataFrame: Um pedido por linha.
+    """
+    produto = rng.integers(0, len(PRODUTOS), total)
+    fornecedor = rng.integers(0, len(FORNECEDORES), total)
+
+    inicio_us = np.datetime64(DATA_INICIAL, 'us').astype(np.int64)
+    fim_us = np.datetime64(DATA_FINAL, 'us').astype(np.int64)
+    data_pedido = rng.integers(inicio_us, fim_us, total, endpoint=True).astype('datetime64[us]')
+    quantidade = rng.integers(10, 501, total)
+
     # Simula uma pequena variação no custo
-    custo_unitario = round(produto['custo_base'] * random.uniform(0.95, 1.05), 2)
-    custo_total = quantidade * custo_unitario
-    
-    status = random.choices(STATUS_ENTREGA, weights=[0.85, 0.05, 0.10], k=1)[0]
-    data_entrega_prevista = data_pedido + timedelta(days=random.randint(7, 20))
-    data_entrega_real = None
-    if status == 'Entregue':
-        data_entrega_real = data_entrega_prevista - timedelta(days=random.randint(0, 3))
-    elif status == 'Atrasado':
-        data_entrega_real = data_entrega_prevista + timedelta(days=random.randint(1, 10))
-
-    pedidos.append({
-        'pedido_id': pedido_id,
-        'item_id': produto['item_id'],
-        'nome_item': produto['nome_item'],
-        'categoria_item': produto['categoria'],
-        'fornecedor_id': fornecedor['fornecedor_id'],
-        'nome_fornecedor': fornecedor['nome_fornecedor'],
+    custo_base = _coluna(PRODUTOS, 'custo_base').astype(float)[produto]
+    custo_unitario = np.round(custo_base * rng.uniform(0.95, 1.05, total), 2)
+    custo_total = np.round(quantidade * custo_unitario, 2)
+
+    status = rng.choice(len(STATUS_ENTREGA), size=total, p=PESOS_STATUS_ENTREGA)
+    dias = lambda minimo, maximo: rng.integers(minimo, maximo + 1, total).astype('timedelta64[D]')
+    data_entrega_prevista = data_pedido + dias(7, 20)
+    data_entrega_real = np.select(
+        [status == STATUS_ENTREGA.index('Entregue'), status == STATUS_ENTREGA.index('Atrasado')],
+        [data_entrega_prevista - dias(0, 3), data_entrega_prevista + dias(1, 10)],
+        default=np.datetime64('NaT')
+    )
+
+    return pd.DataFrame({
+        'pedido_id': np.arange(PRIMEIRO_PEDIDO_ID, PRIMEIRO_PEDIDO_ID + total),
+        'item_id': _coluna(PRODUTOS, 'item_id').astype(np.int64)[produto],
+        'nome_item': _coluna(PRODUTOS, 'nome_item')[produto],
+        'categoria_item': _coluna(PRODUTOS, 'categoria')[produto],
+        'fornecedor_id': _coluna(FORNECEDORES, 'fornecedor_id').astype(np.int64)[fornecedor],
+        'nome_fornecedor': _coluna(FORNECEDORES, 'nome_fornecedor')[fornecedor],
         'data_pedido': data_pedido,
         'quantidade_pedida': quantidade,
         'custo_unitario': custo_unitario,
-        'custo_total_pedido': round(custo_total, 2),
-        'status_entrega': status,
+        'custo_total_pedido': custo_total,
+        'status_entrega': np.take(STATUS_ENTREGA, status),
         'data_entrega_prevista': data_entrega_prevista,
         'data_entrega_real': data_entrega_real
     })
 
-df_pedidos = pd.DataFrame(pedidos)
 
 # --- 4. EXPORTAÇÃO PARA CSV ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-df_pedidos.to_csv(OUTPUT_FILENAME, index=False, sep=';', decimal=',')
-
-print("\n==========================================================")
-print("PROJETO HOSPITAL VIDA PLENA - GERAÇÃO DE DADOS DE SUPPLY CHAIN CONCLUÍDA!")
-print(f"Dataset com {len(df_pedidos)} linhas foi gerado.")
-print(f"Arquivo salvo como: {OUTPUT_FILENAME}")
-print("==========================================================")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o dataset sintético de Supply Chain do hospital.")
+    parser.add_argument('--total', type=int, default=TOTAL_PEDIDOS,
+                        help=f"Número de pedidos (por omissão, {TOTAL_PEDIDOS:,}).")
+    parser.add_argument('--semente', type=int, default=None,
+                        help="Semente aleatória, para resultados reprodutíveis.")
+    parser.add_argument('--saida', default=OUTPUT_FILENAME, help="Ficheiro CSV a gerar.")
+    args = parser.parse_args(argv)
+
+    print("Iniciando a simulação da Cadeia de Suprimentos do Hospital Vida Plena...")
+    print(f"Gerando {args.total} registos de pedidos...")
+    df_pedidos = gerar_pedidos(np.random.default_rng(args.semente), args.total)
+
+    os.makedirs(os.path.dirname(args.saida) or '.', exist_ok=True)
+    df_pedidos.to_csv(args.saida, index=False, sep=';', decimal=',')
+
+    print("\n==========================================================")
+    print("PROJETO HOSPITAL VIDA PLENA - GERAÇÃO DE DADOS DE SUPPLY CHAIN CONCLUÍDA!")
+    print(f"Dataset com {len(df_pedidos)} linhas foi gerado.")
+    print(f"Arquivo salvo como: {args.saida}")
+    print("==========================================================")
+
+
+if __name__ == '__main__':
+    main()
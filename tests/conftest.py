@@ -0,0 +1,73 @@
+# ==============================================================================
+# Arquivo: conftest.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Dados de teste partilhados. Os datasets são gerados com as
+#            funções vetorizadas dos scripts do projeto (com semente fixa e
+#            poucas linhas) e gravados no formato dos CSV de produção
+#            (sep=';', decimal=','), numa pasta temporária por sessão.
+#
+#            Correr a partir da raiz do projeto:
+#                python -m pytest -q
+# ==============================================================================
+import os
+import sys
+import numpy as np
+import pytest
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_SCRIPTS = os.path.join(RAIZ_PROJETO, 'scripts')
+if PASTA_SCRIPTS not in sys.path:
+    sys.path.insert(0, PASTA_SCRIPTS)
+
+import data_generator  # noqa: E402
+import people_analytics_generator  # noqa: E402
+import supply_chain_generator  # noqa: E402
+
+SEMENTE = 42
+LINHAS = {'hospital': 4000, 'supply_chain': 2000, 'rh': 2000}
+NUM_PACIENTES = 800
+
+
+# --- 1. Geração ---
+def gravar_csv(df, caminho):
+    """Grava um DataFrame como os geradores do projeto gravam os CSV."""
+    df.to_csv(caminho, index=False, sep=';', decimal=',')
+    return str(caminho)
+
+
+def gerar_hospital(total, semente=SEMENTE, primeiro_id=0):
+    """Os atendimentos e a dimensão de pacientes, como no modo vetorizado."""
+    rng = np.random.default_rng(semente)
+    pacientes = data_generator.gerar_pacientes_vetorizado(rng, NUM_PACIENTES)
+    atendimentos = data_generator.gerar_lote_vetorizado(
+        rng, 0, total, pacientes['paciente_id'].to_numpy(), primeiro_id=primeiro_id
+    )
+    return atendimentos, pacientes
+
+
+def gerar_supply_chain(total, semente=SEMENTE):
+    return supply_chain_generator.gerar_pedidos(np.random.default_rng(semente), total)
+
+
+def gerar_rh(total, semente=SEMENTE):
+    return people_analytics_generator.gerar_funcionarios(np.random.default_rng(semente), total)
+
+
+# --- 2. Fixtures ---
+@pytest.fixture(scope='session')
+def dados(tmp_path_factory):
+    """
+    Os três datasets gravados numa pasta temporária partilhada pela sessão.
+
+    Returns:
+        dict: {'hospital', 'supply_chain', 'rh'} -> caminho do CSV. Os testes
+              não devem alterar estes ficheiros (usem `tmp_path`).
+    """
+    pasta = tmp_path_factory.mktemp('data')
+    atendimentos, pacientes = gerar_hospital(LINHAS['hospital'])
+    gravar_csv(pacientes, pasta / os.path.basename(data_generator.PACIENTES_FILENAME))
+    return {
+        'hospital': gravar_csv(atendimentos, pasta / 'hospital.csv'),
+        'supply_chain': gravar_csv(gerar_supply_chain(LINHAS['supply_chain']), pasta / 'supply_chain.csv'),
+        'rh': gravar_csv(gerar_rh(LINHAS['rh']), pasta / 'rh.csv'),
+    }
@@ -0,0 +1,146 @@
+# ==============================================================================
+# Arquivo: test_data_loader.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes dos loaders: invalidação do cache pela impressão digital
+#            dos ficheiros e ingestão incremental com uma linha incompleta.
+# ==============================================================================
+import os
+import pytest
+from modules import data_loader
+from tests.conftest import data_generator, gerar_hospital, gerar_supply_chain, gravar_csv
+
+
+def _editar_fora_da_amostra(caminho, antigo, novo):
+    """
+    Substitui, no mesmo sítio e com o mesmo tamanho, a primeira ocorrência de
+    `antigo` que fica fora dos blocos lidos por `_hash_amostrado`.
+    """
+    tamanho = os.path.getsize(caminho)
+    bloco = data_loader.TAMANHO_BLOCO_AMOSTRA
+    ultimo = tamanho - bloco
+    inicios = [ultimo * i // (data_loader.NUM_BLOCOS_AMOSTRA - 1) for i in range(data_loader.NUM_BLOCOS_AMOSTRA)]
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    posicao = conteudo.index(antigo, inicios[1] + bloco)
+    assert posicao + len(antigo) <= inicios[2], "o ficheiro de teste é pequeno demais"
+    info = os.stat(caminho)
+    with open(caminho, 'r+b') as f:
+        f.seek(posicao)
+        f.write(novo)
+    # Em sistemas de ficheiros com datas de baixa resolução, a escrita pode
+    # manter o mtime: avançamo-lo explicitamente.
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert os.path.getsize(caminho) == tamanho
+
+
+def test_impressao_digital_muda_com_edicao_no_mesmo_tamanho(tmp_path):
+    caminho = gravar_csv(gerar_supply_chain(20_000), tmp_path / 'supply_chain.csv')
+    antes = data_loader.impressao_digital(caminho)
+    _editar_fora_da_amostra(caminho, b';Pendente;', b';Atrasado;')
+    assert data_loader.impressao_digital(caminho) != antes
+
+
+def test_sidecar_recarregado_apos_edicao_no_mesmo_tamanho(tmp_path):
+    caminho = gravar_csv(gerar_supply_chain(20_000), tmp_path / 'supply_chain.csv')
+    antes = data_loader.carregar_dados_supply_chain(caminho, colunas=['status_entrega'])
+    atrasados = int((antes['status_entrega'] == 'Atrasado').sum())
+    assert os.path.exists(data_loader._caminho_sidecar(caminho))
+
+    _editar_fora_da_amostra(caminho, b';Pendente;', b';Atrasado;')
+    depois = data_loader.carregar_dados_supply_chain(caminho, colunas=['status_entrega'])
+    assert int((depois['status_entrega'] == 'Atrasado').sum()) == atrasados + 1
+
+
+def test_ingestao_incremental_recarregada_apos_edicao_no_mesmo_tamanho(tmp_path):
+    atendimentos, _ = gerar_hospital(30_000)
+    caminho = gravar_csv(atendimentos, tmp_path / 'hospital.csv')
+    antes = data_loader.carregar_dados(caminho, colunas=['status_pagamento'])
+    atrasados = int((antes['status_pagamento'] == 'Atrasado').sum())
+    geracao = data_loader.obter_estado_ingestao(caminho)['geracao']
+
+    _editar_fora_da_amostra(caminho, b';Pendente\n', b';Atrasado\n')
+    depois = data_loader.carregar_dados(caminho, colunas=['status_pagamento'])
+    assert int((depois['status_pagamento'] == 'Atrasado').sum()) == atrasados + 1
+    assert data_loader.obter_estado_ingestao(caminho)['geracao'] == geracao + 1
+
+    # Um processo novo (estado em memória vazio) também não reaproveita o sidecar.
+    data_loader._estados_ingestao.pop(caminho)
+    data_loader.shared_store.limpar()
+    frio = data_loader.carregar_dados(caminho, colunas=['status_pagamento'])
+    assert int((frio['status_pagamento'] == 'Atrasado').sum()) == atrasados + 1
+
+
+def test_toque_sem_mudanca_de_conteudo_mantem_os_dados(tmp_path):
+    caminho = gravar_csv(gerar_supply_chain(1_000), tmp_path / 'supply_chain.csv')
+    antes = data_loader.carregar_dados_supply_chain(caminho)
+    info = os.stat(caminho)
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    depois = data_loader.carregar_dados_supply_chain(caminho)
+    assert depois.equals(antes)
+
+
+# --- Ingestão com a última linha ainda a ser escrita ---
+def _linhas_csv(df):
+    """As linhas de dados de `df` tal como os geradores as escrevem."""
+    return df.to_csv(index=False, header=False, sep=';', decimal=',').encode().splitlines(keepends=True)
+
+
+@pytest.mark.parametrize('corte', [3, -3], ids=['meio_do_id', 'meio_do_status'])
+def test_ingestao_completa_ignora_linha_parcial(tmp_path, corte):
+    atendimentos, _ = gerar_hospital(2_002)
+    existentes, seguintes = atendimentos.iloc[:2_000], atendimentos.iloc[2_000:]
+    caminho = gravar_csv(existentes, tmp_path / 'hospital.csv')
+    linha, outra = _linhas_csv(seguintes)
+    parcial = linha[:corte] if corte > 0 else linha[:corte - 1]
+    with open(caminho, 'ab') as f:
+        f.write(parcial)
+
+    df = data_loader.carregar_dados(caminho)
+    assert len(df) == 2_000
+    assert set(df['status_pagamento'].unique()) <= {'Pago', 'Pendente', 'Atrasado', 'Cancelado'}
+    assert data_loader.obter_estado_ingestao(caminho)['offset'] == os.path.getsize(caminho) - len(parcial)
+
+    # O gerador acaba a linha e escreve a seguinte.
+    with open(caminho, 'ab') as f:
+        f.write(linha[len(parcial):] + outra)
+    esperado = data_loader._ler_csv(caminho, data_loader.ESQUEMA_HOSPITAL)
+    esperado = data_loader._ordenar_por_data(esperado, 'data_atendimento')
+    df = data_loader.carregar_dados(caminho)
+    assert len(df) == 2_002
+    assert df.equals(esperado)
+
+    # Um arranque a frio reaproveita o sidecar (com o offset correto).
+    data_loader._estados_ingestao.pop(caminho)
+    data_loader.shared_store.limpar()
+    assert data_loader.carregar_dados(caminho).equals(esperado)
+
+
+# --- Consultas por período ---
+def test_periodos_nao_descartam_o_dataset_completo(dados):
+    caminho = dados['hospital']
+    data_loader.carregar_dados(caminho)
+    chaves = set(data_loader.shared_store._entradas['datasets'])
+    for ano in range(2015, 2025):
+        periodo = data_loader.carregar_dados_periodo(caminho, f'{ano}-01-01', f'{ano}-04-01', ['convenio'])
+        assert len(periodo) > 0
+    assert chaves <= set(data_loader.shared_store._entradas['datasets'])
+
+
+# --- Parquet do gerador ---
+def test_parquet_do_gerador_igual_ao_csv(tmp_path):
+    pytest.importorskip('pyarrow')
+    atendimentos, pacientes = gerar_hospital(3_000)
+    gravar_csv(pacientes, tmp_path / data_loader.NOME_ARQUIVO_PACIENTES)
+    caminho_csv = gravar_csv(atendimentos, tmp_path / 'hospital.csv')
+    caminho_parquet = str(tmp_path / 'hospital.parquet')
+    escritor = data_generator.EscritorParquet(caminho_parquet)
+    escritor.escrever(atendimentos)
+    escritor.fechar()
+
+    assert data_loader.carregar_dados(caminho_parquet).equals(data_loader.carregar_dados(caminho_csv))
+    colunas = ['convenio', 'valor_total_atendimento', 'nome_paciente']
+    parquet = data_loader.carregar_dados(caminho_parquet, colunas=colunas)
+    assert list(parquet.columns) == colunas
+    assert parquet.equals(data_loader.carregar_dados(caminho_csv, colunas=colunas))
+    periodo = data_loader.carregar_dados_periodo(caminho_parquet, '2020-01-01', '2021-01-01')
+    assert periodo.equals(data_loader.carregar_dados_periodo(caminho_csv, '2020-01-01', '2021-01-01'))
@@ -0,0 +1,100 @@
+# ==============================================================================
+# Arquivo: test_exportacao.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes da exportação: os ficheiros exportados voltam a ser lidos
+#            pelos loaders com as linhas da seleção, e as exportações falhadas
+#            ou expiradas não ficam para trás.
+# ==============================================================================
+import os
+import time
+import pandas as pd
+import pytest
+from modules import exportacao
+from modules.data_loader import carregar_dados, carregar_dados_rh, fatiar_periodo
+from tests.conftest import LINHAS, gerar_rh, gravar_csv
+
+
+@pytest.fixture(autouse=True)
+def pasta_estatica(tmp_path, monkeypatch):
+    """Exportações isoladas numa pasta temporária, sem estado de outros testes."""
+    monkeypatch.setattr(exportacao, 'PASTA_ESTATICA', str(tmp_path / 'static'))
+    monkeypatch.setattr(exportacao, '_exportacoes', {})
+    monkeypatch.setattr(exportacao, '_por_id', {})
+    return tmp_path / 'static' / exportacao.SUBPASTA_EXPORTACOES
+
+
+def _esperar(pedido, limite=30):
+    inicio = time.monotonic()
+    while pedido.estado not in ('pronto', 'erro'):
+        assert time.monotonic() - inicio < limite, "A exportação não terminou."
+        time.sleep(0.01)
+    return pedido
+
+
+def _comparar(lido, esperado):
+    pd.testing.assert_frame_equal(lido.reset_index(drop=True), esperado.reset_index(drop=True),
+                                  check_categorical=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_exportacao_do_hospital_volta_a_ser_lida(dados, formato):
+    filtros, inicio, fim = {'convenio': ['Amil', 'SUS']}, '2020-01-01', '2023-01-01'
+    pedido = _esperar(exportacao.iniciar_exportacao('hospital', dados['hospital'], formato, filtros, inicio, fim))
+    assert pedido.estado == 'pronto', pedido.erro
+
+    df = fatiar_periodo(carregar_dados(dados['hospital']), inicio, fim, 'data_atendimento')
+    esperado = df[df['convenio'].isin(filtros['convenio'])]
+    assert pedido.total == len(esperado) > 0
+    _comparar(carregar_dados(pedido.caminho), esperado)
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_exportacao_de_rh_volta_a_ser_lida(dados, formato):
+    filtros = {'departamento': ['Vendas']}
+    pedido = _esperar(exportacao.iniciar_exportacao('rh', dados['rh'], formato, filtros))
+    assert pedido.estado == 'pronto', pedido.erro
+
+    df = carregar_dados_rh(dados['rh'])
+    _comparar(carregar_dados_rh(pedido.caminho), df[df['departamento'] == 'Vendas'])
+
+
+def test_exportacao_falhada_sai_do_registo_ao_ser_substituida(dados, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setitem(exportacao._ESCRITORES, 'csv', falhar)
+    falhada = _esperar(exportacao.iniciar_exportacao('rh', dados['rh'], 'csv'))
+    assert falhada.estado == 'erro'
+
+    monkeypatch.setitem(exportacao._ESCRITORES, 'csv', exportacao.escrever_csv)
+    nova = _esperar(exportacao.iniciar_exportacao('rh', dados['rh'], 'csv'))
+    assert nova.estado == 'pronto'
+    assert exportacao.obter_exportacao(falhada.id) is None
+    assert exportacao.obter_exportacao(nova.id) is nova
+
+
+def test_exportacao_falha_se_os_dados_mudarem_depois_do_pedido(tmp_path):
+    caminho = gravar_csv(gerar_rh(LINHAS['rh']), tmp_path / 'rh.csv')
+    chave = exportacao.chave_exportacao('rh', caminho, 'csv')
+
+    # O ficheiro muda antes de a thread começar, com o mesmo número de linhas.
+    gravar_csv(gerar_rh(LINHAS['rh'], semente=7), caminho)
+    instante = os.stat(caminho).st_mtime + 1
+    os.utime(caminho, (instante, instante))
+
+    pedido = exportacao.Exportacao(chave, 'rh.csv')
+    exportacao._executar(pedido, 'rh', caminho, chave[2], 'csv', None, None, None)
+    assert pedido.estado == 'erro' and "Os dados mudaram" in pedido.erro
+    assert not os.path.exists(pedido.pasta)
+
+
+def test_pastas_expiradas_apagadas_no_arranque(pasta_estatica):
+    antiga, recente = pasta_estatica / 'antiga', pasta_estatica / 'recente'
+    for pasta in (antiga, recente):
+        pasta.mkdir(parents=True)
+        (pasta / 'dados.csv').write_text('a;b\n')
+    expirada = time.time() - exportacao.VALIDADE_SEGUNDOS - 60
+    os.utime(antiga, (expirada, expirada))
+
+    assert exportacao.limpar_pastas_expiradas() == ['antiga']
+    assert not antiga.exists() and recente.exists()
@@ -0,0 +1,64 @@
+# ==============================================================================
+# Arquivo: test_filter_index.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes do índice de filtros: um índice por versão dos dados,
+#            bitmaps e valores em falta nas agregações por grupo.
+# ==============================================================================
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from modules.data_loader import carregar_dados_rh
+from modules.filter_index import IndiceFiltros, carregar_indice
+from tests.conftest import LINHAS, gerar_rh, gravar_csv
+
+
+def test_um_indice_por_versao_com_colunas_preguicosas(dados):
+    indice = carregar_indice('rh', dados['rh'])
+    idades = indice.coluna('idade', {'departamento': [indice.valores('departamento')[0]]})
+    salarios = indice.coluna('salario_mensal')
+
+    # Pedir outras colunas não cria um segundo índice.
+    assert carregar_indice('rh', dados['rh']) is indice
+    df = carregar_dados_rh(dados['rh'])
+    esperado = df.loc[df['departamento'] == indice.valores('departamento')[0], 'idade'].to_numpy()
+    np.testing.assert_array_equal(idades, esperado)
+    np.testing.assert_array_equal(salarios, df['salario_mensal'].to_numpy())
+
+
+def test_coluna_de_outra_versao_com_as_mesmas_linhas(tmp_path):
+    caminho = gravar_csv(gerar_rh(LINHAS['rh']), tmp_path / 'rh.csv')
+    indice = carregar_indice('rh', caminho)
+
+    # Mesmo número de linhas, outros valores (e outro mtime).
+    alterado = gerar_rh(LINHAS['rh'], semente=7)
+    gravar_csv(alterado, caminho)
+    instante = os.stat(caminho).st_mtime + 1
+    os.utime(caminho, (instante, instante))
+
+    with pytest.raises(RuntimeError, match="Os dados mudaram"):
+        indice.coluna('salario_mensal')
+    novo = carregar_indice('rh', caminho)
+    assert novo is not indice
+    np.testing.assert_array_equal(novo.coluna('salario_mensal'), carregar_dados_rh(caminho)['salario_mensal'])
+
+
+def test_bitmaps_iguais_as_mascaras(dados):
+    indice = carregar_indice('hospital', dados['hospital'])
+    df = pd.read_csv(dados['hospital'], sep=';', usecols=['data_atendimento', 'convenio'], parse_dates=['data_atendimento'])
+    df = df.sort_values('data_atendimento', kind='stable')
+    for convenio in indice.valores('convenio'):
+        mascara = indice.mascara({'convenio': [convenio]})
+        np.testing.assert_array_equal(mascara, (df['convenio'] == convenio).to_numpy())
+
+
+def test_valores_em_falta_ficam_fora_dos_grupos():
+    df = pd.DataFrame({'grupo': ['a', None, 'b', 'a', None], 'valor': [1.0, 10.0, 2.0, 3.0, 20.0]})
+    indice = IndiceFiltros(df, ['grupo'])
+
+    somas = indice.somar_por('grupo', 'valor')
+    assert somas['grupo'].tolist() == ['a', 'b']
+    assert somas['valor'].tolist() == [4.0, 2.0]
+    contagens = indice.contar_por('grupo', intervalo=(0, 5))
+    assert contagens['count'].tolist() == [2, 1]
+    assert indice.contar({'grupo': ['a', 'b']}) == 3
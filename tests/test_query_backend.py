@@ -0,0 +1,36 @@
+# ==============================================================================
+# Arquivo: test_query_backend.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes dos motores de consulta: paridade pandas/DuckDB em todas
+#            as consultas das páginas (incluindo seleções filtradas e vazias)
+#            e escolha do motor sem o DuckDB instalado.
+# ==============================================================================
+import pytest
+from modules import query_backend
+
+CONSULTAS = [descricao for descricao, _ in query_backend._consultas_paridade()]
+
+
+@pytest.mark.parametrize('descricao', CONSULTAS)
+def test_paridade_pandas_duckdb(dados, descricao):
+    pytest.importorskip('duckdb')
+    consulta = dict(query_backend._consultas_paridade(dados))[descricao]
+    resultado_pandas = consulta(query_backend.obter_motor('pandas'))
+    resultado_duckdb = consulta(query_backend.obter_motor('duckdb'))
+    assert query_backend._iguais(resultado_pandas, resultado_duckdb), (resultado_pandas, resultado_duckdb)
+
+
+def test_selecoes_vazias_devolvem_zero(dados):
+    motor = query_backend.obter_motor('pandas')
+    kpis = motor.kpis_hospital(caminho=dados['hospital'], convenios=[])
+    assert kpis['total_atendimentos'] == 0 and kpis['faturacao_total'] == 0
+    assert len(motor.serie_hospital('D', caminho=dados['hospital'], convenios=[])) == 0
+
+
+def test_motor_duckdb_sem_o_pacote_usa_pandas(monkeypatch):
+    monkeypatch.setattr(query_backend, 'duckdb', None)
+    monkeypatch.setattr(query_backend, '_motores', {})
+    monkeypatch.setenv(query_backend.VARIAVEL_MOTOR, 'duckdb')
+    assert query_backend.obter_motor().nome == 'pandas'
+    with pytest.raises(ImportError):
+        query_backend.obter_motor('duckdb')
@@ -0,0 +1,58 @@
+# ==============================================================================
+# Arquivo: test_rollup.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes do cubo do hospital: contagens exatas de pacientes por
+#            omissão, cache limitada dessas contagens e cubos incrementais
+#            apenas sobre uma geração estável da ingestão.
+# ==============================================================================
+from modules import rollup
+from modules.data_loader import carregar_dados
+from modules.rollup import carregar_cubo_hospital, construir_cubo_hospital
+from tests.conftest import LINHAS, gerar_hospital, gravar_csv
+
+
+def test_pacientes_unicos_exato_por_omissao(dados):
+    df = carregar_dados(dados['hospital'], colunas=rollup.COLUNAS_CUBO)
+    cubo = construir_cubo_hospital(df)
+    convenio = cubo.valores('convenio')[0]
+
+    assert cubo.pacientes_unicos() == df['paciente_id'].nunique()
+    assert (cubo.pacientes_unicos({'convenio': [convenio]})
+            == df.loc[df['convenio'] == convenio, 'paciente_id'].nunique())
+    estimativa = cubo.pacientes_unicos(exato=False)
+    assert abs(estimativa - cubo.pacientes_unicos()) <= 0.05 * cubo.pacientes_unicos()
+
+
+def test_cache_de_distintos_limitada(dados, monkeypatch):
+    monkeypatch.setattr(rollup, 'MAX_DISTINTOS_EM_CACHE', 3)
+    cubo = construir_cubo_hospital(carregar_dados(dados['hospital'], colunas=rollup.COLUNAS_CUBO))
+    for setor in cubo.valores('setor_atendimento'):
+        cubo.pacientes_unicos({'setor_atendimento': [setor]})
+    assert len(cubo._cache_distintos) == 3
+
+
+def test_cubo_nao_fica_registado_se_a_geracao_muda_durante_a_carga(tmp_path, monkeypatch):
+    caminho = str(gravar_csv(gerar_hospital(LINHAS['hospital'])[0], tmp_path / 'hospital.csv'))
+    original = rollup.obter_estado_ingestao
+    leituras = []
+
+    # A leitura feita antes de carregar vê outra geração: entre as duas
+    # leituras houve uma releitura completa do ficheiro.
+    def estado_simulado(caminho_arquivo):
+        estado = original(caminho_arquivo)
+        leituras.append(estado)
+        if len(leituras) == 1:
+            return {'geracao': 5, 'linhas': 0, 'offset': 0}
+        return estado
+
+    monkeypatch.setattr(rollup, 'obter_estado_ingestao', estado_simulado)
+    cubo = carregar_cubo_hospital(caminho)
+    assert cubo.total_atendimentos() == LINHAS['hospital']
+    assert len(leituras) == 2
+    assert caminho not in rollup._ultimos_cubos
+
+    # Sem mudança de geração o cubo fica registado como base incremental.
+    monkeypatch.setattr(rollup, 'obter_estado_ingestao', original)
+    rollup._construir_cubo_versao.clear()
+    carregar_cubo_hospital(caminho)
+    assert rollup._ultimos_cubos[caminho]['linhas'] == LINHAS['hospital']
@@ -0,0 +1,66 @@
+# ==============================================================================
+# Arquivo: test_shared_store.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes do armazém partilhado: vistas sem cópia e só de leitura.
+# ==============================================================================
+import numpy as np
+import pandas as pd
+import pytest
+from modules import shared_store
+
+
+@pytest.fixture
+def partilhado():
+    df = pd.DataFrame({
+        'id': np.arange(5, dtype='int32'),
+        'valor': np.linspace(0, 1, 5, dtype='float32'),
+        'categoria': pd.Categorical(list('abcab')),
+        'texto': list('vwxyz'),
+    })
+    chave = ('teste', id(df))
+    yield chave, shared_store.obter_ou_carregar(chave, lambda: df)
+    shared_store.limpar()
+
+
+def test_nao_altera_opcoes_globais_do_pandas():
+    assert pd.get_option('mode.copy_on_write') is not True
+
+
+def test_escritas_no_lugar_sao_recusadas(partilhado):
+    chave, vista = partilhado
+    for escrita in (lambda: vista.loc.__setitem__((0, 'id'), 9),
+                    lambda: vista.loc.__setitem__((0, 'texto'), 'q'),
+                    lambda: vista.loc.__setitem__((0, 'categoria'), 'b'),
+                    lambda: vista['valor'].to_numpy().__setitem__(0, 9)):
+        with pytest.raises(ValueError):
+            escrita()
+    outra = shared_store.obter_ou_carregar(chave, lambda: None)
+    assert outra['id'].tolist() == [0, 1, 2, 3, 4]
+    assert outra['texto'].tolist() == list('vwxyz')
+
+
+def test_colunas_novas_ficam_na_vista(partilhado):
+    chave, vista = partilhado
+    vista['id'] = vista['id'] * 2
+    vista['nova'] = 1
+    outra = shared_store.obter_ou_carregar(chave, lambda: None)
+    assert 'nova' not in outra.columns
+    assert outra['id'].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_selecionar_colunas_partilha_os_arrays(partilhado):
+    _, vista = partilhado
+    selecao = shared_store.selecionar_colunas(vista, ['valor', 'id'])
+    assert list(selecao.columns) == ['valor', 'id']
+    assert np.shares_memory(selecao['id'].to_numpy(), vista['id'].to_numpy())
+
+
+def test_periodos_nao_descartam_os_datasets():
+    try:
+        shared_store.obter_ou_carregar(('base',), lambda: pd.DataFrame({'x': [1]}))
+        for i in range(shared_store.MAX_ENTRADAS_PERIODOS + 3):
+            shared_store.obter_ou_carregar(('periodo', i), lambda: pd.DataFrame({'x': [i]}), regiao='periodos')
+        assert shared_store.obter_ou_carregar(('base',), lambda: None) is not None
+        assert len(shared_store._entradas['periodos']) == shared_store.MAX_ENTRADAS_PERIODOS
+    finally:
+        shared_store.limpar()
@@ -0,0 +1,69 @@
+# ==============================================================================
+# Arquivo: test_snapshots.py
+# Localização: /hospital_vida_plena_dashboard/tests/
+# Descrição: Testes do motor snapshot: as consultas das páginas, calculadas a
+#            partir de um snapshot gerado sobre os datasets de teste, devem
+#            dar os mesmos resultados que os motores ao vivo.
+# ==============================================================================
+import contextlib
+import io
+import pytest
+from modules import query_backend
+from modules.snapshots import PASTA_SNAPSHOTS
+import gerar_snapshots
+
+CONSULTAS = [descricao for descricao, _ in query_backend._consultas_paridade()]
+# O snapshot guarda apenas a série diária do hospital.
+SO_AO_VIVO = {'serie_hospital[hora]'}
+
+
+@pytest.fixture(scope='module')
+def pasta_snapshot(dados, tmp_path_factory):
+    """Uma pasta com data/snapshots/, gerado sobre os datasets de teste."""
+    pasta = tmp_path_factory.mktemp('snapshot')
+    with contextlib.redirect_stdout(io.StringIO()):
+        gerar_snapshots.gerar(dados['hospital'], dados['supply_chain'], dados['rh'],
+                              pasta=str(pasta / PASTA_SNAPSHOTS))
+    return pasta
+
+
+@pytest.fixture
+def snapshot(pasta_snapshot, monkeypatch):
+    """O motor snapshot, a ler a versão gerada (os caminhos são relativos)."""
+    monkeypatch.chdir(pasta_snapshot)
+    monkeypatch.delenv('HVP_SNAPSHOT', raising=False)
+    return query_backend.obter_motor('snapshot')
+
+
+@pytest.mark.parametrize('descricao', CONSULTAS)
+def test_snapshot_igual_ao_motor_pandas(dados, snapshot, descricao):
+    consulta = dict(query_backend._consultas_paridade(dados))[descricao]
+    if descricao in SO_AO_VIVO:
+        with pytest.raises(ValueError):
+            consulta(snapshot)
+        return
+    ao_vivo, resultado = consulta(query_backend.obter_motor('pandas')), consulta(snapshot)
+    if descricao.startswith('kpis_hospital['):
+        # Com filtros, os pacientes distintos são uma estimativa (ver abaixo).
+        assert isinstance(resultado.pop('pacientes_unicos'), int)
+        ao_vivo.pop('pacientes_unicos')
+    assert query_backend._iguais(ao_vivo, resultado), (ao_vivo, resultado)
+
+
+@pytest.mark.parametrize('filtros', [
+    {'convenios': ['Amil', 'SUS']},
+    {'inicio': '2022-03-01', 'fim': '2023-07-01'},
+    {'convenios': ['Unimed'], 'inicio': '2021-01-01', 'fim': '2021-02-01'},
+    {'convenios': []},
+])
+def test_pacientes_unicos_filtrados_estimados(dados, snapshot, filtros):
+    exato = query_backend.obter_motor('pandas').kpis_hospital(caminho=dados['hospital'], **filtros)
+    estimado = snapshot.kpis_hospital(caminho=dados['hospital'], **filtros)
+    assert isinstance(estimado['pacientes_unicos'], int)
+    # Com poucas centenas de pacientes, a estimativa é praticamente exata.
+    assert abs(estimado['pacientes_unicos'] - exato['pacientes_unicos']) <= 0.02 * exato['pacientes_unicos']
+
+
+def test_atendimentos_por_dimensao_nao_guardada(dados, snapshot):
+    with pytest.raises(ValueError):
+        snapshot.atendimentos_por('status_pagamento', caminho=dados['hospital'])